@@ -0,0 +1 @@
+"""Load benchmarks for the queue store; see README.md in this directory."""
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Multi-process contention benchmark for pick_next -> acquire_lease -> mark_done.
+
+Seeds a fresh queue.db with ``--rows`` PENDING items, then starts ``--workers``
+processes that each loop claim -> lease -> done against the shared file until
+the queue is drained. Prints (and optionally writes) one JSON report:
+
+- ``claims_per_sec``: completed claim/lease/done cycles per wall-clock second
+- ``claim_latency_us``: p50/p90/p99/max of the pick_next call, including lock waits
+- ``busy_retries``: ``database is locked`` errors that escaped busy_timeout and were retried
+- ``lease_failures``: acquire_lease calls that returned False right after a claim
+- ``double_claims``: items with more than one ``picked`` event (must be 0)
+
+``--baseline`` adds ratios against an earlier report so store changes can be
+compared run to run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from automation.orchestrator import db_store
+from automation.orchestrator.histogram import LatencyHistogram
+
+SEED_BATCH = 10_000
+BUSY_BACKOFF_SECONDS = 0.001
+
+
+def seed(db_path: Path, rows: int, seed_value: int = 0) -> None:
+    """Bulk-insert ``rows`` PENDING items with mixed priorities; counters are kept by the schema triggers."""
+    db_store.init_db(db_path)
+    rng = random.Random(seed_value)
+    priorities = ["P0", "P1", "P1", "P2", "P2", "P2"]
+    now = db_store.now_kst_str()
+    now_ms = db_store.now_epoch() * 1000
+    with sqlite3.connect(str(db_path)) as conn:
+        for start in range(0, rows, SEED_BATCH):
+            batch = []
+            for i in range(start, min(rows, start + SEED_BATCH)):
+                priority = rng.choice(priorities)
+                rank = db_store.priority_rank(priority)
+                batch.append((f"BENCH-{i:07d}", priority, f"task {i}", "-", now, now, now_ms + i, now_ms + i, rank))
+            conn.executemany(
+                """
+                INSERT INTO queue_items(
+                  id, status, priority, task, success_criteria, created_at, updated_at,
+                  created_at_ms, updated_at_ms, priority_rank
+                ) VALUES(?, 'PENDING', ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                batch,
+            )
+
+
+def _retry_busy(counter: list[int], fn, *args: Any):
+    while True:
+        try:
+            return fn(*args)
+        except sqlite3.OperationalError as exc:
+            if "locked" not in str(exc) and "busy" not in str(exc):
+                raise
+            counter[0] += 1
+            time.sleep(BUSY_BACKOFF_SECONDS)
+
+
+def _worker(db_path: str, owner: str, busy_timeout_ms: int, start_at: float) -> dict[str, Any]:
+    latency = LatencyHistogram()
+    busy = [0]
+    claims = lease_failures = 0
+    with db_store.QueueStore(db_path, pragmas={"busy_timeout": busy_timeout_ms}) as store:
+        store.connection()  # open and configure before the start barrier
+        time.sleep(max(0.0, start_at - time.time()))
+        while True:
+            t0 = time.perf_counter()
+            item = _retry_busy(busy, store.pick_next, owner)
+            latency.record(int((time.perf_counter() - t0) * 1_000_000))
+            if item is None:
+                break
+            if not _retry_busy(busy, store.acquire_lease, item["id"], owner, 60):
+                lease_failures += 1
+            _retry_busy(busy, store.mark_done, item["id"], "bench")
+            claims += 1
+    return {"claims": claims, "busy_retries": busy[0], "lease_failures": lease_failures, "latency": latency.to_dict()}
+
+
+def _double_claims(db_path: Path) -> int:
+    with sqlite3.connect(str(db_path)) as conn:
+        row = conn.execute(
+            """
+            SELECT COUNT(*) FROM (
+              SELECT item_id FROM queue_events WHERE event_type = 'picked' GROUP BY item_id HAVING COUNT(*) > 1
+            )
+            """
+        ).fetchone()
+    return int(row[0])
+
+
+def run(db_path: Path, rows: int, workers: int, busy_timeout_ms: int) -> dict[str, Any]:
+    seed(db_path, rows)
+    ctx = multiprocessing.get_context("spawn")
+    start_at = time.time() + 1.0 + 0.1 * workers  # lets every process finish importing before the clock starts
+    with ctx.Pool(workers) as pool:
+        pending = [
+            pool.apply_async(_worker, (str(db_path), f"bench:{n}", busy_timeout_ms, start_at)) for n in range(workers)
+        ]
+        results = [p.get() for p in pending]
+    elapsed = time.time() - start_at
+
+    latency = LatencyHistogram()
+    for r in results:
+        latency.merge(LatencyHistogram.from_dict(r["latency"]))
+    claims = sum(r["claims"] for r in results)
+    counts = db_store.status_counts(db_path)
+    return {
+        "rows": rows,
+        "workers": workers,
+        "busy_timeout_ms": busy_timeout_ms,
+        "elapsed_s": round(elapsed, 3),
+        "claims": claims,
+        "claims_per_sec": round(claims / elapsed, 1) if elapsed > 0 else None,
+        "claim_latency_us": {
+            "p50": latency.percentile(0.5),
+            "p90": latency.percentile(0.9),
+            "p99": latency.percentile(0.99),
+            "max": latency.max,
+        },
+        "busy_retries": sum(r["busy_retries"] for r in results),
+        "lease_failures": sum(r["lease_failures"] for r in results),
+        "double_claims": _double_claims(db_path),
+        "per_worker_claims": [r["claims"] for r in results],
+        "remaining": {k: v for k, v in counts.items() if k != "DONE"},
+        "sqlite_version": sqlite3.sqlite_version,
+    }
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any]) -> dict[str, Any]:
+    def ratio(new: Any, old: Any) -> float | None:
+        return round(new / old, 3) if isinstance(new, (int, float)) and isinstance(old, (int, float)) and old else None
+
+    return {
+        "claims_per_sec": ratio(report["claims_per_sec"], baseline.get("claims_per_sec")),
+        "claim_latency_p50": ratio(report["claim_latency_us"]["p50"], baseline.get("claim_latency_us", {}).get("p50")),
+        "claim_latency_p99": ratio(report["claim_latency_us"]["p99"], baseline.get("claim_latency_us", {}).get("p99")),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="pick_next/acquire_lease/mark_done contention benchmark")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--busy-timeout-ms", type=int, default=db_store.DEFAULT_PRAGMAS["busy_timeout"])
+    parser.add_argument("--db", help="DB file to (re)create (default: a temporary file)")
+    parser.add_argument("--out", help="Also write the JSON report here")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--fail-on-double-claim", action="store_true", help="Exit 1 when double_claims > 0")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as td:
+        db_path = Path(args.db) if args.db else Path(td) / "bench.db"
+        if args.db:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+        report = run(db_path, args.rows, args.workers, args.busy_timeout_ms)
+
+    if args.baseline:
+        report["vs_baseline"] = compare(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")))
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    if args.fail_on_double_claim and report["double_claims"]:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""Time-compressed soak run of SOAK_TEST_PLAN.md Profiles A and B.
+
+Drives the real code paths against a fresh queue.db under a ``SimulatedClock``:
+
+- arrivals: ``db_store.add_item`` (Poisson, with the profile's periodic bursts;
+  duplicate enqueues reuse the original idempotency key a few minutes later)
+- dispatch: ``dispatcher.DispatchDaemon.poll`` handing items to ``--sessions`` owners,
+  each claim followed by ``db_store.acquire_lease``
+- completion: ``review_and_route.route_sqlite`` (PASS) / ``db_store.mark_failed``
+  (transient) / ``enforce_guardrails.enforce`` (hard budget exceed); an injected
+  DB lock/busy leaves the worker hung so its lease expires
+- recovery: ``watchdog.RetryScheduler.poll`` on its own connection
+
+Simulated time advances in ``--tick-seconds`` steps without sleeping, so a 72h
+profile finishes in minutes. The JSON report carries SLI-1..SLI-4, the SLO
+verdicts and every abort condition that fired (with the simulated hour it first
+fired at), so capacity regressions show up per commit.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from automation.orchestrator import config, db_store, enforce_guardrails, kpi_window, review_and_route
+from automation.orchestrator.clock import SimulatedClock, use_clock
+from automation.orchestrator.dispatcher import DispatchDaemon
+from automation.orchestrator.histogram import LatencyHistogram
+from automation.orchestrator.reviewer_gate import PASS
+from automation.orchestrator.watchdog import RetryScheduler
+
+START_EPOCH = 1767225600  # 2026-01-01 09:00 KST
+PRIORITIES = ("P0", "P1", "P1", "P2", "P2", "P2")
+GUARDRAIL_REPORT = "summary: soak guardrail injection"
+
+
+class Profile(NamedTuple):
+    name: str
+    hours: float
+    base_per_min: float
+    burst_per_min: float
+    burst_every_min: int
+    burst_minutes: int
+    transient_rate: float
+    db_busy_rate: float
+    duplicate_rate: float
+    guardrail_rate: float
+    slo_success_rate: float
+    slo_p95_seconds: float
+
+
+PROFILES = {
+    "A": Profile("A", 24, 2, 8, 15, 3, 0.05, 0.0, 0.0, 0.0, 0.99, 90),
+    "B": Profile("B", 72, 5, 20, 60, 5, 0.10, 0.02, 0.01, 0.01, 0.97, 120),
+}
+
+
+def _poisson(rng: random.Random, lam: float) -> int:
+    # Knuth; per-tick rates here are small.
+    limit, k, p = math.exp(-lam), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+class SoakSimulator:
+    def __init__(
+        self,
+        db_path: Path,
+        profile: Profile,
+        *,
+        seed: int = 0,
+        sessions: int = config.DISPATCHER_MAX_SESSIONS,
+        service_seconds: float = 15.0,
+        lease_seconds: int = 120,
+        tick_seconds: float = 10.0,
+        hours: float | None = None,
+    ):
+        self.db_path = db_path
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.sessions = sessions
+        self.service_seconds = service_seconds
+        self.lease_seconds = lease_seconds
+        self.tick_seconds = tick_seconds
+        self.hours = profile.hours if hours is None else hours
+        self.clock = SimulatedClock(START_EPOCH)
+
+        self._seq = 0
+        self._dups: list[tuple[float, str]] = []
+        self._keys: dict[str, str] = {}
+        self._enqueued_at: dict[str, float] = {}
+        self._inflight: dict[str, tuple[float, str]] = {}
+        self._last_fail_at: dict[str, float] = {}
+        self._executed_by: dict[str, set[str]] = {}
+        self.duplicate_executions = 0
+        self.transient_ids: set[str] = set()
+        self.hung_ids: set[str] = set()
+        self.guardrail_ids: set[str] = set()
+        self.latency = LatencyHistogram()
+        self.window = kpi_window.KpiWindow(30)
+        self.aborts: dict[str, dict[str, Any]] = {}
+
+    # -- event sources -------------------------------------------------------------
+
+    def _now(self) -> float:
+        return self.clock.time()
+
+    def _hours(self) -> float:
+        return round((self._now() - START_EPOCH) / 3600, 3)
+
+    def _run_end(self, command: str, exit_code: int = 0) -> None:
+        self.window.add(
+            {"event": "run_end", "command": command, "exit_code": exit_code, "ts_epoch_ms": int(self._now() * 1000)}
+        )
+
+    def _abort(self, kind: str, detail: str) -> None:
+        entry = self.aborts.setdefault(kind, {"first_at_hour": self._hours(), "detail": detail, "minutes": 0})
+        entry["minutes"] += 1
+
+    def _enqueue(self, item_id: str, key: str) -> None:
+        db_store.add_item(
+            self.db_path,
+            id=item_id,
+            priority=self.rng.choice(PRIORITIES),
+            task=f"soak {item_id}",
+            success_criteria="soak",
+            idempotency_key=key,
+            max_attempts=config.DEFAULT_MAX_ATTEMPTS,
+        )
+        self._keys[item_id] = key
+        self._enqueued_at[item_id] = self._now()
+        self._run_end("add")
+
+    def _arrivals(self) -> None:
+        p = self.profile
+        minute = int((self._now() - START_EPOCH) // 60)
+        rate = p.burst_per_min if minute % p.burst_every_min < p.burst_minutes else p.base_per_min
+        for _ in range(_poisson(self.rng, rate * self.tick_seconds / 60)):
+            self._seq += 1
+            key = f"soak-{self._seq:07d}"
+            self._enqueue(f"SOAK-{self._seq:07d}", key)
+            if self.rng.random() < p.duplicate_rate:
+                self._dups.append((self._now() + self.rng.uniform(300, 1800), key))
+        due = [d for d in self._dups if d[0] <= self._now()]
+        if due:
+            self._dups = [d for d in self._dups if d[0] > self._now()]
+            for _, key in due:
+                self._enqueue("DUP-" + key.split("-", 1)[1], key)
+
+    def _on_dispatch(self, owner: str, item_id: str) -> None:
+        self._run_end("pick")
+        # A second item carrying the same key, or the same item dispatched while its worker still runs.
+        key = self._keys[item_id]
+        executed_by = self._executed_by.setdefault(key, set())
+        if (executed_by - {item_id}) or item_id in self._inflight:
+            self.duplicate_executions += 1
+            self._abort("duplicate_execution", f"idempotency_key={key} item={item_id}")
+        executed_by.add(item_id)
+        db_store.acquire_lease(self.db_path, item_id, owner, self.lease_seconds)
+
+        p = self.profile
+        roll = self.rng.random()
+        if roll < p.guardrail_rate:
+            outcome = "guardrail"
+        elif roll < p.guardrail_rate + p.db_busy_rate:
+            # Worker stuck on a lock: it never reports, the lease runs out and the watchdog requeues it.
+            self.hung_ids.add(item_id)
+            self._run_end("done", exit_code=1)
+            return
+        elif roll < p.guardrail_rate + p.db_busy_rate + p.transient_rate:
+            outcome = "fail"
+        else:
+            outcome = "done"
+        self._inflight[item_id] = (self._now() + self.rng.expovariate(1 / self.service_seconds), outcome)
+
+    def _complete(self) -> None:
+        now = self._now()
+        finished = [(item_id, outcome) for item_id, (at, outcome) in self._inflight.items() if at <= now]
+        for item_id, outcome in finished:
+            del self._inflight[item_id]
+            if outcome == "done":
+                verdict = {"verdict": PASS, "reasons": ["soak"], "missing_checks": []}
+                review_and_route.route_sqlite(self.db_path, item_id, verdict, config.DEFAULT_MAX_ATTEMPTS)
+                if item_id.startswith("SOAK-"):
+                    self.latency.record(int(now - self._enqueued_at[item_id]))
+                self._run_end("done")
+            elif outcome == "fail":
+                db_store.mark_failed(self.db_path, item_id, "soak: transient error")
+                self.transient_ids.add(item_id)
+                self._last_fail_at[item_id] = now
+                # Condition 1 is defined on SLI-1 (terminal outcomes); retryable failures are not terminal.
+                item = db_store.get_item(self.db_path, item_id) or {}
+                if int(item.get("attempt_count") or 0) >= int(item.get("max_attempts") or 0):
+                    self._run_end("fail")
+            else:
+                self.guardrail_ids.add(item_id)
+                hard = config.TOKEN_HARD_LIMIT
+                enforce_guardrails.enforce(
+                    self.db_path, item_id, GUARDRAIL_REPORT, hard + 1000, config.TOKEN_SOFT_LIMIT, hard
+                )
+
+    def _check_aborts(self) -> None:
+        for reason in self.window.abort_reasons(int(self._now() * 1000)):
+            self._abort(reason.split(" ", 1)[0].split("=", 1)[0], reason)
+
+    # -- run -----------------------------------------------------------------------
+
+    def run(self) -> dict[str, Any]:
+        started = time.perf_counter()
+        end = START_EPOCH + self.hours * 3600
+        with use_clock(self.clock):
+            db_store.init_db(self.db_path)
+            with db_store.QueueStore(self.db_path) as dispatch_store, db_store.QueueStore(self.db_path) as watch_store:
+                dispatcher = DispatchDaemon(dispatch_store, "soak", self.sessions, emit=self._on_dispatch)
+                scheduler = RetryScheduler(watch_store, emit=lambda ids: [self._run_end("retry") for _ in ids])
+                scheduler.rebuild()
+                last_minute = None
+                while self._now() < end:
+                    self._arrivals()
+                    self._complete()
+                    scheduler.poll(int(self._now()))
+                    dispatcher.poll(int(self._now()))
+                    minute = int(self._now() // 60)
+                    if minute != last_minute:
+                        last_minute = minute
+                        self._check_aborts()
+                    self.clock.advance(self.tick_seconds)
+            report = self._report(time.perf_counter() - started)
+        return report
+
+    def _report(self, wall_seconds: float) -> dict[str, Any]:
+        with sqlite3.connect(str(self.db_path)) as conn:
+            status = dict(conn.execute("SELECT id, status FROM queue_items WHERE id LIKE 'SOAK-%'").fetchall())
+        done = {i for i, s in status.items() if s == "DONE"}
+        failed = {i for i, s in status.items() if s == "FAILED"}
+        terminal = done | failed | {i for i, s in status.items() if s == "BLOCKED"}
+        for item_id in failed:
+            self.latency.record(int(self._last_fail_at.get(item_id, self._now()) - self._enqueued_at[item_id]))
+
+        def ratio(ids: set[str]) -> float | None:
+            ended = ids & terminal
+            return round(len(ids & done) / len(ended), 4) if ended else None
+
+        success_rate = round(len(done) / (len(done) + len(failed)), 4) if done or failed else None
+        p95 = self.latency.percentile(0.95)
+        duplicates = self.duplicate_executions
+        unblocked = sorted(i for i in self.guardrail_ids if status.get(i, "BLOCKED") != "BLOCKED")
+        if unblocked:
+            self._abort("guardrail_not_blocked", f"{len(unblocked)} items")
+        totals = db_store.event_totals(self.db_path)
+
+        p = self.profile
+        slo = {
+            "success_rate": success_rate is not None and success_rate >= p.slo_success_rate,
+            "latency_p95": p95 is not None and p95 <= p.slo_p95_seconds,
+            "no_duplicate_execution": duplicates == 0,
+        }
+        sim_seconds = self.hours * 3600
+        return {
+            "profile": p.name,
+            "sim_hours": self.hours,
+            "wall_seconds": round(wall_seconds, 2),
+            "compression": round(sim_seconds / wall_seconds, 1) if wall_seconds else None,
+            "sessions": self.sessions,
+            "arrivals": len(status),
+            "in_flight_at_end": len(status) - len(terminal),
+            "sli": {
+                "success_rate": success_rate,
+                "latency_p50_s": self.latency.percentile(0.5),
+                "latency_p95_s": p95,
+                "retry_recovery_rate": ratio(self.transient_ids),
+                "lease_timeout_recovery_rate": ratio(self.hung_ids),
+                "duplicate_executions": duplicates,
+                "idempotency_skips": totals.get("idempotency_skipped", 0),
+            },
+            "slo_targets": {"success_rate": p.slo_success_rate, "latency_p95_s": p.slo_p95_seconds},
+            "slo": slo,
+            "aborts": self.aborts,
+            "verdict": "PASS" if all(slo.values()) and not self.aborts else "FAIL",
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Time-compressed soak simulation (SOAK_TEST_PLAN Profiles A/B)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="A")
+    parser.add_argument("--hours", type=float, help="Override the profile duration (simulated hours)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sessions", type=int, default=config.DISPATCHER_MAX_SESSIONS)
+    parser.add_argument("--service-seconds", type=float, default=15.0, help="Mean simulated work time per item")
+    parser.add_argument("--lease-seconds", type=int, default=120)
+    parser.add_argument("--tick-seconds", type=float, default=10.0)
+    parser.add_argument("--db", help="Keep the simulated queue.db here (default: temporary)")
+    parser.add_argument("--out", help="Also write the JSON report here")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 unless the verdict is PASS")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as td:
+        db_path = Path(args.db) if args.db else Path(td) / "soak.db"
+        if args.db:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+        report = SoakSimulator(
+            db_path,
+            PROFILES[args.profile],
+            seed=args.seed,
+            sessions=args.sessions,
+            service_seconds=args.service_seconds,
+            lease_seconds=args.lease_seconds,
+            tick_seconds=args.tick_seconds,
+            hours=args.hours,
+        ).run()
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 1 if args.strict and report["verdict"] != "PASS" else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+"""Process-wide clock used for every timestamp in the package.
+
+``SystemClock`` is the default. Its ``time()`` is ``time.monotonic()`` plus one
+epoch offset, re-anchored to ``time.time()`` every ``RESYNC_SECONDS`` so NTP
+steps are picked up within a minute. Tests, benchmarks and the soak simulator
+swap in a ``SimulatedClock`` with ``set_clock``/``use_clock`` so lease expiry,
+retry backoff, ``created_at``/``updated_at`` and the serve loops follow
+simulated time instead of the wall clock.
+
+The KST formatters cache their last result: queue timestamps have minute
+resolution and run-log timestamps second resolution, so hot loops format a
+string once per minute/second instead of once per row.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Union
+
+from automation.orchestrator import config
+
+KST = timezone(timedelta(hours=config.TIMEZONE_OFFSET_HOURS))
+MINUTE_FORMAT = "%Y-%m-%d %H:%M"
+RESYNC_SECONDS = 60.0
+
+
+class SystemClock:
+    def __init__(self) -> None:
+        self._resync(time.monotonic())
+
+    def _resync(self, mono: float) -> None:
+        self._anchor = mono
+        self._offset = time.time() - mono
+
+    def time(self) -> float:
+        mono = time.monotonic()
+        if mono - self._anchor >= RESYNC_SECONDS:
+            self._resync(mono)
+        return mono + self._offset
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """Manually advanced clock; ``sleep`` advances it instead of blocking."""
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        if seconds < 0:
+            raise ValueError("cannot move a SimulatedClock backwards")
+        self._now += seconds
+
+
+Clock = Union[SystemClock, SimulatedClock]
+
+_CLOCK: Clock = SystemClock()
+_minute_cache: tuple[int, str] = (-1, "")
+_second_cache: tuple[int, str] = (-1, "")
+
+
+def get_clock() -> Clock:
+    return _CLOCK
+
+
+def set_clock(clock: Clock) -> Clock:
+    """Install ``clock`` process-wide and return the previous one."""
+    global _CLOCK
+    previous, _CLOCK = _CLOCK, clock
+    return previous
+
+
+@contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    previous = set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
+
+
+def format_kst_minute(ts: float) -> str:
+    """``YYYY-MM-DD HH:MM`` in KST, the queue's timestamp format."""
+    global _minute_cache
+    minute = int(ts // 60)
+    cached = _minute_cache
+    if cached[0] != minute:
+        cached = _minute_cache = (minute, datetime.fromtimestamp(minute * 60, KST).strftime(MINUTE_FORMAT))
+    return cached[1]
+
+
+def format_kst_iso(ts: float) -> str:
+    """ISO-8601 KST with second precision, the run log's ``ts_kst``."""
+    global _second_cache
+    second = int(ts // 1)
+    cached = _second_cache
+    if cached[0] != second:
+        cached = _second_cache = (second, datetime.fromtimestamp(second, KST).isoformat(timespec="seconds"))
+    return cached[1]
+
+
+def kst_minute_to_ms(text: str) -> int | None:
+    """Inverse of ``format_kst_minute`` in epoch ms; None for ``-``, blank or malformed values."""
+    try:
+        return int(datetime.strptime(text.strip(), MINUTE_FORMAT).replace(tzinfo=KST).timestamp()) * 1000
+    except (AttributeError, ValueError):
+        return None
+
+
+def now_epoch() -> int:
+    return int(_CLOCK.time())
+
+
+def now_kst() -> datetime:
+    return datetime.fromtimestamp(_CLOCK.time(), KST)
+
+
+def now_kst_str() -> str:
+    return format_kst_minute(_CLOCK.time())
+
+
+def now_kst_iso() -> str:
+    return format_kst_iso(_CLOCK.time())
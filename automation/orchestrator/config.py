@@ -14,6 +14,22 @@ QUEUE_MD_PATH = Path(os.getenv("ORCH_QUEUE_MD", str(BASE_DIR / "QUEUE.md")))
 DB_PATH = Path(os.getenv("ORCH_DB_PATH", str(BASE_DIR / "db" / "queue.db")))
 LOG_PATH = Path(os.getenv("ORCH_LOG_PATH", str(BASE_DIR / "logs" / "orch_runs.jsonl")))
 
+# === SQLite Tuning ===
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("ORCH_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_JOURNAL_MODE = os.getenv("ORCH_SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("ORCH_SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("ORCH_SQLITE_MMAP_SIZE", str(64 * 1024 * 1024)))
+
+# === Run Log (run_log.py) ===
+LOG_ROTATE_MAX_BYTES = int(os.getenv("ORCH_LOG_ROTATE_MAX_BYTES", str(64 * 1024 * 1024)))  # 0 disables size rotation
+LOG_ROTATE_DAILY = os.getenv("ORCH_LOG_ROTATE_DAILY", "1").strip().lower() in {"1", "true", "yes", "on"}
+LOG_ROTATE_GZIP = os.getenv("ORCH_LOG_ROTATE_GZIP", "1").strip().lower() in {"1", "true", "yes", "on"}
+LOG_BUFFER_EVENTS = int(os.getenv("ORCH_LOG_BUFFER_EVENTS", "64"))
+
+# === Event Writer ===
+EVENT_QUEUE_MAX = int(os.getenv("ORCH_EVENT_QUEUE_MAX", "10000"))
+EVENT_FLUSH_INTERVAL_MS = int(os.getenv("ORCH_EVENT_FLUSH_INTERVAL_MS", "200"))
+
 # === Timezone ===
 TIMEZONE_OFFSET_HOURS = int(os.getenv("ORCH_TZ_OFFSET", "9"))  # KST default
 
@@ -34,6 +50,25 @@ TOKEN_HARD_LIMIT = int(os.getenv("ORCH_TOKEN_HARD_LIMIT", "3500"))
 DISPATCHER_INTERVAL_MINUTES = int(os.getenv("ORCH_DISPATCHER_INTERVAL", "30"))
 WATCHDOG_INTERVAL_MINUTES = int(os.getenv("ORCH_WATCHDOG_INTERVAL", "120"))
 
+# === Dispatcher Daemon (dispatcher.py serve) ===
+DISPATCHER_SESSIONS = int(os.getenv("ORCH_DISPATCHER_SESSIONS", "3"))
+DISPATCHER_MAX_SESSIONS = 5  # hard cap, see DISPATCHER.md
+DISPATCHER_POLL_MS = int(os.getenv("ORCH_DISPATCHER_POLL_MS", "50"))
+
+# === Watchdog Daemon (watchdog.py serve) ===
+WATCHDOG_POLL_MS = int(os.getenv("ORCH_WATCHDOG_POLL_MS", "1000"))
+
+# === Soak Abort Conditions (ops kpi --window, see SOAK_TEST_PLAN.md) ===
+KPI_ABORT_MIN_SUCCESS_RATE = float(os.getenv("ORCH_KPI_ABORT_MIN_SUCCESS_RATE", "0.95"))
+KPI_STALL_MINUTES = int(os.getenv("ORCH_KPI_STALL_MINUTES", "10"))
+KPI_SILENCE_MINUTES = int(os.getenv("ORCH_KPI_SILENCE_MINUTES", "15"))
+# ops kpi e2e_p*_ms: only items that finished within this many minutes (bounds the percentile scan).
+KPI_E2E_WINDOW_MINUTES = int(os.getenv("ORCH_KPI_E2E_WINDOW_MINUTES", "1440"))
+
+# === Metrics Exporter (ops metrics-serve) ===
+METRICS_BIND = os.getenv("ORCH_METRICS_BIND", "127.0.0.1")
+METRICS_PORT = int(os.getenv("ORCH_METRICS_PORT", "9464"))
+
 # === Priority Order ===
 PRIORITY_ORDER = {"P0": 0, "P1": 1, "P2": 2}
 
@@ -41,7 +76,11 @@ PRIORITY_ORDER = {"P0": 0, "P1": 1, "P2": 2}
 TOP_IN_PROGRESS_DISPLAY = int(os.getenv("ORCH_TOP_IN_PROGRESS", "5"))
 
 # === Storage Mode ===
-QUEUE_MD_READ_ONLY = os.getenv("ORCH_QUEUE_MD_READ_ONLY", "0").strip().lower() in {"1", "true", "yes", "on"}
+_TRUTHY = {"1", "true", "yes", "on"}
+QUEUE_MD_READ_ONLY = os.getenv("ORCH_QUEUE_MD_READ_ONLY", "0").strip().lower() in _TRUTHY
+QUEUE_MD_LOCK_TIMEOUT_SECONDS = float(os.getenv("ORCH_QUEUE_MD_LOCK_TIMEOUT", "30"))
+QUEUE_MD_PARSE_CACHE_SIZE = int(os.getenv("ORCH_QUEUE_MD_PARSE_CACHE_SIZE", "16"))  # 0 disables
+QUEUE_MD_PARSE_CACHE_SIDECAR = os.getenv("ORCH_QUEUE_MD_PARSE_CACHE_SIDECAR", "0").strip().lower() in _TRUTHY
 
 
 def get_config_summary() -> dict:
@@ -51,6 +90,16 @@ def get_config_summary() -> dict:
         "queue_md_path": str(QUEUE_MD_PATH),
         "db_path": str(DB_PATH),
         "log_path": str(LOG_PATH),
+        "log_rotate_max_bytes": LOG_ROTATE_MAX_BYTES,
+        "log_rotate_daily": LOG_ROTATE_DAILY,
+        "log_rotate_gzip": LOG_ROTATE_GZIP,
+        "log_buffer_events": LOG_BUFFER_EVENTS,
+        "sqlite_busy_timeout_ms": SQLITE_BUSY_TIMEOUT_MS,
+        "sqlite_journal_mode": SQLITE_JOURNAL_MODE,
+        "sqlite_synchronous": SQLITE_SYNCHRONOUS,
+        "sqlite_mmap_size": SQLITE_MMAP_SIZE,
+        "event_queue_max": EVENT_QUEUE_MAX,
+        "event_flush_interval_ms": EVENT_FLUSH_INTERVAL_MS,
         "timezone_offset_hours": TIMEZONE_OFFSET_HOURS,
         "default_lease_seconds": DEFAULT_LEASE_SECONDS,
         "retry_backoff_seconds": RETRY_BACKOFF_SECONDS,
@@ -59,5 +108,17 @@ def get_config_summary() -> dict:
         "token_hard_limit": TOKEN_HARD_LIMIT,
         "dispatcher_interval_minutes": DISPATCHER_INTERVAL_MINUTES,
         "watchdog_interval_minutes": WATCHDOG_INTERVAL_MINUTES,
+        "dispatcher_sessions": DISPATCHER_SESSIONS,
+        "dispatcher_poll_ms": DISPATCHER_POLL_MS,
+        "watchdog_poll_ms": WATCHDOG_POLL_MS,
+        "kpi_abort_min_success_rate": KPI_ABORT_MIN_SUCCESS_RATE,
+        "kpi_stall_minutes": KPI_STALL_MINUTES,
+        "kpi_silence_minutes": KPI_SILENCE_MINUTES,
+        "kpi_e2e_window_minutes": KPI_E2E_WINDOW_MINUTES,
+        "metrics_bind": METRICS_BIND,
+        "metrics_port": METRICS_PORT,
         "queue_md_read_only": QUEUE_MD_READ_ONLY,
+        "queue_md_lock_timeout_seconds": QUEUE_MD_LOCK_TIMEOUT_SECONDS,
+        "queue_md_parse_cache_size": QUEUE_MD_PARSE_CACHE_SIZE,
+        "queue_md_parse_cache_sidecar": QUEUE_MD_PARSE_CACHE_SIDECAR,
     }
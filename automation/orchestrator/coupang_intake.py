@@ -12,10 +12,10 @@ from __future__ import annotations
 import argparse
 import re
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
 
-from automation.orchestrator.orch import KST, QueueFile, QueueRow
+from automation.orchestrator.clock import now_kst
+from automation.orchestrator.orch import QueueFile, QueueRow
 
 ORCH_ID_RE = re.compile(r"^ORCH-(\d+)$")
 
@@ -97,26 +97,26 @@ def cmd_plan(args: argparse.Namespace) -> int:
 
 def cmd_submit(args: argparse.Namespace) -> int:
     spec = build_spec(args)
-    qf = QueueFile(Path(args.queue))
-    row_id = _next_orch_id(qf.rows)
-
-    now_tag = datetime.now(KST).strftime("%Y%m%d-%H%M")
-    notes = f"coupang_intake:{now_tag} mode={spec.mode}"
-
-    qf.rows.append(
-        QueueRow(
-            id=row_id,
-            status="PENDING",
-            priority=args.priority,
-            task=_task_line(spec),
-            success_criteria=_success_criteria(spec),
-            owner_session="-",
-            started_at_kst="-",
-            due_at_kst=args.due_at_kst or "-",
-            notes=notes,
+    with QueueFile(Path(args.queue), lock=True) as qf:
+        row_id = _next_orch_id(qf.rows)
+
+        now_tag = now_kst().strftime("%Y%m%d-%H%M")
+        notes = f"coupang_intake:{now_tag} mode={spec.mode}"
+
+        qf.add_row(
+            QueueRow(
+                id=row_id,
+                status="PENDING",
+                priority=args.priority,
+                task=_task_line(spec),
+                success_criteria=_success_criteria(spec),
+                owner_session="-",
+                started_at_kst="-",
+                due_at_kst=args.due_at_kst or "-",
+                notes=notes,
+            )
         )
-    )
-    qf.save()
+        qf.save()
 
     print(f"created=1 id={row_id}")
     print(f"task={_task_line(spec)}")
@@ -17,7 +17,15 @@ CREATE TABLE IF NOT EXISTS queue_items (
   attempt_count INTEGER NOT NULL DEFAULT 0,
   max_attempts INTEGER NOT NULL DEFAULT 3,
   idempotency_key TEXT,
-  last_error TEXT NOT NULL DEFAULT ''
+  last_error TEXT NOT NULL DEFAULT '',
+  not_before INTEGER NOT NULL DEFAULT 0,
+  priority_rank INTEGER NOT NULL DEFAULT 99,
+  -- Epoch-ms twins of the KST display strings; ordering, stale checks and latency SLIs use these.
+  created_at_ms INTEGER NOT NULL DEFAULT 0,
+  updated_at_ms INTEGER NOT NULL DEFAULT 0,
+  started_at_ms INTEGER,
+  finished_at_ms INTEGER,
+  lease_acquired_at INTEGER
 );
 
 CREATE TABLE IF NOT EXISTS queue_events (
@@ -39,4 +47,81 @@ CREATE INDEX IF NOT EXISTS idx_queue_items_lease
   ON queue_items(lease_expires_at);
 
 CREATE INDEX IF NOT EXISTS idx_queue_items_idempotency
-  ON queue_items(idempotency_key);
\ No newline at end of file
+  ON queue_items(idempotency_key);
+CREATE INDEX IF NOT EXISTS idx_queue_items_not_before
+  ON queue_items(status, not_before);
+
+-- Dispatch order (status, priority_rank, created_at_ms); not_before and id ride along so
+-- the next-item lookup is answered from the index alone.
+CREATE INDEX IF NOT EXISTS idx_queue_items_dispatch
+  ON queue_items(status, priority_rank, created_at_ms, not_before, id);
+
+-- Stale IN_PROGRESS detection as a range scan.
+CREATE INDEX IF NOT EXISTS idx_queue_items_started
+  ON queue_items(status, started_at_ms);
+
+-- Enqueue -> terminal latency over a finished_at_ms window, answered from the index.
+CREATE INDEX IF NOT EXISTS idx_queue_items_finished
+  ON queue_items(finished_at_ms, status, created_at_ms);
+
+CREATE INDEX IF NOT EXISTS idx_queue_events_item
+  ON queue_events(item_id, event_id);
+
+CREATE INDEX IF NOT EXISTS idx_queue_events_created_at
+  ON queue_events(created_at);
+
+-- Lifetime event counts by type. Maintained on insert only, so totals survive
+-- compact_events() archiving rows out of queue_events.
+CREATE TABLE IF NOT EXISTS queue_event_totals (
+  event_type TEXT PRIMARY KEY,
+  total INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_queue_event_totals
+AFTER INSERT ON queue_events
+BEGIN
+  INSERT INTO queue_event_totals(event_type, total) VALUES (NEW.event_type, 1)
+  ON CONFLICT(event_type) DO UPDATE SET total = total + 1;
+END;
+
+-- Row counts by (status, priority, owner_session), kept current by the triggers below
+-- so status/worker dashboards never scan queue_items. init_db rebuilds it from scratch.
+CREATE TABLE IF NOT EXISTS queue_counters (
+  status TEXT NOT NULL,
+  priority TEXT NOT NULL,
+  owner_session TEXT NOT NULL,
+  n INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (status, priority, owner_session)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_queue_counters_insert
+AFTER INSERT ON queue_items
+BEGIN
+  INSERT INTO queue_counters(status, priority, owner_session, n)
+  VALUES (NEW.status, NEW.priority, NEW.owner_session, 1)
+  ON CONFLICT(status, priority, owner_session) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_queue_counters_delete
+AFTER DELETE ON queue_items
+BEGIN
+  UPDATE queue_counters SET n = n - 1
+  WHERE status = OLD.status AND priority = OLD.priority AND owner_session = OLD.owner_session;
+  DELETE FROM queue_counters
+  WHERE status = OLD.status AND priority = OLD.priority AND owner_session = OLD.owner_session AND n <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_queue_counters_update
+AFTER UPDATE OF status, priority, owner_session ON queue_items
+WHEN OLD.status IS NOT NEW.status
+  OR OLD.priority IS NOT NEW.priority
+  OR OLD.owner_session IS NOT NEW.owner_session
+BEGIN
+  UPDATE queue_counters SET n = n - 1
+  WHERE status = OLD.status AND priority = OLD.priority AND owner_session = OLD.owner_session;
+  DELETE FROM queue_counters
+  WHERE status = OLD.status AND priority = OLD.priority AND owner_session = OLD.owner_session AND n <= 0;
+  INSERT INTO queue_counters(status, priority, owner_session, n)
+  VALUES (NEW.status, NEW.priority, NEW.owner_session, 1)
+  ON CONFLICT(status, priority, owner_session) DO UPDATE SET n = n + 1;
+END;
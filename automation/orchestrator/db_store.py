@@ -1,66 +1,189 @@
 from __future__ import annotations
 
+import gzip
+import itertools
 import json
+import os
+import queue
+import re
 import sqlite3
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Mapping, Sequence
 
 from automation.orchestrator import config
+from automation.orchestrator.clock import KST, format_kst_minute, get_clock, now_epoch, now_kst_str
 
-KST = timezone(timedelta(hours=config.TIMEZONE_OFFSET_HOURS))
 PRIORITY_ORDER = config.PRIORITY_ORDER
 RETRY_BACKOFF_SECONDS = config.RETRY_BACKOFF_SECONDS
 
+# UPDATE ... RETURNING landed in SQLite 3.35; older builds use a compare-and-set claim.
+_SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_PRIORITY_ORDER_SQL = "ORDER BY priority_rank ASC, created_at_ms ASC"
 
-def now_kst_str() -> str:
-    return datetime.now(KST).strftime("%Y-%m-%d %H:%M")
 
+def priority_rank(priority: str) -> int:
+    return PRIORITY_ORDER.get(priority, 99)
 
-def now_epoch() -> int:
-    return int(datetime.now(timezone.utc).timestamp())
 
+def _priority_rank_sql(column: str) -> str:
+    whens = " ".join(f"WHEN '{name}' THEN {int(rank)}" for name, rank in PRIORITY_ORDER.items())
+    return f"CASE {column} {whens} ELSE 99 END"
 
-def _conn(path: str | Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(path))
+
+def _kst_ms_sql(column: str) -> str:
+    """SQL for a ``YYYY-MM-DD HH:MM`` KST column as epoch ms (NULL for '-' or malformed values)."""
+    offset = int(config.TIMEZONE_OFFSET_HOURS * 3600)
+    return f"(CAST(strftime('%s', {column}) AS INTEGER) - {offset}) * 1000"
+
+
+def _now_stamp() -> tuple[str, int]:
+    """(KST display string, epoch ms) from a single clock read."""
+    ts = get_clock().time()
+    return format_kst_minute(ts), int(ts * 1000)
+
+
+# Applied once per connection, in this order (busy_timeout first so the others can wait on locks).
+DEFAULT_PRAGMAS: dict[str, Any] = {
+    "busy_timeout": config.SQLITE_BUSY_TIMEOUT_MS,
+    # Only takes effect while the file is still empty (i.e. before journal_mode writes
+    # the header); existing databases switch on the next full VACUUM.
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": config.SQLITE_JOURNAL_MODE,
+    "synchronous": config.SQLITE_SYNCHRONOUS,
+    "mmap_size": config.SQLITE_MMAP_SIZE,
+    "temp_store": "MEMORY",
+}
+
+
+def _apply_pragmas(conn: sqlite3.Connection, pragmas: Mapping[str, Any]) -> None:
+    for name, value in pragmas.items():
+        if value is None or value == "":
+            continue
+        conn.execute(f"PRAGMA {name} = {value}").fetchall()
+
+
+def _conn(path: str | Path, pragmas: Mapping[str, Any] | None = None, **kwargs: Any) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), **kwargs)
     conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn, DEFAULT_PRAGMAS if pragmas is None else pragmas)
     return conn
 
 
+# Columns added to queue_items after its first release, in the order they are added.
+_MIGRATED_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("lease_owner", "TEXT"),
+    ("lease_expires_at", "INTEGER"),
+    ("attempt_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("max_attempts", "INTEGER NOT NULL DEFAULT 3"),
+    ("idempotency_key", "TEXT"),
+    ("last_error", "TEXT NOT NULL DEFAULT ''"),
+    ("not_before", "INTEGER NOT NULL DEFAULT 0"),
+    ("priority_rank", "INTEGER NOT NULL DEFAULT 99"),
+    ("created_at_ms", "INTEGER NOT NULL DEFAULT 0"),
+    ("updated_at_ms", "INTEGER NOT NULL DEFAULT 0"),
+    ("started_at_ms", "INTEGER"),
+    ("finished_at_ms", "INTEGER"),
+    ("lease_acquired_at", "INTEGER"),
+)
+_SCHEMA_PATH = Path(__file__).parent / "db" / "schema.sql"
+
+
 def _ensure_schema_migrations(conn: sqlite3.Connection) -> None:
     cols = {r[1] for r in conn.execute("PRAGMA table_info(queue_items)").fetchall()}
-    add_cols: list[tuple[str, str]] = []
-    if "lease_owner" not in cols:
-        add_cols.append(("lease_owner", "TEXT"))
-    if "lease_expires_at" not in cols:
-        add_cols.append(("lease_expires_at", "INTEGER"))
-    if "attempt_count" not in cols:
-        add_cols.append(("attempt_count", "INTEGER NOT NULL DEFAULT 0"))
-    if "max_attempts" not in cols:
-        add_cols.append(("max_attempts", "INTEGER NOT NULL DEFAULT 3"))
-    if "idempotency_key" not in cols:
-        add_cols.append(("idempotency_key", "TEXT"))
-    if "last_error" not in cols:
-        add_cols.append(("last_error", "TEXT NOT NULL DEFAULT ''"))
-
-    for name, ddl in add_cols:
-        conn.execute(f"ALTER TABLE queue_items ADD COLUMN {name} {ddl}")
+    for name, ddl in _MIGRATED_COLUMNS:
+        if name not in cols:
+            conn.execute(f"ALTER TABLE queue_items ADD COLUMN {name} {ddl}")
 
     conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_items_lease ON queue_items(lease_expires_at)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_items_idempotency ON queue_items(idempotency_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_items_not_before ON queue_items(status, not_before)")
+    # Dispatch order moved from the minute-resolution created_at string to created_at_ms.
+    dispatch = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_queue_items_dispatch'").fetchone()
+    if dispatch is not None and "created_at_ms" not in dispatch[0]:
+        conn.execute("DROP INDEX idx_queue_items_dispatch")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_queue_items_dispatch "
+        "ON queue_items(status, priority_rank, created_at_ms, not_before, id)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_items_started ON queue_items(status, started_at_ms)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_queue_items_finished ON queue_items(finished_at_ms, status, created_at_ms)"
+    )
+    # Backfill epoch columns for rows written before they existed (or by raw inserts):
+    # derived from the KST strings, so minute resolution; terminal rows use updated_at.
+    conn.execute(
+        f"UPDATE queue_items SET created_at_ms = COALESCE({_kst_ms_sql('created_at')}, 0), "
+        f"updated_at_ms = COALESCE({_kst_ms_sql('updated_at')}, 0) WHERE created_at_ms = 0"
+    )
+    conn.execute(
+        f"UPDATE queue_items SET started_at_ms = {_kst_ms_sql('started_at_kst')} "
+        "WHERE status = 'IN_PROGRESS' AND started_at_ms IS NULL"
+    )
+    conn.execute(
+        f"UPDATE queue_items SET finished_at_ms = {_kst_ms_sql('updated_at')} "
+        "WHERE status IN ('DONE', 'FAILED', 'BLOCKED') AND finished_at_ms IS NULL AND created_at_ms > 0"
+    )
+    # Re-derive ranks so rows written before the column existed (or under a different
+    # PRIORITY_ORDER) sort correctly.
+    rank_sql = _priority_rank_sql("priority")
+    conn.execute(f"UPDATE queue_items SET priority_rank = {rank_sql} WHERE priority_rank != {rank_sql}")
+
+
+def _init_schema(conn: sqlite3.Connection) -> None:
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'queue_items'").fetchone()
+    if exists:
+        # Older tables must gain new columns before schema.sql indexes them.
+        _ensure_schema_migrations(conn)
+    conn.executescript(_SCHEMA_PATH.read_text(encoding="utf-8"))
+    _ensure_schema_migrations(conn)
+    conn.execute("DELETE FROM queue_counters")
+    conn.execute(
+        "INSERT INTO queue_counters(status, priority, owner_session, n) "
+        "SELECT status, priority, owner_session, COUNT(*) FROM queue_items GROUP BY status, priority, owner_session"
+    )
+    if conn.execute("SELECT 1 FROM queue_event_totals LIMIT 1").fetchone() is None:
+        conn.execute(
+            "INSERT INTO queue_event_totals(event_type, total) "
+            "SELECT event_type, COUNT(*) FROM queue_events GROUP BY event_type"
+        )
 
 
 def init_db(path: str | Path) -> None:
     db_path = Path(path)
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    schema_path = Path(__file__).parent / "db" / "schema.sql"
-    schema = schema_path.read_text(encoding="utf-8")
     with _conn(db_path) as conn:
-        conn.executescript(schema)
-        _ensure_schema_migrations(conn)
+        _init_schema(conn)
+
 
+_SCHEMA_OBJECTS = frozenset(re.findall(r"CREATE \w+ IF NOT EXISTS (\w+)", _SCHEMA_PATH.read_text(encoding="utf-8")))
 
-def list_items(path: str | Path, status: str | None = None, priority: str | None = None) -> list[dict[str, Any]]:
+
+def _schema_is_current(conn: sqlite3.Connection) -> bool:
+    objects = {r[0]: r[1] for r in conn.execute("SELECT name, sql FROM sqlite_master").fetchall()}
+    if not _SCHEMA_OBJECTS <= objects.keys() or "created_at_ms" not in objects["idx_queue_items_dispatch"]:
+        return False
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(queue_items)").fetchall()}
+    return all(name in cols for name, _ in _MIGRATED_COLUMNS)
+
+
+def ensure_schema(path: str | Path) -> None:
+    """``init_db`` unless every table, index, trigger and column the code relies on already exists.
+
+    A handful of catalog reads, so CLI entry points call it on every run instead
+    of failing with "no such column/table" on a database created by an older version.
+    """
+    with _conn(path) as conn:
+        current = _schema_is_current(conn)
+    if not current:
+        init_db(path)
+
+
+def _list_items(
+    conn: sqlite3.Connection, status: str | None = None, priority: str | None = None, limit: int | None = None
+) -> list[dict[str, Any]]:
     sql = "SELECT * FROM queue_items"
     where = []
     params: list[Any] = []
@@ -72,22 +195,265 @@ def list_items(path: str | Path, status: str | None = None, priority: str | None
         params.append(priority)
     if where:
         sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY CASE priority WHEN 'P0' THEN 0 WHEN 'P1' THEN 1 WHEN 'P2' THEN 2 ELSE 99 END, created_at ASC"
+    sql += f" {_PRIORITY_ORDER_SQL}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+
+def list_items(
+    path: str | Path, status: str | None = None, priority: str | None = None, limit: int | None = None
+) -> list[dict[str, Any]]:
+    with _conn(path) as conn:
+        return _list_items(conn, status, priority, limit)
+
+
+_GET_ITEMS_CHUNK = 500
+
+
+def _get_item(conn: sqlite3.Connection, item_id: str) -> dict[str, Any] | None:
+    row = conn.execute("SELECT * FROM queue_items WHERE id = ?", (item_id,)).fetchone()
+    return dict(row) if row is not None else None
+
+
+def _get_items(conn: sqlite3.Connection, ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+    wanted = list(dict.fromkeys(ids))
+    found: dict[str, dict[str, Any]] = {}
+    # Chunked to stay under SQLite's bound-parameter limit on older builds.
+    for start in range(0, len(wanted), _GET_ITEMS_CHUNK):
+        chunk = wanted[start : start + _GET_ITEMS_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        for row in conn.execute(f"SELECT * FROM queue_items WHERE id IN ({marks})", chunk):
+            found[row["id"]] = dict(row)
+    return found
 
+
+def get_item(path: str | Path, item_id: str) -> dict[str, Any] | None:
+    """Primary-key lookup; None when the id does not exist."""
+    with _conn(path) as conn:
+        return _get_item(conn, item_id)
+
+
+def get_items(path: str | Path, ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+    """Batch primary-key lookup keyed by id; missing ids are omitted."""
+    with _conn(path) as conn:
+        return _get_items(conn, ids)
+
+
+def _status_counts(conn: sqlite3.Connection) -> dict[str, int]:
+    rows = conn.execute("SELECT status, SUM(n) AS n FROM queue_counters GROUP BY status").fetchall()
+    return {r["status"]: int(r["n"]) for r in rows if r["n"]}
+
+
+def status_counts(path: str | Path) -> dict[str, int]:
+    """Item counts by status from the trigger-maintained queue_counters table."""
     with _conn(path) as conn:
-        rows = conn.execute(sql, params).fetchall()
+        return _status_counts(conn)
+
+
+def _counters(conn: sqlite3.Connection) -> list[dict[str, Any]]:
+    rows = conn.execute("SELECT status, priority, owner_session, n FROM queue_counters WHERE n > 0").fetchall()
     return [dict(r) for r in rows]
 
 
-def append_event(path: str | Path, item_id: str, event_type: str, payload: dict[str, Any] | None = None) -> int:
-    payload_json = json.dumps(payload or {}, ensure_ascii=False, sort_keys=True)
-    now = now_kst_str()
+def counters(path: str | Path) -> list[dict[str, Any]]:
+    """Non-zero (status, priority, owner_session, n) counter rows."""
     with _conn(path) as conn:
-        cur = conn.execute(
-            "INSERT INTO queue_events(item_id, event_type, payload_json, created_at) VALUES(?, ?, ?, ?)",
-            (item_id, event_type, payload_json, now),
+        return _counters(conn)
+
+
+def _oldest_pending_created_at_ms(conn: sqlite3.Connection) -> int | None:
+    # One MIN per priority rank, each answered by a seek on idx_queue_items_dispatch.
+    oldest = None
+    for rank in sorted({*PRIORITY_ORDER.values(), priority_rank("")}):
+        row = conn.execute(
+            "SELECT MIN(created_at_ms) FROM queue_items WHERE status = 'PENDING' AND priority_rank = ?", (rank,)
+        ).fetchone()
+        if row[0] is not None and (oldest is None or row[0] < oldest):
+            oldest = int(row[0])
+    return oldest
+
+
+def oldest_pending_created_at_ms(path: str | Path) -> int | None:
+    """created_at_ms of the oldest PENDING item, or None when none are pending."""
+    with _conn(path) as conn:
+        return _oldest_pending_created_at_ms(conn)
+
+
+def _active_leases(conn: sqlite3.Connection, now_ts: int) -> list[dict[str, Any]]:
+    rows = conn.execute(
+        """
+        SELECT lease_owner, COUNT(*) AS n, MIN(lease_acquired_at) AS oldest_acquired_at
+        FROM queue_items
+        WHERE lease_expires_at > ?
+        GROUP BY lease_owner
+        ORDER BY lease_owner
+        """,
+        (now_ts,),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def active_leases(path: str | Path, now_ts: int) -> list[dict[str, Any]]:
+    """Per-owner (lease_owner, n, oldest_acquired_at) of leases unexpired at ``now_ts``.
+
+    A range scan on idx_queue_items_lease, so expired and never-leased rows are not read.
+    """
+    with _conn(path) as conn:
+        return _active_leases(conn, now_ts)
+
+
+def _count_stale_in_progress(conn: sqlite3.Connection, started_before_ms: int) -> int:
+    row = conn.execute(
+        "SELECT COUNT(*) FROM queue_items WHERE status = 'IN_PROGRESS' AND started_at_ms <= ?", (started_before_ms,)
+    ).fetchone()
+    return int(row[0])
+
+
+def count_stale_in_progress(path: str | Path, started_before_ms: int) -> int:
+    """IN_PROGRESS items started at or before ``started_before_ms`` (a range scan on idx_queue_items_started)."""
+    with _conn(path) as conn:
+        return _count_stale_in_progress(conn, started_before_ms)
+
+
+def _terminal_latency(conn: sqlite3.Connection, since_ms: int | None, until_ms: int | None) -> dict[str, Any]:
+    where = "finished_at_ms >= ? AND finished_at_ms < ? AND status IN ('DONE', 'FAILED', 'BLOCKED')"
+    bounds = (0 if since_ms is None else since_ms, 2**63 - 1 if until_ms is None else until_ms)
+    row = conn.execute(
+        f"""
+        SELECT COUNT(*), COALESCE(SUM(status = 'DONE'), 0), COALESCE(SUM(status = 'FAILED'), 0),
+               AVG(finished_at_ms - created_at_ms), MAX(finished_at_ms - created_at_ms)
+        FROM queue_items WHERE {where}
+        """,
+        bounds,
+    ).fetchone()
+    n, done, failed = int(row[0]), int(row[1]), int(row[2])
+    out: dict[str, Any] = {
+        "terminal": n,
+        "done": done,
+        "failed": failed,
+        "success_rate": round(done / (done + failed), 4) if done + failed else None,
+        "latency_avg_ms": None if row[3] is None else round(row[3], 1),
+        "latency_max_ms": row[4],
+    }
+    # Nearest-rank percentiles from one sorted scan, stopped at the highest rank needed.
+    ranks = {f"latency_p{round(p * 100)}_ms": int((n - 1) * p) for p in (0.5, 0.95, 0.99)}
+    values: list[int] = []
+    if n:
+        cursor = conn.execute(
+            f"SELECT finished_at_ms - created_at_ms AS ms FROM queue_items WHERE {where} ORDER BY ms LIMIT ?",
+            (*bounds, max(ranks.values()) + 1),
         )
-        return int(cur.lastrowid)
+        values = [r[0] for r in cursor]
+    for key, rank in ranks.items():
+        out[key] = values[rank] if values else None
+    return out
+
+
+def terminal_latency(path: str | Path, since_ms: int | None = None, until_ms: int | None = None) -> dict[str, Any]:
+    """SLI-1/SLI-2 over items that reached DONE/FAILED/BLOCKED in ``[since_ms, until_ms)``.
+
+    Latency is enqueue -> terminal (``finished_at_ms - created_at_ms``); success_rate is
+    DONE / (DONE + FAILED). Answered from idx_queue_items_finished.
+    """
+    with _conn(path) as conn:
+        return _terminal_latency(conn, since_ms, until_ms)
+
+
+def _busy_owners(conn: sqlite3.Connection) -> set[str]:
+    rows = conn.execute(
+        "SELECT DISTINCT owner_session FROM queue_counters WHERE status = 'IN_PROGRESS' AND n > 0"
+    ).fetchall()
+    return {r["owner_session"] for r in rows}
+
+
+def busy_owners(path: str | Path) -> set[str]:
+    """owner_session values that currently hold at least one IN_PROGRESS item."""
+    with _conn(path) as conn:
+        return _busy_owners(conn)
+
+
+def _next_not_before(conn: sqlite3.Connection, now_ts: int) -> int | None:
+    row = conn.execute(
+        "SELECT MIN(not_before) FROM queue_items WHERE status = 'PENDING' AND not_before > ?", (now_ts,)
+    ).fetchone()
+    return row[0]
+
+
+def next_not_before(path: str | Path, now_ts: int | None = None) -> int | None:
+    """Earliest future not_before among PENDING items, or None when nothing is deferred."""
+    with _conn(path) as conn:
+        return _next_not_before(conn, now_ts if now_ts is not None else now_epoch())
+
+
+def _insert_event(conn: sqlite3.Connection, item_id: str, event_type: str, payload: dict[str, Any] | None = None) -> int:
+    cur = conn.execute(
+        "INSERT INTO queue_events(item_id, event_type, payload_json, created_at) VALUES(?, ?, ?, ?)",
+        _event_params(item_id, event_type, payload, now_kst_str()),
+    )
+    return int(cur.lastrowid)
+
+
+def _insert_events(conn: sqlite3.Connection, events: Sequence[tuple[str, str, dict[str, Any] | None]]) -> None:
+    if not events:
+        return
+    now = now_kst_str()
+    conn.executemany(
+        "INSERT INTO queue_events(item_id, event_type, payload_json, created_at) VALUES(?, ?, ?, ?)",
+        [_event_params(item_id, event_type, payload, now) for item_id, event_type, payload in events],
+    )
+
+
+def _event_params(
+    item_id: str, event_type: str, payload: dict[str, Any] | None, created_at: str
+) -> tuple[str, str, str, str]:
+    return item_id, event_type, json.dumps(payload or {}, ensure_ascii=False, sort_keys=True), created_at
+
+
+def append_event(path: str | Path, item_id: str, event_type: str, payload: dict[str, Any] | None = None) -> int:
+    with _conn(path) as conn:
+        return _insert_event(conn, item_id, event_type, payload)
+
+
+def _add_item(
+    conn: sqlite3.Connection,
+    *,
+    id: str,
+    priority: str,
+    task: str,
+    success_criteria: str,
+    due_at_kst: str = "-",
+    notes: str = "",
+    idempotency_key: str | None = None,
+    max_attempts: int = 3,
+) -> None:
+    now, now_ms = _now_stamp()
+    conn.execute(
+        """
+        INSERT INTO queue_items(
+          id, status, priority, task, success_criteria, owner_session,
+          started_at_kst, due_at_kst, notes, created_at, updated_at, created_at_ms, updated_at_ms,
+          attempt_count, max_attempts, idempotency_key, last_error, priority_rank
+        ) VALUES(?, 'PENDING', ?, ?, ?, '-', '-', ?, ?, ?, ?, ?, ?, 0, ?, ?, '', ?)
+        """,
+        (
+            id,
+            priority,
+            task,
+            success_criteria,
+            due_at_kst or "-",
+            notes,
+            now,
+            now,
+            now_ms,
+            now_ms,
+            max_attempts,
+            idempotency_key,
+            priority_rank(priority),
+        ),
+    )
+    _insert_event(conn, id, "added", {"priority": priority, "idempotency_key": idempotency_key})
 
 
 def add_item(
@@ -102,19 +468,18 @@ def add_item(
     idempotency_key: str | None = None,
     max_attempts: int = 3,
 ) -> None:
-    now = now_kst_str()
     with _conn(path) as conn:
-        conn.execute(
-            """
-            INSERT INTO queue_items(
-              id, status, priority, task, success_criteria, owner_session,
-              started_at_kst, due_at_kst, notes, created_at, updated_at,
-              attempt_count, max_attempts, idempotency_key, last_error
-            ) VALUES(?, 'PENDING', ?, ?, ?, '-', '-', ?, ?, ?, ?, 0, ?, ?, '')
-            """,
-            (id, priority, task, success_criteria, due_at_kst or "-", notes, now, now, max_attempts, idempotency_key),
+        _add_item(
+            conn,
+            id=id,
+            priority=priority,
+            task=task,
+            success_criteria=success_criteria,
+            due_at_kst=due_at_kst,
+            notes=notes,
+            idempotency_key=idempotency_key,
+            max_attempts=max_attempts,
         )
-    append_event(path, id, "added", {"priority": priority, "idempotency_key": idempotency_key})
 
 
 def _completed_idempotency_exists(conn: sqlite3.Connection, key: str, exclude_id: str | None = None) -> bool:
@@ -128,210 +493,971 @@ def _completed_idempotency_exists(conn: sqlite3.Connection, key: str, exclude_id
 
 
 def _mark_duplicate_done(conn: sqlite3.Connection, item_id: str) -> None:
-    now = now_kst_str()
+    now, now_ms = _now_stamp()
     conn.execute(
         """
         UPDATE queue_items
         SET status = 'DONE',
+            owner_session = '-',
+            started_at_kst = '-',
+            started_at_ms = NULL,
+            finished_at_ms = ?,
             notes = CASE
               WHEN notes = '' THEN 'Skipped duplicate by idempotency_key'
               ELSE notes || ' | Skipped duplicate by idempotency_key'
             END,
-            updated_at = ?
+            updated_at = ?,
+            updated_at_ms = ?
         WHERE id = ?
         """,
-        (now, item_id),
+        (now_ms, now, now_ms, item_id),
     )
 
 
-def pick_next(path: str | Path, owner_session: str) -> dict[str, Any] | None:
-    picked_item_id: str | None = None
-    skipped_duplicates: list[str] = []
-    with _conn(path) as conn:
-        while True:
-            row = conn.execute(
-                """
-                SELECT * FROM queue_items
-                WHERE status = 'PENDING'
-                ORDER BY CASE priority WHEN 'P0' THEN 0 WHEN 'P1' THEN 1 WHEN 'P2' THEN 2 ELSE 99 END,
-                         created_at ASC
-                LIMIT 1
-                """
-            ).fetchone()
-            if row is None:
-                break
+def _pending_sort_key(row: sqlite3.Row) -> tuple[int, int]:
+    return row["priority_rank"], row["created_at_ms"]
+
+
+def _claim_pending(conn: sqlite3.Connection, owner_session: str, limit: int, now_ts: int) -> list[sqlite3.Row]:
+    now, now_ms = _now_stamp()
+    # Both claim queries write ``+not_before`` so the planner walks idx_queue_items_dispatch
+    # in order (filtering not_before from the index) rather than range-scanning
+    # idx_queue_items_not_before and sorting the result in a temp B-tree.
+    if _SUPPORTS_RETURNING:
+        rows = conn.execute(
+            f"""
+            UPDATE queue_items
+            SET status = 'IN_PROGRESS', owner_session = ?, started_at_kst = ?, updated_at = ?,
+                started_at_ms = ?, updated_at_ms = ?
+            WHERE id IN (
+              SELECT id FROM queue_items
+              WHERE status = 'PENDING' AND +not_before <= ?
+              {_PRIORITY_ORDER_SQL} LIMIT ?
+            )
+            RETURNING *
+            """,
+            (owner_session, now, now, now_ms, now_ms, now_ts, limit),
+        ).fetchall()
+        # RETURNING does not preserve the subquery order.
+        return sorted(rows, key=_pending_sort_key)
+
+    candidates = conn.execute(
+        f"SELECT id FROM queue_items WHERE status = 'PENDING' AND +not_before <= ? {_PRIORITY_ORDER_SQL} LIMIT ?",
+        (now_ts, limit),
+    ).fetchall()
+    claimed: list[sqlite3.Row] = []
+    for candidate in candidates:
+        cur = conn.execute(
+            """
+            UPDATE queue_items
+            SET status = 'IN_PROGRESS', owner_session = ?, started_at_kst = ?, updated_at = ?,
+                started_at_ms = ?, updated_at_ms = ?
+            WHERE id = ? AND status = 'PENDING'
+            """,
+            (owner_session, now, now, now_ms, now_ms, candidate["id"]),
+        )
+        if cur.rowcount == 1:
+            claimed.append(conn.execute("SELECT * FROM queue_items WHERE id = ?", (candidate["id"],)).fetchone())
+    return claimed
+
 
+def _claim_batch(conn: sqlite3.Connection, owner_session: str, n: int, now_ts: int | None = None) -> list[dict[str, Any]]:
+    now = now_ts if now_ts is not None else now_epoch()
+    # Take the write lock up front so concurrent dispatchers serialize on the claim itself.
+    conn.execute("BEGIN IMMEDIATE")
+    picked: list[dict[str, Any]] = []
+    events: list[tuple[str, str, dict[str, Any]]] = []
+    while len(picked) < n:
+        rows = _claim_pending(conn, owner_session, n - len(picked), now)
+        if not rows:
+            break
+        for row in rows:
             key = row["idempotency_key"]
             if key and _completed_idempotency_exists(conn, key, exclude_id=row["id"]):
                 _mark_duplicate_done(conn, row["id"])
-                skipped_duplicates.append(row["id"])
+                events.append((row["id"], "idempotency_skipped", {"reason": "already_done"}))
                 continue
+            picked.append(dict(row))
+            events.append((row["id"], "picked", {"owner_session": owner_session}))
+    _insert_events(conn, events)
+    return picked
 
-            now = now_kst_str()
-            conn.execute(
-                """
-                UPDATE queue_items
-                SET status = 'IN_PROGRESS', owner_session = ?, started_at_kst = ?, updated_at = ?
-                WHERE id = ?
-                """,
-                (owner_session, now, now, row["id"]),
-            )
-            picked_item_id = row["id"]
-            break
 
-    for duplicate_id in skipped_duplicates:
-        append_event(path, duplicate_id, "idempotency_skipped", {"reason": "already_done"})
+def pick_next(path: str | Path, owner_session: str, now_ts: int | None = None) -> dict[str, Any] | None:
+    with _conn(path) as conn:
+        picked = _claim_batch(conn, owner_session, 1, now_ts)
+    return picked[0] if picked else None
 
-    if picked_item_id is None:
-        return None
 
-    append_event(path, picked_item_id, "picked", {"owner_session": owner_session})
-    items = list_items(path)
-    return next((i for i in items if i["id"] == picked_item_id), None)
+def pick_many(path: str | Path, owner_session: str, n: int, now_ts: int | None = None) -> list[dict[str, Any]]:
+    if n <= 0:
+        return []
+    with _conn(path) as conn:
+        return _claim_batch(conn, owner_session, n, now_ts)
 
 
-def acquire_lease(path: str | Path, item_id: str, owner_session: str, lease_seconds: int = 900) -> bool:
-    now = now_epoch()
+def _acquire_lease(conn: sqlite3.Connection, item_id: str, owner_session: str, lease_seconds: int) -> bool:
+    stamp, now_ms = _now_stamp()
+    now = now_ms // 1000
     expires = now + lease_seconds
+    cur = conn.execute(
+        """
+        UPDATE queue_items
+        SET lease_owner = ?, lease_expires_at = ?, lease_acquired_at = ?, updated_at = ?, updated_at_ms = ?
+        WHERE id = ?
+          AND (lease_owner IS NULL OR lease_owner = '' OR lease_expires_at IS NULL OR lease_expires_at <= ?)
+        """,
+        (owner_session, expires, now, stamp, now_ms, item_id, now),
+    )
+    if cur.rowcount != 1:
+        return False
+    _insert_event(conn, item_id, "lease_acquired", {"owner_session": owner_session, "expires_at": expires})
+    return True
+
+
+def acquire_lease(path: str | Path, item_id: str, owner_session: str, lease_seconds: int = 900) -> bool:
     with _conn(path) as conn:
-        cur = conn.execute(
-            """
-            UPDATE queue_items
-            SET lease_owner = ?, lease_expires_at = ?, updated_at = ?
-            WHERE id = ?
-              AND (lease_owner IS NULL OR lease_owner = '' OR lease_expires_at IS NULL OR lease_expires_at <= ?)
-            """,
-            (owner_session, expires, now_kst_str(), item_id, now),
-        )
-        ok = cur.rowcount == 1
-    if ok:
-        append_event(path, item_id, "lease_acquired", {"owner_session": owner_session, "expires_at": expires})
-    return ok
+        return _acquire_lease(conn, item_id, owner_session, lease_seconds)
 
 
-def renew_lease(path: str | Path, item_id: str, owner_session: str, lease_seconds: int = 900) -> bool:
-    now = now_epoch()
+def _renew_lease(conn: sqlite3.Connection, item_id: str, owner_session: str, lease_seconds: int) -> bool:
+    stamp, now_ms = _now_stamp()
+    now = now_ms // 1000
     expires = now + lease_seconds
+    cur = conn.execute(
+        """
+        UPDATE queue_items
+        SET lease_expires_at = ?, updated_at = ?, updated_at_ms = ?
+        WHERE id = ? AND lease_owner = ? AND lease_expires_at IS NOT NULL AND lease_expires_at > ?
+        """,
+        (expires, stamp, now_ms, item_id, owner_session, now),
+    )
+    if cur.rowcount != 1:
+        return False
+    _insert_event(conn, item_id, "lease_renewed", {"owner_session": owner_session, "expires_at": expires})
+    return True
+
+
+def renew_lease(path: str | Path, item_id: str, owner_session: str, lease_seconds: int = 900) -> bool:
     with _conn(path) as conn:
-        cur = conn.execute(
-            """
-            UPDATE queue_items
-            SET lease_expires_at = ?, updated_at = ?
-            WHERE id = ? AND lease_owner = ? AND lease_expires_at IS NOT NULL AND lease_expires_at > ?
-            """,
-            (expires, now_kst_str(), item_id, owner_session, now),
-        )
-        ok = cur.rowcount == 1
-    if ok:
-        append_event(path, item_id, "lease_renewed", {"owner_session": owner_session, "expires_at": expires})
-    return ok
+        return _renew_lease(conn, item_id, owner_session, lease_seconds)
+
+
+def _release_lease(conn: sqlite3.Connection, item_id: str, owner_session: str) -> bool:
+    cur = conn.execute(
+        """
+        UPDATE queue_items
+        SET lease_owner = NULL, lease_expires_at = NULL, lease_acquired_at = NULL, updated_at = ?, updated_at_ms = ?
+        WHERE id = ? AND lease_owner = ?
+        """,
+        (*_now_stamp(), item_id, owner_session),
+    )
+    if cur.rowcount != 1:
+        return False
+    _insert_event(conn, item_id, "lease_released", {"owner_session": owner_session})
+    return True
 
 
 def release_lease(path: str | Path, item_id: str, owner_session: str) -> bool:
     with _conn(path) as conn:
-        cur = conn.execute(
+        return _release_lease(conn, item_id, owner_session)
+
+
+def retry_backoff_seconds(attempt_count: int) -> int:
+    return RETRY_BACKOFF_SECONDS[min(attempt_count, len(RETRY_BACKOFF_SECONDS) - 1)]
+
+
+_RETRY_CANDIDATE_SQL = """
+    SELECT id, status, attempt_count, max_attempts, lease_expires_at
+    FROM queue_items
+    WHERE status IN ('FAILED', 'IN_PROGRESS')
+"""
+
+
+def _retry_candidates(conn: sqlite3.Connection, ids: Sequence[str] | None) -> list[sqlite3.Row]:
+    if ids is None:
+        return conn.execute(_RETRY_CANDIDATE_SQL + " ORDER BY created_at_ms ASC").fetchall()
+    rows: list[sqlite3.Row] = []
+    wanted = list(dict.fromkeys(ids))
+    for start in range(0, len(wanted), _GET_ITEMS_CHUNK):
+        chunk = wanted[start : start + _GET_ITEMS_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        rows.extend(conn.execute(_RETRY_CANDIDATE_SQL + f" AND id IN ({marks})", chunk).fetchall())
+    return rows
+
+
+def _retry_eligible_items(
+    conn: sqlite3.Connection, now_ts: int | None = None, ids: Sequence[str] | None = None
+) -> list[str]:
+    now = now_ts if now_ts is not None else now_epoch()
+    retried: list[str] = []
+    rows = _retry_candidates(conn, ids)
+    stamp, now_ms = _now_stamp()
+
+    for row in rows:
+        attempt_count = int(row["attempt_count"] or 0)
+        max_attempts = int(row["max_attempts"] or 3)
+        if attempt_count >= max_attempts:
+            continue
+
+        is_failed = row["status"] == "FAILED"
+        is_timeout = row["status"] == "IN_PROGRESS" and row["lease_expires_at"] is not None and int(row["lease_expires_at"]) <= now
+        if not (is_failed or is_timeout):
+            continue
+
+        not_before = now + retry_backoff_seconds(attempt_count)
+        notes = f"retry_not_before={not_before}"
+
+        conn.execute(
             """
             UPDATE queue_items
-            SET lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
-            WHERE id = ? AND lease_owner = ?
+            SET status = 'PENDING',
+                owner_session = '-',
+                started_at_kst = '-',
+                started_at_ms = NULL,
+                finished_at_ms = NULL,
+                lease_owner = NULL,
+                lease_expires_at = NULL,
+                lease_acquired_at = NULL,
+                attempt_count = attempt_count + 1,
+                not_before = ?,
+                notes = CASE WHEN notes = '' THEN ? ELSE notes || ' | ' || ? END,
+                updated_at = ?,
+                updated_at_ms = ?
+            WHERE id = ?
             """,
-            (now_kst_str(), item_id, owner_session),
+            (not_before, notes, notes, stamp, now_ms, row["id"]),
         )
-        ok = cur.rowcount == 1
-    if ok:
-        append_event(path, item_id, "lease_released", {"owner_session": owner_session})
-    return ok
+        retried.append(row["id"])
 
+    _insert_events(conn, [(item_id, "retried", {"reason": "failed_or_timeout"}) for item_id in retried])
+    return retried
 
-def retry_eligible_items(path: str | Path, now_ts: int | None = None) -> list[str]:
-    now = now_ts if now_ts is not None else now_epoch()
-    retried: list[str] = []
+
+def retry_eligible_items(path: str | Path, now_ts: int | None = None, ids: Sequence[str] | None = None) -> list[str]:
+    """Requeue FAILED / lease-expired items; ``ids`` limits the check to those rows."""
     with _conn(path) as conn:
-        rows = conn.execute(
-            """
-            SELECT id, status, attempt_count, max_attempts, lease_expires_at
-            FROM queue_items
-            WHERE status IN ('FAILED', 'IN_PROGRESS')
-            ORDER BY created_at ASC
-            """
-        ).fetchall()
+        return _retry_eligible_items(conn, now_ts, ids)
 
-        for row in rows:
-            attempt_count = int(row["attempt_count"] or 0)
-            max_attempts = int(row["max_attempts"] or 3)
-            if attempt_count >= max_attempts:
-                continue
 
-            is_failed = row["status"] == "FAILED"
-            is_timeout = row["status"] == "IN_PROGRESS" and row["lease_expires_at"] is not None and int(row["lease_expires_at"]) <= now
-            if not (is_failed or is_timeout):
-                continue
+def retry_deadline(row: Mapping[str, Any]) -> int | None:
+    """Epoch second at which ``row`` becomes retry-eligible, or None if it never will as-is."""
+    if int(row["attempt_count"] or 0) >= int(row["max_attempts"] or 3):
+        return None
+    if row["status"] == "FAILED":
+        return 0
+    if row["status"] == "IN_PROGRESS" and row["lease_expires_at"] is not None:
+        return int(row["lease_expires_at"])
+    return None
 
-            backoff_idx = min(attempt_count, len(RETRY_BACKOFF_SECONDS) - 1)
-            backoff_seconds = RETRY_BACKOFF_SECONDS[backoff_idx]
-            notes = f"retry_not_before={now + backoff_seconds}"
 
-            conn.execute(
-                """
-                UPDATE queue_items
-                SET status = 'PENDING',
-                    owner_session = '-',
-                    started_at_kst = '-',
-                    lease_owner = NULL,
-                    lease_expires_at = NULL,
-                    attempt_count = attempt_count + 1,
-                    notes = CASE WHEN notes = '' THEN ? ELSE notes || ' | ' || ? END,
-                    updated_at = ?
-                WHERE id = ?
-                """,
-                (notes, notes, now_kst_str(), row["id"]),
-            )
-            retried.append(row["id"])
+def _retry_deadlines(conn: sqlite3.Connection) -> list[tuple[int, str]]:
+    rows = conn.execute(
+        """
+        SELECT id, status, attempt_count, max_attempts, lease_expires_at
+        FROM queue_items
+        WHERE lease_expires_at IS NOT NULL AND status = 'IN_PROGRESS'
+        UNION ALL
+        SELECT id, status, attempt_count, max_attempts, lease_expires_at
+        FROM queue_items
+        WHERE status = 'FAILED'
+        """
+    ).fetchall()
+    deadlines: list[tuple[int, str]] = []
+    for row in rows:
+        due = retry_deadline(row)
+        if due is not None:
+            deadlines.append((due, row["id"]))
+    return deadlines
 
-    for item_id in retried:
-        append_event(path, item_id, "retried", {"reason": "failed_or_timeout"})
-    return retried
 
+def _max_event_id(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MAX(event_id), 0) FROM queue_events").fetchone()[0]
 
-def _mark_terminal(path: str | Path, item_id: str, status: str, notes: str) -> None:
-    now = now_kst_str()
+
+def _events_after(conn: sqlite3.Connection, event_id: int, limit: int) -> list[tuple[int, str, str]]:
+    rows = conn.execute(
+        "SELECT event_id, item_id, event_type FROM queue_events WHERE event_id > ? ORDER BY event_id LIMIT ?",
+        (event_id, limit),
+    ).fetchall()
+    return [(r["event_id"], r["item_id"], r["event_type"]) for r in rows]
+
+
+EventSpec = tuple[str, dict[str, Any]]
+
+
+def _mark_terminal(
+    conn: sqlite3.Connection,
+    item_id: str,
+    status: str,
+    notes: str,
+    events: Sequence[EventSpec] = (),
+) -> None:
+    now, now_ms = _now_stamp()
+    cur = conn.execute(
+        """
+        UPDATE queue_items
+        SET status = ?, notes = ?, last_error = ?, updated_at = ?, updated_at_ms = ?, finished_at_ms = ?
+        WHERE id = ?
+        """,
+        (status, notes.strip(), notes.strip() if status == "FAILED" else "", now, now_ms, now_ms, item_id),
+    )
+    if cur.rowcount == 0:
+        raise ValueError(f"Row id not found: {item_id}")
+    _insert_events(
+        conn,
+        [(item_id, status.lower(), {"notes": notes.strip()})] + [(item_id, t, p) for t, p in events],
+    )
+
+
+def mark_done(path: str | Path, id: str, notes: str, events: Sequence[EventSpec] = ()) -> None:
     with _conn(path) as conn:
-        cur = conn.execute(
-            "UPDATE queue_items SET status = ?, notes = ?, last_error = ?, updated_at = ? WHERE id = ?",
-            (status, notes.strip(), notes.strip() if status == "FAILED" else "", now, item_id),
-        )
-        if cur.rowcount == 0:
-            raise ValueError(f"Row id not found: {item_id}")
-    append_event(path, item_id, status.lower(), {"notes": notes.strip()})
+        _mark_terminal(conn, id, "DONE", notes, events)
 
 
-def mark_done(path: str | Path, id: str, notes: str) -> None:
-    _mark_terminal(path, id, "DONE", notes)
+def mark_failed(path: str | Path, id: str, notes: str, events: Sequence[EventSpec] = ()) -> None:
+    with _conn(path) as conn:
+        _mark_terminal(conn, id, "FAILED", notes, events)
 
 
-def mark_failed(path: str | Path, id: str, notes: str) -> None:
-    _mark_terminal(path, id, "FAILED", notes)
+def mark_blocked(path: str | Path, id: str, reason: str, events: Sequence[EventSpec] = ()) -> None:
+    with _conn(path) as conn:
+        _mark_terminal(conn, id, "BLOCKED", reason, events)
 
 
-def mark_blocked(path: str | Path, id: str, reason: str) -> None:
-    _mark_terminal(path, id, "BLOCKED", reason)
+def _requeue_item(
+    conn: sqlite3.Connection,
+    item_id: str,
+    *,
+    notes: str,
+    attempt_count: int | None = None,
+    not_before: int | None = None,
+    events: Sequence[EventSpec] = (),
+) -> None:
+    cur = conn.execute(
+        """
+        UPDATE queue_items
+        SET status = 'PENDING',
+            owner_session = '-',
+            started_at_kst = '-',
+            started_at_ms = NULL,
+            finished_at_ms = NULL,
+            lease_owner = NULL,
+            lease_expires_at = NULL,
+            lease_acquired_at = NULL,
+            attempt_count = COALESCE(?, attempt_count),
+            not_before = COALESCE(?, not_before),
+            notes = ?,
+            updated_at = ?,
+            updated_at_ms = ?
+        WHERE id = ?
+        """,
+        (attempt_count, not_before, notes, *_now_stamp(), item_id),
+    )
+    if cur.rowcount == 0:
+        raise ValueError(f"Row id not found: {item_id}")
+    _insert_events(conn, [(item_id, t, p) for t, p in events])
 
 
-def append_guardrail_event(
+def requeue_item(
     path: str | Path,
     item_id: str,
+    *,
+    notes: str,
+    attempt_count: int | None = None,
+    not_before: int | None = None,
+    events: Sequence[EventSpec] = (),
+) -> None:
+    """Move an item back to PENDING (clearing owner/lease) and record ``events`` in the same transaction.
+
+    ``attempt_count`` / ``not_before`` are left unchanged when ``None``.
+    """
+    with _conn(path) as conn:
+        _requeue_item(conn, item_id, notes=notes, attempt_count=attempt_count, not_before=not_before, events=events)
+
+
+def _guardrail_payload(
     *,
     state: str,
     action: str,
     current_tokens: int,
     estimated_tokens: int,
     violations: list[dict[str, Any]] | None = None,
-) -> int:
-    payload: dict[str, Any] = {
+) -> dict[str, Any]:
+    return {
         "state": state,
         "action": action,
         "current_tokens": int(current_tokens),
         "estimated_tokens": int(estimated_tokens),
         "violations": violations or [],
     }
+
+
+def append_guardrail_event(
+    path: str | Path,
+    item_id: str,
+    *,
+    state: str,
+    action: str,
+    current_tokens: int,
+    estimated_tokens: int,
+    violations: list[dict[str, Any]] | None = None,
+) -> int:
+    payload = _guardrail_payload(
+        state=state,
+        action=action,
+        current_tokens=current_tokens,
+        estimated_tokens=estimated_tokens,
+        violations=violations,
+    )
     return append_event(path, item_id, "guardrail", payload)
+
+
+def _event_totals(conn: sqlite3.Connection) -> dict[str, int]:
+    return {r["event_type"]: int(r["total"]) for r in conn.execute("SELECT event_type, total FROM queue_event_totals")}
+
+
+def event_totals(path: str | Path) -> dict[str, int]:
+    """Lifetime event counts by type, including events already archived by compact_events."""
+    with _conn(path) as conn:
+        return _event_totals(conn)
+
+
+def _default_archive_path(db_path: Path, now_ts: int) -> Path:
+    stamp = datetime.fromtimestamp(now_ts, KST).strftime("%Y%m%d%H%M%S")
+    return db_path.parent / "archive" / f"{db_path.stem}.events-{stamp}.jsonl.gz"
+
+
+_PENDING_ARCHIVE_RE = re.compile(r"\.(.+)\.pending(?:\.\d+)?")
+
+
+def _pending_archive(archive: Path) -> Path:
+    return archive.with_name(f".{archive.name}.pending")
+
+
+def _publish_archive(conn: sqlite3.Connection, archive: Path) -> None:
+    """Append the gzip member staged by ``compact_events`` to ``archive``.
+
+    A staged member whose first event is still in queue_events belongs to a
+    compaction that never committed and is discarded (event ids are
+    AUTOINCREMENT, so never reused). Otherwise it is renamed to
+    ``<pending>.<archive size>`` before appending, so a crash mid-append is
+    redone from that offset instead of duplicating rows.
+    """
+    pending = _pending_archive(archive)
+    if pending.exists():
+        try:
+            with gzip.open(pending, "rt", encoding="utf-8") as f:
+                first_id = json.loads(f.readline())["event_id"]
+        except (OSError, EOFError, ValueError, KeyError):
+            first_id = None  # cut short while staging, so its DELETE never ran
+        if first_id is None or conn.execute("SELECT 1 FROM queue_events WHERE event_id = ?", (first_id,)).fetchone():
+            pending.unlink()
+        else:
+            offset = archive.stat().st_size if archive.exists() else 0
+            os.replace(pending, pending.with_name(f"{pending.name}.{offset}"))
+    for staged in archive.parent.glob(f"{pending.name}.*"):
+        with archive.open("ab") as out:
+            out.truncate(int(staged.suffix[1:]))
+            out.write(staged.read_bytes())
+            out.flush()
+            os.fsync(out.fileno())
+        staged.unlink()
+
+
+def _publish_pending_archives(conn: sqlite3.Connection, directory: Path) -> None:
+    """Finish every staged member left in ``directory``, each against its own archive.
+
+    Default archive names carry a timestamp, so the run that finds a crashed
+    run's member usually writes to a different archive than the one it belongs to.
+    """
+    if not directory.is_dir():
+        return
+    targets = {m.group(1) for m in (_PENDING_ARCHIVE_RE.fullmatch(p.name) for p in directory.iterdir()) if m}
+    for name in sorted(targets):
+        _publish_archive(conn, directory / name)
+
+
+def compact_events(
+    path: str | Path,
+    *,
+    keep_days: int | None = None,
+    keep_last: int | None = None,
+    archive_path: str | Path | None = None,
+    now_ts: int | None = None,
+    full_vacuum: bool = False,
+) -> dict[str, Any]:
+    """Archive and delete queue_events outside the retention policy.
+
+    An event is kept if it is newer than ``keep_days`` or among the last ``keep_last``
+    events of its item (either rule keeps it). Removed rows are written and fsynced
+    as a staged gzip member before their DELETE commits and appended to the gzip
+    JSONL archive after it, so an interrupted run neither loses nor duplicates rows:
+    every run first finishes the members staged in its archive directory and the
+    default one (see ``_publish_pending_archives``). Freed
+    pages are then returned with ``PRAGMA incremental_vacuum`` (or a full VACUUM,
+    which also converts databases created before auto_vacuum was enabled).
+    """
+    if keep_days is None and keep_last is None:
+        raise ValueError("compact_events needs keep_days and/or keep_last")
+
+    db_path = Path(path)
+    now = now_ts if now_ts is not None else now_epoch()
+    drop_conds: list[str] = []
+    params: list[Any] = []
+    if keep_days is not None:
+        cutoff = format_kst_minute(now - keep_days * 86400)
+        drop_conds.append("created_at < ?")
+        params.append(cutoff)
+    if keep_last is not None:
+        drop_conds.append(
+            "event_id NOT IN ("
+            " SELECT event_id FROM ("
+            "  SELECT event_id, ROW_NUMBER() OVER (PARTITION BY item_id ORDER BY event_id DESC) AS rn"
+            "  FROM queue_events"
+            " ) WHERE rn <= ?"
+            ")"
+        )
+        params.append(keep_last)
+
+    archive = Path(archive_path) if archive_path else _default_archive_path(db_path, now)
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    archived = 0
+    conn = _conn(db_path)
+    try:
+        for directory in sorted({archive.parent, _default_archive_path(db_path, now).parent}):
+            _publish_pending_archives(conn, directory)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("CREATE TEMP TABLE compact_ids(event_id INTEGER PRIMARY KEY)")
+            conn.execute(
+                f"INSERT INTO compact_ids SELECT event_id FROM queue_events WHERE {' AND '.join(drop_conds)}",
+                params,
+            )
+            rows = conn.execute(
+                "SELECT e.* FROM queue_events e JOIN compact_ids c ON c.event_id = e.event_id ORDER BY e.event_id"
+            )
+            first = rows.fetchone()
+            if first is not None:
+                # One complete gzip member; appended to the archive, readers see one continuous stream.
+                with _pending_archive(archive).open("wb") as raw:
+                    with gzip.open(raw, "wt", encoding="utf-8") as f:
+                        for row in itertools.chain([first], rows):
+                            f.write(json.dumps(dict(row), ensure_ascii=False, sort_keys=True) + "\n")
+                            archived += 1
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                conn.execute("DELETE FROM queue_events WHERE event_id IN (SELECT event_id FROM compact_ids)")
+            conn.execute("DROP TABLE compact_ids")
+        _publish_archive(conn, archive)
+
+        if archived:
+            if full_vacuum:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            elif conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
+        remaining = int(conn.execute("SELECT COUNT(*) FROM queue_events").fetchone()[0])
+        free_pages = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+    finally:
+        conn.close()
+
+    return {
+        "archived": archived,
+        "archive": str(archive) if archived else None,
+        "remaining": remaining,
+        "free_pages": free_pages,
+    }
+
+
+_STOP = object()
+_POLL_SECONDS = 0.05
+
+
+class EventWriter:
+    """Background, batched writer for events that are not tied to a state change.
+
+    ``append`` enqueues onto a bounded queue (blocking when it is full, so a slow disk
+    applies backpressure instead of growing memory) and a worker thread commits
+    batches with one ``executemany`` every ``flush_interval`` seconds or once
+    ``batch_size`` events are waiting. Events that accompany a status change should
+    still be written inside that change's transaction.
+
+    A batch that fails to commit, or a worker that cannot open the DB, is reported
+    by the next ``append``/``flush``/``close`` as a RuntimeError carrying the first
+    error and the number of events lost. Waits poll the worker, so a dead worker
+    raises instead of blocking on a full queue or an unanswered flush.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        max_pending: int = config.EVENT_QUEUE_MAX,
+        flush_interval: float = config.EVENT_FLUSH_INTERVAL_MS / 1000,
+        batch_size: int = 500,
+        pragmas: Mapping[str, Any] | None = None,
+    ):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pragmas = pragmas
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._error: BaseException | None = None
+        self._dropped = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="queue-event-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, item_id: str, event_type: str, payload: dict[str, Any] | None = None) -> None:
+        if self._closed:
+            raise RuntimeError("EventWriter is closed")
+        self._raise_pending_error()
+        self._put(_event_params(item_id, event_type, payload, now_kst_str()))
+
+    def flush(self) -> None:
+        """Block until every event appended so far is committed."""
+        done = threading.Event()
+        self._put(done)
+        while not done.wait(_POLL_SECONDS):
+            if not self._thread.is_alive():
+                break
+        self._raise_pending_error()
+        if not done.is_set():
+            raise RuntimeError("queue event writer stopped before the flush completed")
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            self._put(_STOP)
+        self._thread.join()
+        self._raise_pending_error()
+
+    def __enter__(self) -> EventWriter:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _put(self, item: Any) -> None:
+        while True:
+            if not self._thread.is_alive():
+                self._raise_pending_error()
+                raise RuntimeError("queue event writer is not running")
+            try:
+                self._queue.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _fail(self, exc: BaseException, dropped: int) -> None:
+        with self._lock:
+            if self._error is None:
+                self._error = exc
+            self._dropped += dropped
+
+    def _raise_pending_error(self) -> None:
+        with self._lock:
+            err, dropped = self._error, self._dropped
+            self._error, self._dropped = None, 0
+        if err is not None:
+            raise RuntimeError(f"queue event writer failed, {dropped} event(s) not written") from err
+
+    def _run(self) -> None:
+        try:
+            conn = _conn(self.path, self._pragmas)
+        except Exception as exc:
+            self._fail(exc, 0)
+            self._drain()
+            return
+        try:
+            stop = False
+            while not stop:
+                batch: list[tuple[str, str, str, str]] = []
+                flushes: list[threading.Event] = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    if isinstance(item, threading.Event):
+                        flushes.append(item)
+                        break
+                    batch.append(item)
+                if batch:
+                    self._write(conn, batch)
+                for done in flushes:
+                    done.set()
+        except Exception as exc:
+            self._fail(exc, 0)
+        finally:
+            conn.close()
+            self._drain()
+
+    def _drain(self) -> None:
+        """Release waiters and count the events still queued once the worker is exiting."""
+        dropped = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not _STOP:
+                dropped += 1
+        if dropped:
+            self._fail(RuntimeError("queue event writer stopped"), dropped)
+
+    def _write(self, conn: sqlite3.Connection, batch: list[tuple[str, str, str, str]]) -> None:
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO queue_events(item_id, event_type, payload_json, created_at) VALUES(?, ?, ?, ?)",
+                    batch,
+                )
+        except Exception as exc:
+            self._fail(exc, len(batch))
+
+
+class QueueStore:
+    """Long-lived handle on one queue DB.
+
+    Keeps one connection per thread and applies the PRAGMA profile once when that
+    connection is opened, so repeated operations skip connect/setup cost. Methods
+    mirror the module-level functions minus the ``path`` argument.
+    """
+
+    def __init__(self, path: str | Path, pragmas: Mapping[str, Any] | None = None, *, async_events: bool = False):
+        self.path = Path(path)
+        self.pragmas: dict[str, Any] = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        self._async_events = async_events
+        self._events: EventWriter | None = None
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can run from any thread; each
+            # connection is still used exclusively by the thread that opened it.
+            conn = _conn(self.path, self.pragmas, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def event_writer(self) -> EventWriter:
+        with self._lock:
+            if self._events is None:
+                self._events = EventWriter(self.path, pragmas=self.pragmas)
+            return self._events
+
+    def close(self) -> None:
+        with self._lock:
+            events, self._events = self._events, None
+        if events is not None:
+            events.close()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def __enter__(self) -> QueueStore:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def init_db(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connection() as conn:
+            _init_schema(conn)
+
+    def list_items(
+        self, status: str | None = None, priority: str | None = None, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        with self.connection() as conn:
+            return _list_items(conn, status, priority, limit)
+
+    def get_item(self, item_id: str) -> dict[str, Any] | None:
+        with self.connection() as conn:
+            return _get_item(conn, item_id)
+
+    def get_items(self, ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        with self.connection() as conn:
+            return _get_items(conn, ids)
+
+    def status_counts(self) -> dict[str, int]:
+        with self.connection() as conn:
+            return _status_counts(conn)
+
+    def counters(self) -> list[dict[str, Any]]:
+        with self.connection() as conn:
+            return _counters(conn)
+
+    def oldest_pending_created_at_ms(self) -> int | None:
+        with self.connection() as conn:
+            return _oldest_pending_created_at_ms(conn)
+
+    def active_leases(self, now_ts: int) -> list[dict[str, Any]]:
+        with self.connection() as conn:
+            return _active_leases(conn, now_ts)
+
+    def count_stale_in_progress(self, started_before_ms: int) -> int:
+        with self.connection() as conn:
+            return _count_stale_in_progress(conn, started_before_ms)
+
+    def terminal_latency(self, since_ms: int | None = None, until_ms: int | None = None) -> dict[str, Any]:
+        with self.connection() as conn:
+            return _terminal_latency(conn, since_ms, until_ms)
+
+    def event_totals(self) -> dict[str, int]:
+        with self.connection() as conn:
+            return _event_totals(conn)
+
+    def busy_owners(self) -> set[str]:
+        with self.connection() as conn:
+            return _busy_owners(conn)
+
+    def next_not_before(self, now_ts: int | None = None) -> int | None:
+        with self.connection() as conn:
+            return _next_not_before(conn, now_ts if now_ts is not None else now_epoch())
+
+    def data_version(self) -> int:
+        """PRAGMA data_version of this thread's pooled connection.
+
+        The value changes whenever another connection commits, so a long-lived
+        reader can poll it to detect new work without re-querying the queue.
+        """
+        return self.connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def append_event(self, item_id: str, event_type: str, payload: dict[str, Any] | None = None) -> int | None:
+        """Record a standalone event; with ``async_events`` it is queued and ``None`` is returned."""
+        if self._async_events:
+            self.event_writer().append(item_id, event_type, payload)
+            return None
+        with self.connection() as conn:
+            return _insert_event(conn, item_id, event_type, payload)
+
+    def flush_events(self) -> None:
+        if self._events is not None:
+            self._events.flush()
+
+    def add_item(
+        self,
+        *,
+        id: str,
+        priority: str,
+        task: str,
+        success_criteria: str,
+        due_at_kst: str = "-",
+        notes: str = "",
+        idempotency_key: str | None = None,
+        max_attempts: int = 3,
+    ) -> None:
+        with self.connection() as conn:
+            _add_item(
+                conn,
+                id=id,
+                priority=priority,
+                task=task,
+                success_criteria=success_criteria,
+                due_at_kst=due_at_kst,
+                notes=notes,
+                idempotency_key=idempotency_key,
+                max_attempts=max_attempts,
+            )
+
+    def pick_next(self, owner_session: str, now_ts: int | None = None) -> dict[str, Any] | None:
+        with self.connection() as conn:
+            picked = _claim_batch(conn, owner_session, 1, now_ts)
+        return picked[0] if picked else None
+
+    def pick_many(self, owner_session: str, n: int, now_ts: int | None = None) -> list[dict[str, Any]]:
+        if n <= 0:
+            return []
+        with self.connection() as conn:
+            return _claim_batch(conn, owner_session, n, now_ts)
+
+    def acquire_lease(self, item_id: str, owner_session: str, lease_seconds: int = 900) -> bool:
+        with self.connection() as conn:
+            return _acquire_lease(conn, item_id, owner_session, lease_seconds)
+
+    def renew_lease(self, item_id: str, owner_session: str, lease_seconds: int = 900) -> bool:
+        with self.connection() as conn:
+            return _renew_lease(conn, item_id, owner_session, lease_seconds)
+
+    def release_lease(self, item_id: str, owner_session: str) -> bool:
+        with self.connection() as conn:
+            return _release_lease(conn, item_id, owner_session)
+
+    def retry_eligible_items(self, now_ts: int | None = None, ids: Sequence[str] | None = None) -> list[str]:
+        with self.connection() as conn:
+            return _retry_eligible_items(conn, now_ts, ids)
+
+    def retry_deadlines(self) -> list[tuple[int, str]]:
+        """(deadline, id) for every item the watchdog may need to retry."""
+        with self.connection() as conn:
+            return _retry_deadlines(conn)
+
+    def max_event_id(self) -> int:
+        with self.connection() as conn:
+            return _max_event_id(conn)
+
+    def events_after(self, event_id: int, limit: int = 1000) -> list[tuple[int, str, str]]:
+        """(event_id, item_id, event_type) rows appended after ``event_id``."""
+        with self.connection() as conn:
+            return _events_after(conn, event_id, limit)
+
+    def mark_done(self, id: str, notes: str, events: Sequence[EventSpec] = ()) -> None:
+        with self.connection() as conn:
+            _mark_terminal(conn, id, "DONE", notes, events)
+
+    def mark_failed(self, id: str, notes: str, events: Sequence[EventSpec] = ()) -> None:
+        with self.connection() as conn:
+            _mark_terminal(conn, id, "FAILED", notes, events)
+
+    def mark_blocked(self, id: str, reason: str, events: Sequence[EventSpec] = ()) -> None:
+        with self.connection() as conn:
+            _mark_terminal(conn, id, "BLOCKED", reason, events)
+
+    def requeue_item(
+        self,
+        item_id: str,
+        *,
+        notes: str,
+        attempt_count: int | None = None,
+        not_before: int | None = None,
+        events: Sequence[EventSpec] = (),
+    ) -> None:
+        with self.connection() as conn:
+            _requeue_item(conn, item_id, notes=notes, attempt_count=attempt_count, not_before=not_before, events=events)
+
+    def append_guardrail_event(
+        self,
+        item_id: str,
+        *,
+        state: str,
+        action: str,
+        current_tokens: int,
+        estimated_tokens: int,
+        violations: list[dict[str, Any]] | None = None,
+    ) -> int | None:
+        payload = _guardrail_payload(
+            state=state,
+            action=action,
+            current_tokens=current_tokens,
+            estimated_tokens=estimated_tokens,
+            violations=violations,
+        )
+        return self.append_event(item_id, "guardrail", payload)
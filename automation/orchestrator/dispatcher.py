@@ -2,40 +2,110 @@
 """Dispatcher execution entrypoint.
 
 MVP behavior:
-- Pick one eligible PENDING item
+- Pick one eligible PENDING item (or up to --batch N in one pass)
 - Mark as IN_PROGRESS with owner_session
-- Print picked id (or NOOP)
+- Print picked ids one per line (or NOOP)
+
+`serve` keeps one DB connection open and dispatches as soon as work appears:
+it polls `PRAGMA data_version` (changes on any other connection's commit),
+wakes on the earliest future `not_before`, and hands one item at a time to
+each idle owner session (`<owner>-1 .. <owner>-N`).
 """
 
 from __future__ import annotations
 
 import argparse
 from pathlib import Path
-
-from automation.orchestrator import db_store
-from automation.orchestrator.orch import PRIORITY_ORDER, QueueFile, now_kst_str
-
-
-def _pick_md(queue_path: Path, owner_session: str) -> str | None:
-    qf = QueueFile(queue_path)
-    pending = [r for r in qf.rows if r.status == "PENDING"]
-    if not pending:
-        return None
-
-    pending.sort(key=lambda r: PRIORITY_ORDER.get(r.priority, 99))
-    row = pending[0]
-    row.status = "IN_PROGRESS"
-    row.owner_session = owner_session
-    row.started_at_kst = now_kst_str()
-    qf.save()
-    return row.id
-
-
-def _pick_db(db_path: Path, owner_session: str) -> str | None:
-    row = db_store.pick_next(db_path, owner_session=owner_session)
-    if not row:
-        return None
-    return str(row["id"])
+from typing import Callable
+
+from automation.orchestrator import config, db_store
+from automation.orchestrator.clock import get_clock, now_kst_str
+from automation.orchestrator.orch import QueueFile, emit_lock_wait
+
+
+def _pick_md(queue_path: Path, owner_session: str, batch: int = 1, log_path: Path | None = None) -> list[str]:
+    with QueueFile(queue_path, lock=True) as qf:
+        now = now_kst_str()
+        picked: list[str] = []
+        while len(picked) < batch:
+            row = qf.next_pending()
+            if row is None:
+                break
+            qf.update(row, status="IN_PROGRESS", owner_session=owner_session, started_at_kst=now)
+            picked.append(row.id)
+        if picked:
+            qf.save()
+    emit_lock_wait(log_path, "dispatcher.pick", qf)
+    return picked
+
+
+def _pick_db(db_path: Path, owner_session: str, batch: int = 1) -> list[str]:
+    if batch == 1:
+        row = db_store.pick_next(db_path, owner_session=owner_session)
+        return [str(row["id"])] if row else []
+    return [str(row["id"]) for row in db_store.pick_many(db_path, owner_session, batch)]
+
+
+class DispatchDaemon:
+    """Event-driven dispatch loop over a pooled QueueStore connection."""
+
+    def __init__(
+        self,
+        store: db_store.QueueStore,
+        owner_prefix: str = "dispatcher",
+        sessions: int = config.DISPATCHER_SESSIONS,
+        poll_interval: float = config.DISPATCHER_POLL_MS / 1000,
+        emit: Callable[[str, str], None] | None = None,
+    ):
+        self.store = store
+        self.owners = [f"{owner_prefix}-{i}" for i in range(1, sessions + 1)]
+        self.poll_interval = poll_interval
+        self.emit = emit or (lambda owner, item_id: print(f"{owner} {item_id}", flush=True))
+        self._seen_version: int | None = None
+        self._next_due: int | None = None
+
+    def dispatch(self, now_ts: int) -> list[tuple[str, str]]:
+        busy = self.store.busy_owners()
+        dispatched: list[tuple[str, str]] = []
+        for owner in self.owners:
+            if owner in busy:
+                continue
+            row = self.store.pick_next(owner, now_ts=now_ts)
+            if row is None:
+                break
+            dispatched.append((owner, str(row["id"])))
+            self.emit(owner, str(row["id"]))
+        self._next_due = self.store.next_not_before(now_ts)
+        return dispatched
+
+    def poll(self, now_ts: int | None = None) -> list[tuple[str, str]]:
+        """Dispatch only if the DB changed or a not_before timer came due."""
+        now = now_ts if now_ts is not None else db_store.now_epoch()
+        version = self.store.data_version()
+        timer_due = self._next_due is not None and now >= self._next_due
+        if version == self._seen_version and not timer_due:
+            return []
+        self._seen_version = version
+        return self.dispatch(now)
+
+    def serve(self, max_seconds: float | None = None, sleep: Callable[[float], None] | None = None) -> None:
+        clock = get_clock()
+        sleep = sleep or clock.sleep
+        deadline = clock.monotonic() + max_seconds if max_seconds else None
+        while deadline is None or clock.monotonic() < deadline:
+            self.poll()
+            sleep(self.poll_interval)
+
+
+def _serve(args: argparse.Namespace) -> int:
+    with db_store.QueueStore(args.db) as store:
+        store.init_db()
+        daemon = DispatchDaemon(store, args.owner_session, args.sessions, args.poll_ms / 1000)
+        try:
+            daemon.serve(max_seconds=args.max_seconds)
+        except KeyboardInterrupt:
+            pass
+    return 0
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -43,18 +113,42 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument("--queue", default="automation/orchestrator/QUEUE.md")
     p.add_argument("--db", help="SQLite queue path (preferred when set)")
     p.add_argument("--owner-session", default="dispatcher")
+    p.add_argument("--batch", type=int, default=1, help="Claim up to N items in one transaction")
+    p.add_argument("--log-path", default=str(config.LOG_PATH), help="JSONL run log for queue-lock waits")
+
+    sub = p.add_subparsers(dest="command")
+    serve = sub.add_parser("serve", help="Run as a long-lived dispatcher (requires --db)")
+    serve.add_argument("--sessions", type=int, default=config.DISPATCHER_SESSIONS, help="Owner sessions to dispatch to")
+    serve.add_argument("--poll-ms", type=int, default=config.DISPATCHER_POLL_MS, help="data_version poll interval")
+    serve.add_argument("--max-seconds", type=float, default=None, help="Exit after N seconds (default: run forever)")
     return p
 
 
 def main(argv: list[str] | None = None) -> int:
-    args = build_parser().parse_args(argv)
-    picked = _pick_db(Path(args.db), args.owner_session) if args.db else _pick_md(Path(args.queue), args.owner_session)
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.batch < 1:
+        parser.error("--batch must be >= 1")
+
+    if args.command == "serve":
+        if not args.db:
+            parser.error("serve requires --db")
+        if not 1 <= args.sessions <= config.DISPATCHER_MAX_SESSIONS:
+            parser.error(f"--sessions must be between 1 and {config.DISPATCHER_MAX_SESSIONS}")
+        if args.poll_ms < 1:
+            parser.error("--poll-ms must be >= 1")
+        return _serve(args)
+
+    if args.db:
+        picked = _pick_db(Path(args.db), args.owner_session, args.batch)
+    else:
+        picked = _pick_md(Path(args.queue), args.owner_session, args.batch, Path(args.log_path))
 
     if not picked:
         print("NOOP")
         return 0
 
-    print(picked)
+    print("\n".join(picked))
     return 0
 
 
@@ -19,29 +19,36 @@ def build_parser() -> argparse.ArgumentParser:
     return p
 
 
-def main(argv: list[str] | None = None) -> int:
-    args = build_parser().parse_args(argv)
-
-    report_text = Path(args.report).read_text(encoding="utf-8")
+def enforce(
+    db_path: str | Path, item_id: str, report_text: str, current_tokens: int, soft: int, hard: int
+) -> tuple[str, str, list[dict]]:
+    """Record the guardrail decision for ``item_id`` and block it when required; returns (state, action, violations)."""
     validation = tg.validate_compact_report(report_text)
-    state = tg.check_budget(args.current_tokens, soft=args.soft, hard=args.hard)
+    state = tg.check_budget(current_tokens, soft=soft, hard=hard)
     action = tg.decide_action(state, validation["violations"])
 
     db_store.append_guardrail_event(
-        args.db,
-        args.id,
+        db_path,
+        item_id,
         state=state,
         action=action,
-        current_tokens=args.current_tokens,
+        current_tokens=current_tokens,
         estimated_tokens=validation["estimated_tokens"],
         violations=validation["violations"],
     )
 
     if action == tg.ACTION_BLOCK:
         reason = f"Guardrail BLOCK: state={state}; violations={len(validation['violations'])}"
-        db_store.mark_blocked(args.db, args.id, reason)
+        db_store.mark_blocked(db_path, item_id, reason)
+    return state, action, validation["violations"]
+
 
-    print(f"item={args.id} state={state} action={action} violations={len(validation['violations'])}")
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    report_text = Path(args.report).read_text(encoding="utf-8")
+    state, action, violations = enforce(args.db, args.id, report_text, args.current_tokens, args.soft, args.hard)
+    print(f"item={args.id} state={state} action={action} violations={len(violations)}")
     return 0
 
 
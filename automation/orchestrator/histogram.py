@@ -0,0 +1,130 @@
+"""Mergeable log-linear latency histogram (HDR-style buckets).
+
+Values below ``2**SUB_BITS`` get one bucket each (exact). Above that, every
+power-of-two range is split into ``2**(SUB_BITS-1)`` equal buckets, so the
+relative error of a reported percentile is below ``1 / 2**(SUB_BITS-1)``
+(~1.6% with the default 7 bits) while millisecond latencies up to days need
+only a few thousand buckets. Histograms with the same ``sub_bits`` merge by
+adding bucket counts, which makes them safe to combine across log segments,
+checkpoints and hosts.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+SUB_BITS = 7
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    __slots__ = ("sub_bits", "counts", "count", "total", "min", "max")
+
+    def __init__(self, sub_bits: int = SUB_BITS):
+        self.sub_bits = sub_bits
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: int | None = None
+        self.max: int | None = None
+
+    def _index(self, value: int) -> int:
+        sub = 1 << self.sub_bits
+        if value < sub:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        half = sub >> 1
+        return sub + (shift - 1) * half + ((value >> shift) - half)
+
+    def _bucket_range(self, index: int) -> tuple[int, int]:
+        """Lowest and highest value recorded into bucket ``index``."""
+        sub = 1 << self.sub_bits
+        if index < sub:
+            return index, index
+        half = sub >> 1
+        shift = (index - sub) // half + 1
+        lowest = ((index - sub) % half + half) << shift
+        return lowest, lowest + (1 << shift) - 1
+
+    def _highest_equivalent(self, index: int) -> int:
+        return self._bucket_range(index)[1]
+
+    def record(self, value: int, n: int = 1) -> None:
+        value = max(0, int(value))
+        idx = self._index(value)
+        self.counts[idx] = self.counts.get(idx, 0) + n
+        self.count += n
+        self.total += value * n
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: LatencyHistogram) -> LatencyHistogram:
+        if other.sub_bits != self.sub_bits:
+            raise ValueError(f"cannot merge histograms with sub_bits {self.sub_bits} and {other.sub_bits}")
+        for idx, n in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, p: float) -> int | None:
+        """Value at rank ``int((count - 1) * p)``, reported as its bucket's upper bound (capped at max)."""
+        if not self.count:
+            return None
+        rank = int((self.count - 1) * p)
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen > rank:
+                return min(self._highest_equivalent(idx), self.max)
+        return self.max
+
+    def cumulative(self, bounds: Iterable[int]) -> list[int]:
+        """Counts of recorded values at or below each bound (ascending).
+
+        Bounds are inclusive (Prometheus ``le``), so a bucket counts once its lower
+        edge is at or below the bound: a value equal to the bound is never left out.
+        """
+        out: list[int] = []
+        items = sorted(self.counts.items())
+        i = seen = 0
+        for bound in bounds:
+            while i < len(items) and self._bucket_range(items[i][0])[0] <= bound:
+                seen += items[i][1]
+                i += 1
+            out.append(seen)
+        return out
+
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def summary(self, percentiles: Iterable[float] = PERCENTILES) -> dict[str, Any]:
+        out: dict[str, Any] = {"count": self.count}
+        for p in percentiles:
+            out[f"p{round(p * 100):d}_ms"] = self.percentile(p)
+        return out
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "sub_bits": self.sub_bits,
+            "counts": [[idx, n] for idx, n in sorted(self.counts.items())],
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> LatencyHistogram:
+        hist = cls(int(data.get("sub_bits", SUB_BITS)))
+        hist.counts = {int(idx): int(n) for idx, n in data["counts"]}
+        hist.count = int(data["count"])
+        hist.total = int(data["total"])
+        hist.min = data.get("min")
+        hist.max = data.get("max")
+        return hist
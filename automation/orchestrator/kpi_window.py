@@ -0,0 +1,233 @@
+"""Rolling-window KPIs over the run log for the soak-test abort conditions.
+
+``KpiWindow`` keeps one bucket per minute in a fixed-size ring, so memory does not
+grow with the log and every snapshot only touches ``window`` buckets. ``LogFollower``
+tails the run log (across rotations) so ``ops kpi --window ... --watch`` feeds the
+window incrementally instead of re-reading history on every tick.
+
+Abort conditions evaluated (SOAK_TEST_PLAN.md section 5):
+
+- success rate over the window below ``min_success_rate`` (condition 1)
+- mutating commands kept failing with no successful state transition for
+  ``stall_minutes`` (condition 3)
+- no run-log event at all for ``silence_minutes`` (condition 5)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from automation.orchestrator import config, orch, run_log
+from automation.orchestrator.histogram import LatencyHistogram
+
+MINUTE_MS = 60_000
+
+
+def parse_window(text: str) -> int:
+    """``"30m"``, ``"2h"`` or a bare number of minutes -> minutes."""
+    raw = text.strip().lower()
+    scale = 1
+    if raw.endswith("h"):
+        raw, scale = raw[:-1], 60
+    elif raw.endswith("m"):
+        raw = raw[:-1]
+    try:
+        minutes = int(raw) * scale
+    except ValueError:
+        raise ValueError(f"invalid window: {text!r} (expected e.g. 30m or 2h)") from None
+    if minutes <= 0:
+        raise ValueError(f"window must be positive: {text!r}")
+    return minutes
+
+
+class _Bucket:
+    __slots__ = ("minute", "runs", "success", "failed", "attempts", "transitions", "latency")
+
+    def __init__(self, minute: int):
+        self.minute = minute
+        self.runs = 0
+        self.success = 0
+        self.failed = 0
+        self.attempts = 0  # mutating commands that finished
+        self.transitions = 0  # ... and succeeded
+        self.latency = LatencyHistogram()
+
+
+class KpiWindow:
+    def __init__(
+        self,
+        window_minutes: int = 30,
+        stall_minutes: int = config.KPI_STALL_MINUTES,
+        silence_minutes: int = config.KPI_SILENCE_MINUTES,
+    ):
+        self.window_minutes = window_minutes
+        self.stall_minutes = stall_minutes
+        self.silence_minutes = silence_minutes
+        self.size = max(window_minutes, stall_minutes, silence_minutes)
+        self._ring: list[_Bucket | None] = [None] * self.size
+        self.last_event_ms: int | None = None
+        self.head_minute: int | None = None
+
+    def add(self, event: dict[str, Any]) -> None:
+        ts = event.get("ts_epoch_ms")
+        if not isinstance(ts, int):
+            return
+        if self.last_event_ms is None or ts > self.last_event_ms:
+            self.last_event_ms = ts
+        if event.get("event") != "run_end":
+            return
+        minute = ts // MINUTE_MS
+        if self.head_minute is None or minute > self.head_minute:
+            self.head_minute = minute
+        elif minute <= self.head_minute - self.size:
+            return  # older than anything the ring still covers
+        slot = minute % self.size
+        bucket = self._ring[slot]
+        if bucket is None or bucket.minute != minute:
+            bucket = self._ring[slot] = _Bucket(minute)
+
+        bucket.runs += 1
+        command = event.get("command")
+        ok = event.get("exit_code") == 0
+        if ok and command == "done":
+            bucket.success += 1
+        elif ok and command == "fail":
+            bucket.failed += 1
+        if command in orch.MUTATING_COMMANDS:
+            bucket.attempts += 1
+            if ok:
+                bucket.transitions += 1
+        duration = event.get("duration_ms")
+        if isinstance(duration, int):
+            bucket.latency.record(duration)
+
+    def _buckets(self, now_ms: int, minutes: int) -> Iterator[_Bucket]:
+        newest = now_ms // MINUTE_MS
+        oldest = newest - minutes + 1
+        for bucket in self._ring:
+            if bucket is not None and oldest <= bucket.minute <= newest:
+                yield bucket
+
+    def snapshot(self, now_ms: int) -> dict[str, Any]:
+        runs = success = failed = 0
+        latency = LatencyHistogram()
+        for bucket in self._buckets(now_ms, self.window_minutes):
+            runs += bucket.runs
+            success += bucket.success
+            failed += bucket.failed
+            latency.merge(bucket.latency)
+        attempts = transitions = 0
+        for bucket in self._buckets(now_ms, self.stall_minutes):
+            attempts += bucket.attempts
+            transitions += bucket.transitions
+        terminal = success + failed
+        return {
+            "window_minutes": self.window_minutes,
+            "runs": runs,
+            "terminal_runs": terminal,
+            "success": success,
+            "failed": failed,
+            "success_rate": round(success / terminal, 4) if terminal else None,
+            "latency_p50_ms": latency.percentile(0.5),
+            "latency_p95_ms": latency.percentile(0.95),
+            "latency_p99_ms": latency.percentile(0.99),
+            "stall_attempts": attempts,
+            "stall_transitions": transitions,
+            "silent_ms": None if self.last_event_ms is None else max(0, now_ms - self.last_event_ms),
+        }
+
+    def abort_reasons(
+        self,
+        now_ms: int,
+        min_success_rate: float = config.KPI_ABORT_MIN_SUCCESS_RATE,
+        snapshot: dict[str, Any] | None = None,
+    ) -> list[str]:
+        snap = snapshot or self.snapshot(now_ms)
+        reasons: list[str] = []
+        rate = snap["success_rate"]
+        if rate is not None and rate < min_success_rate:
+            reasons.append(f"success_rate_{self.window_minutes}m={rate:.4f} below {min_success_rate:.4f}")
+        if snap["stall_attempts"] and not snap["stall_transitions"]:
+            reasons.append(
+                f"state_transitions_stalled {snap['stall_attempts']} mutating runs failed "
+                f"in {self.stall_minutes}m with no transition"
+            )
+        silent_ms = snap["silent_ms"]
+        if silent_ms is None or silent_ms >= self.silence_minutes * MINUTE_MS:
+            silent = "no events" if silent_ms is None else f"{silent_ms // MINUTE_MS}m"
+            reasons.append(f"run_log_silent {silent} (limit {self.silence_minutes}m)")
+        return reasons
+
+
+def _parse_lines(lines: Iterable[bytes]) -> Iterator[dict[str, Any]]:
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(event, dict):
+            yield event
+
+
+class LogFollower:
+    """Yield run-log events appended since the last ``poll``, following rotation of the active file."""
+
+    def __init__(self, log_path: Path):
+        self.log_path = Path(log_path)
+        self._fh: BinaryIO | None = None
+        self._pending = b""
+
+    def backfill(self, start_ms: int) -> Iterator[dict[str, Any]]:
+        """Closed segments overlapping ``start_ms``.., then the active file up to now."""
+        closed = [seg for seg in run_log.segments(self.log_path, start_ms=start_ms) if seg != self.log_path]
+        for seg in closed:
+            with run_log.open_segment(seg, binary=True) as f:
+                yield from _parse_lines(f)
+        yield from self.poll()
+
+    def _open(self) -> None:
+        try:
+            self._fh = self.log_path.open("rb")
+        except FileNotFoundError:
+            self._fh = None
+        self._pending = b""
+
+    def _drain(self) -> Iterator[dict[str, Any]]:
+        assert self._fh is not None
+        chunk = self._fh.read()
+        if not chunk:
+            return
+        lines = (self._pending + chunk).split(b"\n")
+        self._pending = lines.pop()  # incomplete tail, completed by a later write
+        yield from _parse_lines(lines)
+
+    def poll(self) -> Iterator[dict[str, Any]]:
+        if self._fh is None:
+            self._open()
+            if self._fh is None:
+                return
+        yield from self._drain()
+        try:
+            rotated = os.stat(self.log_path).st_ino != os.fstat(self._fh.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = True
+        if rotated:
+            # Lines appended between the drain above and the inode check (the writer's
+            # last ones before rotating) would be lost with the handle: drain once more.
+            yield from self._drain()
+            yield from _parse_lines([self._pending])
+            self._fh.close()
+            self._open()
+            if self._fh is not None:
+                yield from self._drain()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
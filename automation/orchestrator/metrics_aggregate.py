@@ -2,64 +2,234 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import sqlite3
 from pathlib import Path
-from statistics import mean
 from typing import Any
 
+from automation.orchestrator import orch, run_log
+from automation.orchestrator.histogram import LatencyHistogram
 
-def _read_jsonl(path: Path) -> list[dict[str, Any]]:
-    if not path.exists():
-        return []
-    rows: list[dict[str, Any]] = []
-    for line in path.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            rows.append(json.loads(line))
-        except json.JSONDecodeError:
-            continue
-    return rows
+CHECKPOINT_VERSION = 2  # v2: latency histograms instead of an exact duration counter
 
 
-def _percentile(values: list[int], p: float) -> int:
-    if not values:
-        return 0
-    seq = sorted(values)
-    idx = int((len(seq) - 1) * p)
-    return seq[idx]
+class KpiAggregate:
+    """Running totals over ``run_end`` events; serializable so a checkpoint can resume it.
 
+    Latencies go into mergeable histograms (overall and per command), so memory stays
+    bounded and aggregates from several checkpoints or hosts can be combined with ``merge``.
+    """
 
-def aggregate_from_logs(log_path: Path) -> dict[str, Any]:
-    events = _read_jsonl(log_path)
-    run_end = [e for e in events if e.get("event") == "run_end"]
+    def __init__(self) -> None:
+        self.total_runs = 0
+        self.success = 0
+        self.failed = 0
+        self.latency = LatencyHistogram()
+        self.latency_by_command: dict[str, LatencyHistogram] = {}
 
-    terminal = [e for e in run_end if e.get("command") in {"done", "fail"} and e.get("exit_code") == 0]
-    success = sum(1 for e in terminal if e.get("command") == "done")
-    failed = sum(1 for e in terminal if e.get("command") == "fail")
-    total_terminal = success + failed
+    def add(self, event: dict[str, Any]) -> None:
+        if event.get("event") != "run_end":
+            return
+        self.total_runs += 1
+        command = event.get("command")
+        if event.get("exit_code") == 0:
+            if command == "done":
+                self.success += 1
+            elif command == "fail":
+                self.failed += 1
+        duration = event.get("duration_ms")
+        if isinstance(duration, int):
+            self.latency.record(duration)
+            key = str(command or "-")
+            hist = self.latency_by_command.get(key)
+            if hist is None:
+                hist = self.latency_by_command[key] = LatencyHistogram()
+            hist.record(duration)
 
-    durations = [int(e.get("duration_ms", 0)) for e in run_end if isinstance(e.get("duration_ms"), int)]
+    def merge(self, other: KpiAggregate) -> KpiAggregate:
+        self.total_runs += other.total_runs
+        self.success += other.success
+        self.failed += other.failed
+        self.latency.merge(other.latency)
+        for command, hist in other.latency_by_command.items():
+            mine = self.latency_by_command.get(command)
+            if mine is None:
+                mine = self.latency_by_command[command] = LatencyHistogram(hist.sub_bits)
+            mine.merge(hist)
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total_runs": self.total_runs,
+            "success": self.success,
+            "failed": self.failed,
+            "latency": self.latency.to_dict(),
+            "latency_by_command": {cmd: hist.to_dict() for cmd, hist in sorted(self.latency_by_command.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> KpiAggregate:
+        agg = cls()
+        agg.total_runs = int(data["total_runs"])
+        agg.success = int(data["success"])
+        agg.failed = int(data["failed"])
+        agg.latency = LatencyHistogram.from_dict(data["latency"])
+        agg.latency_by_command = {
+            cmd: LatencyHistogram.from_dict(hist) for cmd, hist in data.get("latency_by_command", {}).items()
+        }
+        return agg
+
+    def report(self, source: Path | str) -> dict[str, Any]:
+        total_terminal = self.success + self.failed
+        avg = self.latency.mean()
+        return {
+            "source": str(source),
+            "total_runs": self.total_runs,
+            "terminal_runs": total_terminal,
+            "success": self.success,
+            "failed": self.failed,
+            "success_rate": round(self.success / total_terminal, 4) if total_terminal else None,
+            "latency_avg_ms": round(avg, 2) if avg is not None else None,
+            "latency_p50_ms": self.latency.percentile(0.5),
+            "latency_p90_ms": self.latency.percentile(0.9),
+            "latency_p95_ms": self.latency.percentile(0.95),
+            "latency_p99_ms": self.latency.percentile(0.99),
+            "latency_by_command": {cmd: hist.summary() for cmd, hist in sorted(self.latency_by_command.items())},
+        }
+
+
+def checkpoint_path(log_path: Path) -> Path:
+    return log_path.with_name(f".{log_path.stem}.kpi_checkpoint.json")
+
+
+def _head(path: Path) -> str:
+    """Fingerprint of a log file's first line, used to recognise it after rotation."""
+    with run_log.open_segment(path, binary=True) as f:
+        return hashlib.sha1(f.readline()).hexdigest()
+
+
+def _scan(path: Path, agg: KpiAggregate, offset: int = 0) -> int:
+    """Feed complete lines after ``offset`` into ``agg``; return the offset after the last one."""
+    with run_log.open_segment(path, binary=True) as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # partial line from a concurrent writer; picked up next time
+            offset += len(line)
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict):
+                agg.add(event)
+    return offset
+
+
+def _load_checkpoint(path: Path) -> dict[str, Any] | None:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("version") != CHECKPOINT_VERSION:
+        return None
+    return state
+
+
+def _advance(log_path: Path, state: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Apply everything logged since ``state``; None when the checkpoint no longer matches the files."""
+    index = run_log.read_index(log_path)
+    if state is None:
+        agg, done, offset, head = KpiAggregate(), 0, 0, ""
+    else:
+        agg = KpiAggregate.from_dict(state["aggregate"])
+        done, offset, head = int(state["segments"]), int(state["offset"]), state["head"]
+        if done > len(index):
+            return None
+
+    for entry in index[done:]:
+        seg = log_path.with_name(entry["segment"])
+        if seg.exists():
+            skip = 0
+            if offset:
+                # The first new segment is the file that was active at the checkpoint.
+                if _head(seg) != head:
+                    return None
+                skip = offset
+            _scan(seg, agg, skip)
+        offset, head = 0, ""
+
+    if log_path.exists():
+        current = _head(log_path)
+        if offset and (current != head or log_path.stat().st_size < offset):
+            return None
+        offset, head = _scan(log_path, agg, offset), current
+    else:
+        offset, head = 0, ""
 
     return {
-        "source": str(log_path),
-        "total_runs": len(run_end),
-        "terminal_runs": total_terminal,
-        "success": success,
-        "failed": failed,
-        "success_rate": round(success / total_terminal, 4) if total_terminal else None,
-        "latency_avg_ms": round(mean(durations), 2) if durations else None,
-        "latency_p95_ms": _percentile(durations, 0.95) if durations else None,
+        "version": CHECKPOINT_VERSION,
+        "segments": len(index),
+        "offset": offset,
+        "head": head,
+        "aggregate": agg.to_dict(),
     }
 
 
+def advance_checkpoint(log_path: Path, checkpoint: Path | None = None) -> KpiAggregate:
+    """Fold lines appended since the checkpoint into its aggregate, save it, and return the aggregate."""
+    checkpoint = checkpoint or checkpoint_path(log_path)
+    state = _advance(log_path, _load_checkpoint(checkpoint))
+    if state is None:
+        state = _advance(log_path, None)
+    if checkpoint.parent.exists():
+        orch.atomic_write_text(checkpoint, json.dumps(state, sort_keys=True))
+    return KpiAggregate.from_dict(state["aggregate"])
+
+
+def aggregate_incremental(log_path: Path, checkpoint: Path | None = None) -> dict[str, Any]:
+    """All-time KPIs, reading only what was appended since the checkpoint and then advancing it."""
+    return advance_checkpoint(log_path, checkpoint).report(log_path)
+
+
+def aggregate_from_logs(
+    log_path: Path,
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+    checkpoint: Path | None = None,
+) -> dict[str, Any]:
+    if checkpoint is not None and start_ms is None and end_ms is None:
+        return aggregate_incremental(log_path, checkpoint)
+    agg = KpiAggregate()
+    # Streams rotated segments too; with a window only the overlapping segments are opened.
+    for event in run_log.iter_events(log_path, start_ms, end_ms):
+        agg.add(event)
+    return agg.report(log_path)
+
+
+def merge_checkpoints(paths: list[Path]) -> dict[str, Any]:
+    """Combine the aggregates stored in several checkpoints (e.g. one per orchestrator host)."""
+    merged = KpiAggregate()
+    for path in paths:
+        state = _load_checkpoint(path)
+        if state is None:
+            raise ValueError(f"not a v{CHECKPOINT_VERSION} KPI checkpoint: {path}")
+        merged.merge(KpiAggregate.from_dict(state["aggregate"]))
+    return merged.report(",".join(str(p) for p in paths))
+
+
 def aggregate_retry_count_from_db(db_path: Path) -> int | None:
     if not db_path.exists():
         return None
     with sqlite3.connect(str(db_path)) as conn:
-        row = conn.execute("SELECT COUNT(*) FROM queue_events WHERE event_type = 'retried'").fetchone()
+        has_totals = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'queue_event_totals'"
+        ).fetchone()
+        if has_totals:
+            # Maintained by trigger and survives event compaction; avoids scanning queue_events.
+            row = conn.execute("SELECT total FROM queue_event_totals WHERE event_type = 'retried'").fetchone()
+        else:
+            row = conn.execute("SELECT COUNT(*) FROM queue_events WHERE event_type = 'retried'").fetchone()
         return int(row[0]) if row else 0
 
 
@@ -67,9 +237,21 @@ def main() -> int:
     parser = argparse.ArgumentParser(description="Aggregate orchestrator success/latency/retry metrics")
     parser.add_argument("--log-path", default="automation/orchestrator/logs/orch_runs.jsonl")
     parser.add_argument("--db-path", default="automation/orchestrator/db/queue.db")
+    parser.add_argument("--checkpoint", help="Resume from/advance this checkpoint (default: full scan)")
+    parser.add_argument("--start-ms", type=int, help="Window start (epoch ms, inclusive)")
+    parser.add_argument("--end-ms", type=int, help="Window end (epoch ms, inclusive)")
+    parser.add_argument("--merge", nargs="+", metavar="CHECKPOINT", help="Report the merge of these checkpoints")
     args = parser.parse_args()
 
-    report = aggregate_from_logs(Path(args.log_path))
+    if args.merge:
+        report = merge_checkpoints([Path(p) for p in args.merge])
+    else:
+        report = aggregate_from_logs(
+            Path(args.log_path),
+            args.start_ms,
+            args.end_ms,
+            checkpoint=Path(args.checkpoint) if args.checkpoint else None,
+        )
     report["retry_count"] = aggregate_retry_count_from_db(Path(args.db_path))
     print(json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True))
     return 0
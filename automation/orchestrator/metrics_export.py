@@ -0,0 +1,148 @@
+"""Prometheus text-format exporter for queue and run-log metrics.
+
+Every value comes from state that is already maintained incrementally, so a
+scrape costs a handful of indexed lookups plus the run-log lines appended since
+the previous scrape:
+
+- queue depth / IN_PROGRESS items per owner: ``queue_counters`` (trigger-maintained)
+- oldest PENDING age: one index seek per priority rank
+- live leases per owner / oldest active lease age: a range scan on ``idx_queue_items_lease``
+- pick / retry / idempotency-skip counters: ``queue_event_totals``
+- run latency histograms: the KPI checkpoint (``metrics_aggregate.advance_checkpoint``)
+
+Use ``serve`` for a local ``/metrics`` endpoint or ``write_textfile`` for the
+node_exporter textfile collector.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Callable
+
+from automation.orchestrator import db_store, metrics_aggregate, orch
+from automation.orchestrator.clock import get_clock
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Exposition:
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels: str) -> None:
+        label_text = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        self.lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _queue_metrics(out: _Exposition, store: db_store.QueueStore, now_ts: float) -> None:
+    counters = store.counters()
+    depth: dict[tuple[str, str], int] = defaultdict(int)
+    in_progress: dict[str, int] = defaultdict(int)
+    for row in counters:
+        depth[(row["status"], row["priority"])] += row["n"]
+        if row["status"] == "IN_PROGRESS":
+            in_progress[row["owner_session"]] += row["n"]
+
+    out.family("orch_queue_items", "gauge", "Queue items by status and priority.")
+    for (status, priority), n in sorted(depth.items()):
+        out.sample("orch_queue_items", n, status=status, priority=priority)
+
+    out.family("orch_in_progress_items", "gauge", "IN_PROGRESS items per owner session.")
+    for owner, n in sorted(in_progress.items()):
+        out.sample("orch_in_progress_items", n, owner_session=owner)
+
+    oldest_ms = store.oldest_pending_created_at_ms()
+    age = 0.0 if oldest_ms is None else max(0.0, now_ts - oldest_ms / 1000)
+    out.family("orch_oldest_pending_age_seconds", "gauge", "Age of the oldest PENDING item (0 when none).")
+    out.sample("orch_oldest_pending_age_seconds", round(age, 3))
+
+    leases = store.active_leases(int(now_ts))
+    out.family("orch_active_leases", "gauge", "Unexpired leases per lease owner.")
+    for row in leases:
+        out.sample("orch_active_leases", row["n"], lease_owner=row["lease_owner"])
+    acquired = [row["oldest_acquired_at"] for row in leases if row["oldest_acquired_at"] is not None]
+    lease_age = max(0.0, now_ts - min(acquired)) if acquired else 0.0
+    out.family("orch_oldest_lease_age_seconds", "gauge", "Age of the oldest unexpired lease (0 when none).")
+    out.sample("orch_oldest_lease_age_seconds", round(lease_age, 3))
+
+    out.family("orch_queue_events_total", "counter", "Lifetime queue events by type (picked, retried, ...).")
+    for event_type, total in sorted(store.event_totals().items()):
+        out.sample("orch_queue_events_total", total, event_type=event_type)
+
+
+def _run_metrics(out: _Exposition, agg: metrics_aggregate.KpiAggregate) -> None:
+    out.family("orch_runs_total", "counter", "orch.py runs recorded in the run log.")
+    out.sample("orch_runs_total", agg.total_runs)
+    out.family("orch_run_terminal_total", "counter", "Successful done/fail runs.")
+    out.sample("orch_run_terminal_total", agg.success, result="done")
+    out.sample("orch_run_terminal_total", agg.failed, result="fail")
+
+    out.family("orch_run_duration_ms", "histogram", "orch.py run duration in milliseconds by command.")
+    for command, hist in sorted(agg.latency_by_command.items()):
+        for bound, n in zip(DURATION_BUCKETS_MS, hist.cumulative(DURATION_BUCKETS_MS)):
+            out.sample("orch_run_duration_ms_bucket", n, command=command, le=str(bound))
+        out.sample("orch_run_duration_ms_bucket", hist.count, command=command, le="+Inf")
+        out.sample("orch_run_duration_ms_sum", hist.total, command=command)
+        out.sample("orch_run_duration_ms_count", hist.count, command=command)
+
+
+def collect(
+    store: db_store.QueueStore | None,
+    log_path: Path | None,
+    checkpoint: Path | None = None,
+    now_ts: float | None = None,
+) -> str:
+    """Render one scrape; either source may be None (e.g. markdown-only deployments have no DB)."""
+    out = _Exposition()
+    if store is not None:
+        _queue_metrics(out, store, get_clock().time() if now_ts is None else now_ts)
+    if log_path is not None:
+        _run_metrics(out, metrics_aggregate.advance_checkpoint(log_path, checkpoint))
+    return out.text()
+
+
+def write_textfile(path: Path, text: str) -> None:
+    """Atomic replace, as the node_exporter textfile collector requires."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    orch.atomic_write_text(path, text)
+
+
+def serve(host: str, port: int, render: Callable[[], str], max_seconds: float | None = None) -> None:
+    """Serve ``render()`` on GET /metrics. Single-threaded: scrapes are serialized, so the
+    store's per-thread connection and the checkpoint file are never used concurrently."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+            pass
+
+    with HTTPServer((host, port), Handler) as httpd:
+        clock = get_clock()
+        deadline = clock.monotonic() + max_seconds if max_seconds else None
+        httpd.timeout = 0.5
+        while deadline is None or clock.monotonic() < deadline:
+            httpd.handle_request()
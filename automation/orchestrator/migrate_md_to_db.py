@@ -12,7 +12,8 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from automation.orchestrator.db_store import init_db, now_kst_str
+from automation.orchestrator.clock import format_kst_minute, get_clock, kst_minute_to_ms
+from automation.orchestrator.db_store import init_db, priority_rank
 from automation.orchestrator.orch import QueueFile
 import sqlite3
 
@@ -20,43 +21,44 @@ import sqlite3
 def migrate(queue_path: str | Path, db_path: str | Path) -> int:
     init_db(db_path)
     qf = QueueFile(Path(queue_path))
-    count = 0
     with sqlite3.connect(str(db_path)) as conn:
-        now = now_kst_str()
-        for row in qf.rows:
-            conn.execute(
-                """
-                INSERT INTO queue_items(
-                  id, status, priority, task, success_criteria, owner_session,
-                  started_at_kst, due_at_kst, notes, created_at, updated_at
-                ) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(id) DO UPDATE SET
-                  status=excluded.status,
-                  priority=excluded.priority,
-                  task=excluded.task,
-                  success_criteria=excluded.success_criteria,
-                  owner_session=excluded.owner_session,
-                  started_at_kst=excluded.started_at_kst,
-                  due_at_kst=excluded.due_at_kst,
-                  notes=excluded.notes,
-                  updated_at=excluded.updated_at
-                """,
+        now = get_clock().time()
+        stamp, now_ms = format_kst_minute(now), int(now * 1000)
+        conn.executemany(
+            """
+            INSERT INTO queue_items(
+              id, status, priority, task, success_criteria, owner_session,
+              started_at_kst, due_at_kst, notes, created_at, updated_at, priority_rank,
+              created_at_ms, updated_at_ms, started_at_ms
+            ) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+              status=excluded.status,
+              priority=excluded.priority,
+              priority_rank=excluded.priority_rank,
+              task=excluded.task,
+              success_criteria=excluded.success_criteria,
+              owner_session=excluded.owner_session,
+              started_at_kst=excluded.started_at_kst,
+              due_at_kst=excluded.due_at_kst,
+              notes=excluded.notes,
+              updated_at=excluded.updated_at,
+              updated_at_ms=excluded.updated_at_ms,
+              started_at_ms=excluded.started_at_ms
+            """,
+            (
                 (
-                    row.id,
-                    row.status,
-                    row.priority,
-                    row.task,
-                    row.success_criteria,
-                    row.owner_session,
-                    row.started_at_kst,
-                    row.due_at_kst,
-                    row.notes,
-                    now,
-                    now,
-                ),
-            )
-            count += 1
-    return count
+                    *row.to_cells(),
+                    stamp,
+                    stamp,
+                    priority_rank(row.priority),
+                    now_ms,
+                    now_ms,
+                    kst_minute_to_ms(row.started_at_kst),
+                )
+                for row in qf.rows
+            ),
+        )
+    return len(qf.rows)
 
 
 def build_parser() -> argparse.ArgumentParser:
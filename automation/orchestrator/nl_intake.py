@@ -11,11 +11,11 @@ from __future__ import annotations
 
 import argparse
 import re
-from datetime import datetime
 from pathlib import Path
 from typing import Iterable
 
-from automation.orchestrator.orch import KST, QueueFile, QueueRow
+from automation.orchestrator.clock import now_kst
+from automation.orchestrator.orch import QueueFile, QueueRow
 
 BULLET_PREFIX_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
 SPLIT_RE = re.compile(r"\s*(?:,|;|/|→|->|그리고|및|그리고는)\s*")
@@ -95,30 +95,29 @@ def cmd_plan(args: argparse.Namespace) -> int:
 
 
 def cmd_submit(args: argparse.Namespace) -> int:
-    qf = QueueFile(Path(args.queue))
     tasks = propose_tasks(args.request, args.parallel)
-
-    now_tag = datetime.now(KST).strftime("%Y%m%d-%H%M")
+    now_tag = now_kst().strftime("%Y%m%d-%H%M")
     ids: list[str] = []
 
-    for task in tasks:
-        row_id = _next_orch_id(qf.rows)
-        ids.append(row_id)
-        qf.rows.append(
-            QueueRow(
-                id=row_id,
-                status="PENDING",
-                priority=args.priority,
-                task=task,
-                success_criteria=args.success_criteria or _default_success_criteria(task),
-                owner_session="-",
-                started_at_kst="-",
-                due_at_kst=args.due_at_kst or "-",
-                notes=f"nl_intake:{now_tag}",
+    with QueueFile(Path(args.queue), lock=True) as qf:
+        for task in tasks:
+            row_id = _next_orch_id(qf.rows)
+            ids.append(row_id)
+            qf.add_row(
+                QueueRow(
+                    id=row_id,
+                    status="PENDING",
+                    priority=args.priority,
+                    task=task,
+                    success_criteria=args.success_criteria or _default_success_criteria(task),
+                    owner_session="-",
+                    started_at_kst="-",
+                    due_at_kst=args.due_at_kst or "-",
+                    notes=f"nl_intake:{now_tag}",
+                )
             )
-        )
 
-    qf.save()
+        qf.save()
 
     print(f"created={len(ids)} ids={','.join(ids)}")
     for i, (row_id, task) in enumerate(zip(ids, tasks), start=1):
@@ -4,17 +4,15 @@
 from __future__ import annotations
 
 import argparse
-import sqlite3
 from collections import Counter
-from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Mapping
 
-from automation.orchestrator import config, db_store, metrics_aggregate
-from automation.orchestrator.orch import QueueFile, now_kst_str
+from automation.orchestrator import config, db_store, kpi_window, metrics_aggregate, metrics_export
+from automation.orchestrator.clock import get_clock
+from automation.orchestrator.orch import QueueFile, QueueRow, emit_lock_wait
 
 TOP_IN_PROGRESS = config.TOP_IN_PROGRESS_DISPLAY
-KST = timezone(timedelta(hours=config.TIMEZONE_OFFSET_HOURS))
 
 
 def _append_note(existing: str, msg: str) -> str:
@@ -24,13 +22,17 @@ def _append_note(existing: str, msg: str) -> str:
     return f"{existing.strip()} | {msg}"
 
 
-def _status_summary(rows: Iterable[dict[str, str]]) -> str:
+def _status_summary(rows: Iterable[QueueRow | dict[str, Any]]) -> str:
     rows = list(rows)
     counts = Counter(r["status"] for r in rows)
+    in_progress = [r for r in rows if r["status"] == "IN_PROGRESS"][:TOP_IN_PROGRESS]
+    return _format_status(counts, in_progress)
+
+
+def _format_status(counts: Mapping[str, int], in_progress: list[QueueRow | dict[str, Any]]) -> str:
     order = ["PENDING", "IN_PROGRESS", "BLOCKED", "FAILED", "DONE"]
     summary = " ".join(f"{k}={counts.get(k, 0)}" for k in order)
 
-    in_progress = [r for r in rows if r["status"] == "IN_PROGRESS"][:TOP_IN_PROGRESS]
     lines = [f"summary {summary}"]
     if not in_progress:
         lines.append("top_in_progress: none")
@@ -41,44 +43,47 @@ def _status_summary(rows: Iterable[dict[str, str]]) -> str:
     return "\n".join(lines)
 
 
-def _workers_summary(rows: Iterable[dict[str, str]]) -> str:
-    rows = list(rows)
+def _workers_summary(rows: Iterable[QueueRow | dict[str, Any]]) -> str:
     in_progress = [r for r in rows if r["status"] == "IN_PROGRESS"]
-    if not in_progress:
+    owners: dict[str, Counter[str]] = {}
+    for row in in_progress:
+        owners.setdefault(row.get("owner_session") or "-", Counter())[row.get("priority") or "P2"] += 1
+    return _format_workers(owners, in_progress)
+
+
+def _format_workers(owners: Mapping[str, Mapping[str, int]], in_progress: list[QueueRow | dict[str, Any]]) -> str:
+    """``owners`` maps owner -> IN_PROGRESS count by priority.
+
+    ``in_progress`` may hold only some of those rows; ids not among them are
+    summarized as ``+N``.
+    """
+    if not owners:
         return "workers: none"
 
-    grouped: dict[str, list[dict[str, str]]] = {}
+    grouped: dict[str, list[QueueRow | dict[str, Any]]] = {}
     for row in in_progress:
         owner = row.get("owner_session") or "-"
         grouped.setdefault(owner, []).append(row)
 
-    lines = [f"workers_active={len(grouped)} in_progress={len(in_progress)}"]
-    for owner in sorted(grouped):
-        tasks = grouped[owner]
-        ids = ",".join(r["id"] for r in tasks)
+    total = sum(sum(priorities.values()) for priorities in owners.values())
+    lines = [f"workers_active={len(owners)} in_progress={total}"]
+    for owner in sorted(owners):
+        priorities = owners[owner]
+        count = sum(priorities.values())
+        tasks = grouped.get(owner, [])
+        ids = [r["id"] for r in tasks]
+        if count > len(tasks):
+            ids.append(f"+{count - len(tasks)}")
         oldest = next((r.get("started_at_kst", "-") for r in tasks if r.get("started_at_kst") and r.get("started_at_kst") != "-"), "-")
-        priorities = Counter((r.get("priority") or "P2") for r in tasks)
         lines.append(
-            f"- {owner} tasks={len(tasks)} p0={priorities.get('P0', 0)} p1={priorities.get('P1', 0)} p2={priorities.get('P2', 0)} ids={ids} oldest_start={oldest}"
+            f"- {owner} tasks={count} p0={priorities.get('P0', 0)} p1={priorities.get('P1', 0)} p2={priorities.get('P2', 0)} ids={','.join(ids)} oldest_start={oldest}"
         )
     return "\n".join(lines)
 
 
-def _rows_from_md(queue_path: Path) -> list[dict[str, str]]:
-    qf = QueueFile(queue_path)
-    return [
-        {
-            "id": r.id,
-            "status": r.status,
-            "priority": r.priority,
-            "task": r.task,
-            "owner_session": r.owner_session,
-            "started_at_kst": r.started_at_kst,
-            "due_at_kst": r.due_at_kst,
-            "notes": r.notes,
-        }
-        for r in qf.rows
-    ]
+def _rows_from_md(queue_path: Path) -> list[QueueRow]:
+    # QueueRow supports row["field"] / row.get(), so no per-row dict copies.
+    return QueueFile(queue_path).rows
 
 
 def _rows_from_db(db_path: Path) -> list[dict[str, Any]]:
@@ -97,81 +102,79 @@ def cmd_workers_md(queue_path: Path) -> int:
     return 0
 
 
-def cmd_cancel_md(queue_path: Path, item_id: str) -> int:
-    qf = QueueFile(queue_path)
-    row = qf.find_by_id(item_id)
-    if row.status in {"DONE", "FAILED"}:
-        raise ValueError(f"cannot cancel terminal item: {item_id} ({row.status})")
-    row.status = "BLOCKED"
-    row.notes = _append_note(row.notes, "cancelled_by_operator")
-    qf.save()
+def cmd_cancel_md(queue_path: Path, item_id: str, log_path: Path | None = None) -> int:
+    with QueueFile(queue_path, lock=True) as qf:
+        row = qf.find_by_id(item_id)
+        if row.status in {"DONE", "FAILED"}:
+            raise ValueError(f"cannot cancel terminal item: {item_id} ({row.status})")
+        qf.update(row, status="BLOCKED", notes=_append_note(row.notes, "cancelled_by_operator"))
+        qf.save()
+    emit_lock_wait(log_path, "ops.cancel", qf)
     print(f"{item_id} -> BLOCKED")
     return 0
 
 
-def cmd_replan_md(queue_path: Path, item_id: str, notes: str) -> int:
-    qf = QueueFile(queue_path)
-    row = qf.find_by_id(item_id)
-    row.status = "BLOCKED" if row.status == "IN_PROGRESS" else "PENDING"
-    row.notes = _append_note(row.notes, f"replan:{notes.strip()}")
-    qf.save()
+def cmd_replan_md(queue_path: Path, item_id: str, notes: str, log_path: Path | None = None) -> int:
+    with QueueFile(queue_path, lock=True) as qf:
+        row = qf.find_by_id(item_id)
+        qf.update(
+            row,
+            status="BLOCKED" if row.status == "IN_PROGRESS" else "PENDING",
+            notes=_append_note(row.notes, f"replan:{notes.strip()}"),
+        )
+        qf.save()
+    emit_lock_wait(log_path, "ops.replan", qf)
     print(f"{item_id} -> {row.status}")
     return 0
 
 
-def cmd_retry_md(queue_path: Path, item_id: str) -> int:
-    qf = QueueFile(queue_path)
-    row = qf.find_by_id(item_id)
-    if row.status not in {"FAILED", "BLOCKED"}:
-        raise ValueError(f"retry allowed only for FAILED/BLOCKED in markdown mode: {item_id} ({row.status})")
-    row.status = "PENDING"
-    row.owner_session = "-"
-    row.started_at_kst = "-"
-    row.notes = _append_note(row.notes, "retry_requested")
-    qf.save()
+def cmd_retry_md(queue_path: Path, item_id: str, log_path: Path | None = None) -> int:
+    with QueueFile(queue_path, lock=True) as qf:
+        row = qf.find_by_id(item_id)
+        if row.status not in {"FAILED", "BLOCKED"}:
+            raise ValueError(f"retry allowed only for FAILED/BLOCKED in markdown mode: {item_id} ({row.status})")
+        qf.update(
+            row,
+            status="PENDING",
+            owner_session="-",
+            started_at_kst="-",
+            notes=_append_note(row.notes, "retry_requested"),
+        )
+        qf.save()
+    emit_lock_wait(log_path, "ops.retry", qf)
     print(f"{item_id} -> PENDING")
     return 0
 
 
 def _db_row(path: Path, item_id: str) -> dict:
-    items = [x for x in db_store.list_items(path) if x["id"] == item_id]
-    if not items:
+    row = db_store.get_item(path, item_id)
+    if row is None:
         raise ValueError(f"Row id not found: {item_id}")
-    return items[0]
+    return row
 
 
 def cmd_status_db(db_path: Path) -> int:
-    rows = _rows_from_db(db_path)
-    print(_status_summary(rows))
+    # Counters + an index seek on IN_PROGRESS: cost stays flat as DONE history grows.
+    counts = db_store.status_counts(db_path)
+    in_progress = db_store.list_items(db_path, status="IN_PROGRESS", limit=TOP_IN_PROGRESS)
+    print(_format_status(counts, in_progress))
     return 0
 
 
 def cmd_workers_db(db_path: Path) -> int:
-    rows = _rows_from_db(db_path)
-    print(_workers_summary(rows))
+    # Per-owner counts come from queue_counters; only the top rows are read for ids/oldest_start.
+    owners: dict[str, Counter[str]] = {}
+    for counter in db_store.counters(db_path):
+        if counter["status"] == "IN_PROGRESS":
+            owners.setdefault(counter["owner_session"] or "-", Counter())[counter["priority"] or "P2"] += counter["n"]
+    in_progress = db_store.list_items(db_path, status="IN_PROGRESS", limit=TOP_IN_PROGRESS)
+    print(_format_workers(owners, in_progress))
     return 0
 
 
-def _parse_kst(s: str | None) -> datetime | None:
-    if not s or s == "-":
-        return None
-    try:
-        return datetime.strptime(s, "%Y-%m-%d %H:%M").replace(tzinfo=KST)
-    except ValueError:
-        return None
-
-
-def _count_stale_in_progress(rows: Iterable[dict[str, Any]], stale_minutes: int) -> int:
-    now = datetime.now(KST)
-    cutoff = now - timedelta(minutes=stale_minutes)
-    count = 0
-    for row in rows:
-        if row.get("status") != "IN_PROGRESS":
-            continue
-        started = _parse_kst(str(row.get("started_at_kst") or ""))
-        if started and started <= cutoff:
-            count += 1
-    return count
+def _count_stale_in_progress(db_path: Path, stale_minutes: int) -> int:
+    cutoff_ms = int((get_clock().time() - stale_minutes * 60) * 1000)
+    return db_store.count_stale_in_progress(db_path, cutoff_ms)
 
 
 def cmd_consistency_check(queue_path: Path, db_path: Path) -> int:
@@ -222,22 +225,32 @@ def cmd_kpi(
     max_stale_in_progress: int | None,
     stale_minutes: int,
     fail_on_alert: bool,
+    checkpoint: Path | None = None,
+    e2e_window_minutes: int = config.KPI_E2E_WINDOW_MINUTES,
 ) -> int:
-    report = metrics_aggregate.aggregate_from_logs(log_path)
+    report = metrics_aggregate.aggregate_from_logs(log_path, checkpoint=checkpoint)
     report["retry_count"] = metrics_aggregate.aggregate_retry_count_from_db(db_path)
 
-    db_rows = _rows_from_db(db_path) if db_path.exists() else []
-    stale_in_progress = _count_stale_in_progress(db_rows, stale_minutes=stale_minutes)
+    stale_in_progress = 0
+    e2e: dict[str, Any] = {}
+    if db_path.exists():
+        stale_in_progress = _count_stale_in_progress(db_path, stale_minutes=stale_minutes)
+        since_ms = int((get_clock().time() - e2e_window_minutes * 60) * 1000)
+        e2e = db_store.terminal_latency(db_path, since_ms=since_ms)
 
     success_rate = report.get("success_rate")
     success_rate_text = "-" if success_rate is None else f"{success_rate * 100:.2f}%"
     print(
         "kpi "
         f"success_rate={success_rate_text} "
+        f"latency_p50_ms={report.get('latency_p50_ms')} "
         f"latency_p95_ms={report.get('latency_p95_ms')} "
+        f"latency_p99_ms={report.get('latency_p99_ms')} "
         f"latency_avg_ms={report.get('latency_avg_ms')} "
         f"retry_count={report.get('retry_count')} "
-        f"stale_in_progress={stale_in_progress}"
+        f"stale_in_progress={stale_in_progress} "
+        f"e2e_p50_ms={e2e.get('latency_p50_ms')} "
+        f"e2e_p95_ms={e2e.get('latency_p95_ms')}"
     )
 
     alerts: list[str] = []
@@ -261,6 +274,71 @@ def cmd_kpi(
     return 0
 
 
+def cmd_kpi_window(
+    log_path: Path,
+    window_minutes: int,
+    max_failure_rate: float | None,
+    max_latency_p95_ms: int | None,
+    min_success_rate: float,
+    fail_on_alert: bool,
+    watch: bool = False,
+    interval_seconds: float = 10.0,
+    max_seconds: float | None = None,
+    now: Callable[[], float] | None = None,
+    sleep: Callable[[float], None] | None = None,
+) -> int:
+    clock = get_clock()
+    now = now or clock.time
+    sleep = sleep or clock.sleep
+    window = kpi_window.KpiWindow(window_minutes)
+    follower = kpi_window.LogFollower(log_path)
+    deadline = clock.monotonic() + max_seconds if max_seconds else None
+    try:
+        for event in follower.backfill(int(now() * 1000) - window.size * kpi_window.MINUTE_MS):
+            window.add(event)
+        while True:
+            for event in follower.poll():
+                window.add(event)
+            now_ms = int(now() * 1000)
+            snap = window.snapshot(now_ms)
+            success_rate = snap["success_rate"]
+            success_rate_text = "-" if success_rate is None else f"{success_rate * 100:.2f}%"
+            silent_ms = snap["silent_ms"]
+            print(
+                "kpi "
+                f"window={window_minutes}m "
+                f"runs={snap['runs']} "
+                f"success_rate={success_rate_text} "
+                f"latency_p50_ms={snap['latency_p50_ms']} "
+                f"latency_p95_ms={snap['latency_p95_ms']} "
+                f"latency_p99_ms={snap['latency_p99_ms']} "
+                f"silent_s={'-' if silent_ms is None else silent_ms // 1000}",
+                flush=True,
+            )
+
+            alerts: list[str] = []
+            if max_failure_rate is not None and success_rate is not None and 1 - success_rate > max_failure_rate:
+                alerts.append(f"failure_rate={1 - success_rate:.4f} exceeds {max_failure_rate:.4f}")
+            p95 = snap["latency_p95_ms"]
+            if max_latency_p95_ms is not None and p95 is not None and p95 > max_latency_p95_ms:
+                alerts.append(f"latency_p95_ms={p95} exceeds {max_latency_p95_ms}")
+            aborts = window.abort_reasons(now_ms, min_success_rate, snap)
+            for msg in alerts:
+                print(f"alert {msg}", flush=True)
+            for msg in aborts:
+                print(f"abort {msg}", flush=True)
+
+            if (alerts or aborts) and fail_on_alert:
+                return 2
+            if not watch or (deadline is not None and clock.monotonic() >= deadline):
+                return 0
+            sleep(interval_seconds)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        follower.close()
+
+
 def cmd_cancel_db(db_path: Path, item_id: str) -> int:
     row = _db_row(db_path, item_id)
     if row["status"] in {"DONE", "FAILED"}:
@@ -279,22 +357,13 @@ def cmd_replan_db(db_path: Path, item_id: str, notes: str) -> int:
     if next_status == "BLOCKED":
         db_store.mark_blocked(db_path, item_id, merged_notes)
     else:
-        with sqlite3.connect(db_path) as conn:
-            conn.execute(
-                """
-                UPDATE queue_items
-                SET status='PENDING',
-                    owner_session='-',
-                    started_at_kst='-',
-                    lease_owner=NULL,
-                    lease_expires_at=NULL,
-                    notes=?,
-                    updated_at=?
-                WHERE id=?
-                """,
-                (merged_notes, now_kst_str(), item_id),
-            )
-        db_store.append_event(db_path, item_id, "replan", {"status": "PENDING", "notes": merged_notes})
+        db_store.requeue_item(
+            db_path,
+            item_id,
+            notes=merged_notes,
+            not_before=0,
+            events=[("replan", {"status": "PENDING", "notes": merged_notes})],
+        )
     print(f"{item_id} -> {next_status}")
     return 0
 
@@ -313,29 +382,73 @@ def cmd_retry_db(db_path: Path, item_id: str, now_ts: int | None = None) -> int:
     if status != "FAILED" and not timed_out:
         raise ValueError(f"retry allowed only for FAILED or timed-out IN_PROGRESS in db mode: {item_id} ({status})")
 
-    backoff = db_store.RETRY_BACKOFF_SECONDS[min(attempts, len(db_store.RETRY_BACKOFF_SECONDS) - 1)]
-    notes = _append_note(row.get("notes", ""), f"retry_not_before={now_epoch + backoff}")
-    with sqlite3.connect(db_path) as conn:
-        conn.execute(
-            """
-            UPDATE queue_items
-            SET status='PENDING',
-                owner_session='-',
-                started_at_kst='-',
-                lease_owner=NULL,
-                lease_expires_at=NULL,
-                attempt_count=attempt_count+1,
-                notes=?,
-                updated_at=?
-            WHERE id=?
-            """,
-            (notes, now_kst_str(), item_id),
-        )
-    db_store.append_event(db_path, item_id, "retried", {"reason": "operator_retry"})
+    not_before = now_epoch + db_store.retry_backoff_seconds(attempts)
+    notes = _append_note(row.get("notes", ""), f"retry_not_before={not_before}")
+    db_store.requeue_item(
+        db_path,
+        item_id,
+        notes=notes,
+        attempt_count=attempts + 1,
+        not_before=not_before,
+        events=[("retried", {"reason": "operator_retry"})],
+    )
     print(f"{item_id} -> PENDING")
     return 0
 
 
+def cmd_compact_events(
+    db_path: Path,
+    keep_days: int | None,
+    keep_last: int | None,
+    archive_path: Path | None,
+    full_vacuum: bool,
+) -> int:
+    result = db_store.compact_events(
+        db_path,
+        keep_days=keep_days,
+        keep_last=keep_last,
+        archive_path=archive_path,
+        full_vacuum=full_vacuum,
+    )
+    print(
+        "compact-events "
+        f"archived={result['archived']} "
+        f"remaining={result['remaining']} "
+        f"free_pages={result['free_pages']} "
+        f"archive={result['archive'] or '-'}"
+    )
+    return 0
+
+
+def cmd_metrics_serve(
+    db_path: Path | None,
+    log_path: Path | None,
+    checkpoint: Path | None,
+    bind: str,
+    port: int,
+    textfile: Path | None,
+    max_seconds: float | None,
+) -> int:
+    store = db_store.QueueStore(db_path) if db_path is not None and db_path.exists() else None
+    try:
+        def render() -> str:
+            return metrics_export.collect(store, log_path, checkpoint)
+
+        if textfile is not None:
+            metrics_export.write_textfile(textfile, render())
+            print(f"metrics-serve textfile={textfile}")
+            return 0
+        print(f"metrics-serve listening=http://{bind}:{port}/metrics", flush=True)
+        try:
+            metrics_export.serve(bind, port, render, max_seconds=max_seconds)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    finally:
+        if store is not None:
+            store.close()
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Orchestrator operator CLI")
     p.add_argument("--queue", default="automation/orchestrator/QUEUE.md", help="Queue markdown path")
@@ -358,23 +471,62 @@ def build_parser() -> argparse.ArgumentParser:
     kpi.add_argument("--max-stale-in-progress", type=int, default=0)
     kpi.add_argument("--stale-minutes", type=int, default=60)
     kpi.add_argument("--fail-on-alert", action="store_true")
+    kpi.add_argument("--checkpoint", help="Aggregation checkpoint (default: .<log stem>.kpi_checkpoint.json)")
+    kpi.add_argument("--no-checkpoint", action="store_true", help="Rescan the whole log instead of resuming")
+    kpi.add_argument("--window", help="Rolling window (e.g. 30m, 2h) with soak abort conditions instead of all-time")
+    kpi.add_argument("--watch", action="store_true", help="With --window: keep tailing the log and re-evaluate")
+    kpi.add_argument("--interval-seconds", type=float, default=10.0)
+    kpi.add_argument("--max-seconds", type=float, help="Stop --watch after this long (default: until Ctrl-C)")
+    kpi.add_argument("--min-success-rate", type=float, default=config.KPI_ABORT_MIN_SUCCESS_RATE)
+    kpi.add_argument(
+        "--e2e-window",
+        default=f"{config.KPI_E2E_WINDOW_MINUTES}m",
+        help="Only items finished within this window (e.g. 30m, 24h) count toward e2e_p*_ms",
+    )
 
     cancel = sub.add_parser("cancel", help="Cancel an active item (moves to BLOCKED)")
     cancel.add_argument("--id", required=True)
+    cancel.add_argument("--log-path", default=str(config.LOG_PATH), help="JSONL run log for queue-lock waits")
 
     replan = sub.add_parser("replan", help="Apply replan note and status transition")
     replan.add_argument("--id", required=True)
     replan.add_argument("--notes", required=True)
+    replan.add_argument("--log-path", default=str(config.LOG_PATH), help="JSONL run log for queue-lock waits")
 
     retry = sub.add_parser("retry", help="Move eligible item back to PENDING")
     retry.add_argument("--id", required=True)
+    retry.add_argument("--log-path", default=str(config.LOG_PATH), help="JSONL run log for queue-lock waits")
+
+    compact = sub.add_parser("compact-events", help="Archive old queue_events and reclaim DB space")
+    compact.add_argument("--db-path")
+    compact.add_argument("--keep-days", type=int, help="Keep events newer than N days")
+    compact.add_argument("--keep-last", type=int, help="Keep the last M events per item")
+    compact.add_argument("--archive", help="gzip JSONL archive path (default: <db dir>/archive/...)")
+    compact.add_argument("--full-vacuum", action="store_true", help="Run a full VACUUM instead of incremental")
+
+    metrics = sub.add_parser("metrics-serve", help="Export Prometheus metrics over HTTP or to a textfile")
+    metrics.add_argument("--db-path")
+    metrics.add_argument("--log-path", default=str(config.LOG_PATH))
+    metrics.add_argument("--checkpoint", help="KPI checkpoint (default: .<log stem>.kpi_checkpoint.json)")
+    metrics.add_argument("--bind", default=config.METRICS_BIND)
+    metrics.add_argument("--port", type=int, default=config.METRICS_PORT)
+    metrics.add_argument("--textfile", help="Write one scrape to this .prom file and exit (textfile collector)")
+    metrics.add_argument("--max-seconds", type=float, help="Stop serving after this long (default: until Ctrl-C)")
 
     return p
 
 
+def _migrated(db_path: Path | None) -> Path | None:
+    """Bring an existing DB up to the current schema before any query touches it."""
+    if db_path is not None and db_path.exists():
+        db_store.ensure_schema(db_path)
+    return db_path
+
+
 def main(argv: list[str] | None = None) -> int:
-    args = build_parser().parse_args(argv)
-    db_path = Path(args.db) if args.db else None
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    db_path = _migrated(Path(args.db)) if args.db else None
     queue_path = Path(args.queue)
 
     if args.command == "status":
@@ -384,24 +536,72 @@ def main(argv: list[str] | None = None) -> int:
     if args.command == "consistency-check":
         check_queue = Path(args.queue_path) if args.queue_path else queue_path
         check_db = Path(args.db_path) if args.db_path else (db_path if db_path else config.DB_PATH)
-        return cmd_consistency_check(check_queue, check_db)
+        return cmd_consistency_check(check_queue, _migrated(check_db))
     if args.command == "kpi":
+        if args.watch and not args.window:
+            parser.error("kpi --watch needs --window")
+        try:
+            window = kpi_window.parse_window(args.window) if args.window else None
+            e2e_window = kpi_window.parse_window(args.e2e_window)
+        except ValueError as exc:
+            parser.error(str(exc))
+        if window:
+            return cmd_kpi_window(
+                Path(args.log_path),
+                window,
+                max_failure_rate=args.max_failure_rate,
+                max_latency_p95_ms=args.max_latency_p95_ms,
+                min_success_rate=args.min_success_rate,
+                fail_on_alert=args.fail_on_alert,
+                watch=args.watch,
+                interval_seconds=args.interval_seconds,
+                max_seconds=args.max_seconds,
+            )
         target_db = Path(args.db_path) if args.db_path else (db_path if db_path else config.DB_PATH)
+        kpi_checkpoint = None
+        if not args.no_checkpoint:
+            kpi_checkpoint = Path(args.checkpoint) if args.checkpoint else metrics_aggregate.checkpoint_path(Path(args.log_path))
         return cmd_kpi(
             Path(args.log_path),
-            target_db,
+            _migrated(target_db),
             max_failure_rate=args.max_failure_rate,
             max_latency_p95_ms=args.max_latency_p95_ms,
             max_stale_in_progress=args.max_stale_in_progress,
             stale_minutes=args.stale_minutes,
             fail_on_alert=args.fail_on_alert,
+            checkpoint=kpi_checkpoint,
+            e2e_window_minutes=e2e_window,
         )
     if args.command == "cancel":
-        return cmd_cancel_db(db_path, args.id) if db_path else cmd_cancel_md(queue_path, args.id)
+        return cmd_cancel_db(db_path, args.id) if db_path else cmd_cancel_md(queue_path, args.id, Path(args.log_path))
     if args.command == "replan":
-        return cmd_replan_db(db_path, args.id, args.notes) if db_path else cmd_replan_md(queue_path, args.id, args.notes)
+        if db_path:
+            return cmd_replan_db(db_path, args.id, args.notes)
+        return cmd_replan_md(queue_path, args.id, args.notes, Path(args.log_path))
     if args.command == "retry":
-        return cmd_retry_db(db_path, args.id) if db_path else cmd_retry_md(queue_path, args.id)
+        return cmd_retry_db(db_path, args.id) if db_path else cmd_retry_md(queue_path, args.id, Path(args.log_path))
+    if args.command == "compact-events":
+        if args.keep_days is None and args.keep_last is None:
+            parser.error("compact-events needs --keep-days and/or --keep-last")
+        target_db = Path(args.db_path) if args.db_path else (db_path if db_path else config.DB_PATH)
+        return cmd_compact_events(
+            _migrated(target_db),
+            keep_days=args.keep_days,
+            keep_last=args.keep_last,
+            archive_path=Path(args.archive) if args.archive else None,
+            full_vacuum=args.full_vacuum,
+        )
+    if args.command == "metrics-serve":
+        target_db = Path(args.db_path) if args.db_path else (db_path if db_path else config.DB_PATH)
+        return cmd_metrics_serve(
+            _migrated(target_db),
+            Path(args.log_path),
+            Path(args.checkpoint) if args.checkpoint else None,
+            bind=args.bind,
+            port=args.port,
+            textfile=Path(args.textfile) if args.textfile else None,
+            max_seconds=args.max_seconds,
+        )
 
     raise ValueError(f"unknown command: {args.command}")
 
@@ -4,32 +4,118 @@
 from __future__ import annotations
 
 import argparse
-import dataclasses
-import json
+import heapq
+import marshal
+import os
+import stat
+import sys
+import threading
 import time
 import uuid
-from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from itertools import accumulate
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Callable, List, NamedTuple, Tuple
 
-from automation.orchestrator import config
+from automation.orchestrator import config, run_log
+from automation.orchestrator.clock import format_kst_iso, get_clock, now_kst_str
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts run without the advisory lock
+    fcntl = None
 
-KST = timezone(timedelta(hours=config.TIMEZONE_OFFSET_HOURS))
 PRIORITY_ORDER = config.PRIORITY_ORDER
 DEFAULT_LOG_PATH = config.LOG_PATH
 
 
-@dataclasses.dataclass
+# Columns with a handful of distinct values; interning makes equal values share one string.
+_INTERNED_FIELDS = frozenset({"status", "priority", "owner_session"})
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
 class QueueRow:
-    id: str
-    status: str
-    priority: str
-    task: str
-    success_criteria: str
-    owner_session: str
-    started_at_kst: str
-    due_at_kst: str
-    notes: str
+    """One queue table row.
+
+    Slotted rather than a dataclass so large archive queues carry no
+    per-row ``__dict__``. ``row["status"]`` / ``row.get("status")`` mirror the
+    DB row dicts, so shared summaries can take markdown rows without copying.
+    """
+
+    FIELDS = (
+        "id",
+        "status",
+        "priority",
+        "task",
+        "success_criteria",
+        "owner_session",
+        "started_at_kst",
+        "due_at_kst",
+        "notes",
+    )
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        id: str,
+        status: str,
+        priority: str,
+        task: str,
+        success_criteria: str,
+        owner_session: str,
+        started_at_kst: str,
+        due_at_kst: str,
+        notes: str,
+    ):
+        self.id = id
+        self.status = _intern(status)
+        self.priority = _intern(priority)
+        self.task = task
+        self.success_criteria = success_criteria
+        self.owner_session = _intern(owner_session)
+        self.started_at_kst = started_at_kst
+        self.due_at_kst = due_at_kst
+        self.notes = notes
+
+    @classmethod
+    def _from_cells(cls, cells: Tuple[str, ...]) -> QueueRow:
+        """Build a row from parsed cells, which ``QueueFile`` has already interned."""
+        row = cls.__new__(cls)
+        (
+            row.id,
+            row.status,
+            row.priority,
+            row.task,
+            row.success_criteria,
+            row.owner_session,
+            row.started_at_kst,
+            row.due_at_kst,
+            row.notes,
+        ) = cells
+        return row
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, QueueRow):
+            return NotImplemented
+        return self.to_cells() == other.to_cells()
+
+    __hash__ = None  # type: ignore[assignment]  # mutable, like the dataclass it replaced
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"QueueRow({fields})"
+
+    def __getitem__(self, key: str) -> str:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.FIELDS else default
 
     def to_cells(self) -> List[str]:
         return [
@@ -45,51 +131,483 @@ class QueueRow:
         ]
 
 
+# Positions of the interned columns within a parsed row.
+_INTERNED_COLUMNS = tuple(i for i, name in enumerate(QueueRow.FIELDS) if name in _INTERNED_FIELDS)
+
+LOCK_POLL_SECONDS = 0.005
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write via temp file + fsync + rename so readers never see a partial file."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp, stat.S_IMODE(path.stat().st_mode))
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _fsync_dir(path.parent)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+JOURNAL_VERSION = 1
+Patch = Tuple[int, bytes]
+
+
+def journal_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.journal")
+
+
+def _apply_patches(path: Path, patches: Sequence[Patch], size: int) -> None:
+    with path.open("r+b") as f:
+        for offset, data in patches:
+            f.seek(offset)
+            f.write(data)
+        f.truncate(size)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_patches(path: Path, patches: Sequence[Patch], size: int) -> None:
+    """Apply ``(offset, bytes)`` patches and truncate to ``size`` through a redo journal.
+
+    The patches are first written atomically to ``journal_path(path)``, then
+    applied and synced, then the journal is removed. A crash in between leaves
+    a complete journal that ``replay_journal`` applies again; the patches are
+    absolute, so replaying them twice is harmless. Callers hold the queue lock.
+    """
+    journal = journal_path(path)
+    atomic_write_bytes(journal, marshal.dumps((JOURNAL_VERSION, tuple(patches), size)))
+    _apply_patches(path, patches, size)
+    journal.unlink()
+
+
+def replay_journal(path: Path) -> bool:
+    """Finish a save interrupted by a crash; True if a journal was replayed."""
+    journal = journal_path(path)
+    try:
+        version, patches, size = marshal.loads(journal.read_bytes())
+    except FileNotFoundError:
+        return False
+    except (OSError, EOFError, ValueError, TypeError):
+        # Journals are renamed into place complete, so this one is not ours to apply.
+        journal.unlink(missing_ok=True)
+        return False
+    if version == JOURNAL_VERSION:
+        _apply_patches(path, patches, size)
+    journal.unlink(missing_ok=True)
+    return True
+
+
+StatKey = Tuple[int, int, int]
+
+
+class ParsedQueue(NamedTuple):
+    """Immutable parse result of a queue file, shareable between QueueFile instances."""
+
+    stat_key: StatKey
+    head: Tuple[str, ...]  # lines up to and including the table separator
+    tail: Tuple[str, ...]  # lines after the table
+    cells: Tuple[Tuple[str, ...], ...]
+    offsets: Tuple[int, ...]  # byte offset of every row line, plus one for the end of the table
+    canonical: bool
+    # Parse-time indexes (see _build_index); shared by every QueueFile, so never mutated.
+    ids: dict[str, int]
+    by_status: dict[str, Tuple[int, ...]]
+    pending: Tuple[Tuple[int, int], ...]
+
+
+class QueueParseCache:
+    """Process-level LRU of ParsedQueue keyed by path, validated by (inode, mtime_ns, size).
+
+    Entries whose mtime is within ``RACY_NS`` of the moment they were parsed are
+    never trusted (the git "racy clean" rule): a same-size rewrite inside one
+    filesystem timestamp tick would otherwise be invisible to the stat key.
+    With ``sidecar=True`` entries are also persisted next to the queue as a
+    marshal file so fresh processes (dashboard refreshes) skip parsing too.
+    """
+
+    RACY_NS = 1_000_000_000
+    SIDECAR_VERSION = 3
+
+    def __init__(
+        self, maxsize: int = config.QUEUE_MD_PARSE_CACHE_SIZE, sidecar: bool = config.QUEUE_MD_PARSE_CACHE_SIDECAR
+    ):
+        self.maxsize = maxsize
+        self.sidecar = sidecar
+        self._entries: OrderedDict[str, Tuple[int, ParsedQueue]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def sidecar_path(path: Path) -> Path:
+        return path.with_name(f".{path.name}.parsecache")
+
+    def load(self, path: Path, parse: Callable[[str, StatKey], ParsedQueue]) -> ParsedQueue:
+        key = str(path.resolve())
+        stat_key = _stat_key(path)
+        cached = self._lookup(key, path, stat_key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        parsed = parse(path.read_text(encoding="utf-8"), stat_key)
+        parsed_ns = time.time_ns()
+        if self.maxsize > 0 and _stat_key(path) == stat_key and parsed_ns - stat_key[1] >= self.RACY_NS:
+            self._store(key, parsed_ns, parsed)
+            if self.sidecar:
+                self._write_sidecar(path, parsed_ns, parsed)
+        return parsed
+
+    def _lookup(self, key: str, path: Path, stat_key: StatKey) -> ParsedQueue | None:
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.sidecar:
+            entry = self._read_sidecar(path)
+            if entry is not None:
+                self._store(key, *entry)
+        if entry is None:
+            return None
+        parsed_ns, parsed = entry
+        if parsed.stat_key != stat_key or parsed_ns - stat_key[1] < self.RACY_NS:
+            return None
+        return parsed
+
+    def _store(self, key: str, parsed_ns: int, parsed: ParsedQueue) -> None:
+        with self._lock:
+            self._entries[key] = (parsed_ns, parsed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _read_sidecar(self, path: Path) -> Tuple[int, ParsedQueue] | None:
+        try:
+            version, parsed_ns, fields = marshal.loads(self.sidecar_path(path).read_bytes())
+            if version != self.SIDECAR_VERSION:
+                return None
+            return parsed_ns, ParsedQueue(*fields)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def _write_sidecar(self, path: Path, parsed_ns: int, parsed: ParsedQueue) -> None:
+        target = self.sidecar_path(path)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_bytes(marshal.dumps((self.SIDECAR_VERSION, parsed_ns, tuple(parsed))))
+            os.replace(tmp, target)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+
+
+def _stat_key(path: Path) -> StatKey:
+    st = path.stat()
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+PARSE_CACHE = QueueParseCache()
+
+
+# A length-changing edit rewrites the file from that row onward; once that tail
+# covers more than this fraction of the file a plain full rewrite is used instead.
+FULL_REWRITE_FRACTION = 0.5
+
+
+def _byte_len(lines: Iterable[str]) -> int:
+    return sum(len(line.encode("utf-8")) + 1 for line in lines)
+
+
+def _line_offsets(start: int, row_lines: Iterable[str]) -> Tuple[int, ...]:
+    """Byte offset of every row line from ``start`` on, plus one for the end of the last row."""
+    return tuple(accumulate((len(line.encode("utf-8")) + 1 for line in row_lines), initial=start))
+
+
+def _rank(priority: str) -> int:
+    return PRIORITY_ORDER.get(priority, 99)
+
+
+def _build_index(
+    keys: Iterable[Tuple[str, str, str]],
+) -> Tuple[dict[str, int], dict[str, Tuple[int, ...]], Tuple[Tuple[int, int], ...]]:
+    """Index (id, status, priority) triples by table position.
+
+    Returns the first position of every id, the positions in each status and
+    the PENDING rows as (priority rank, position) pairs in pick order.
+    """
+    ids: dict[str, int] = {}
+    by_status: dict[str, List[int]] = {}
+    pending: List[Tuple[int, int]] = []
+    for pos, (row_id, status, priority) in enumerate(keys):
+        ids.setdefault(row_id, pos)
+        by_status.setdefault(status, []).append(pos)
+        if status == "PENDING":
+            pending.append((_rank(priority), pos))
+    pending.sort()
+    return ids, {status: tuple(positions) for status, positions in by_status.items()}, tuple(pending)
+
+
 class QueueFile:
-    def __init__(self, path: Path):
+    """Parsed QUEUE.md table.
+
+    With ``lock=True`` an exclusive ``fcntl`` lock on ``<queue>.lock`` is taken
+    before reading and held until ``close()`` (or the end of a ``with`` block),
+    so read-modify-write cycles from different processes never interleave.
+    Read-only instances hold a shared lock just while loading, so they never
+    see a save half-applied, and a journal left by a crashed save is replayed
+    before anything is read.
+
+    Loading is O(1) in the row count on a parse-cache hit: rows are built from
+    the shared parse on first access, and lookups start from indexes computed
+    at parse time (positions by id and by status, plus the PENDING rows in
+    (priority, table position) order). Change rows through ``update`` and grow
+    the table through ``add_row`` so lookups follow; plain attribute writes are
+    still saved but not re-indexed. ``rows`` builds every row; a ``rows`` list
+    that was replaced or appended to is re-indexed wholesale.
+    """
+
+    def __init__(self, path: Path, lock: bool = False):
         self.path = path
-        self.lines = self.path.read_text(encoding="utf-8").splitlines()
-        self.table_start, self.table_end = self._find_table_bounds()
-        self.rows = self._parse_rows()
+        self.lock_wait_ms = 0.0
+        self._lock_file = None
+        self._acquire_lock(exclusive=lock)
+        try:
+            if journal_path(self.path).exists():
+                self._acquire_lock(exclusive=True)
+                replay_journal(self.path)
+            parsed = PARSE_CACHE.load(self.path, self._parse)
+        finally:
+            if not lock:
+                self.close()
+        self._parsed = parsed
+        self.table_start = len(parsed.head) - 2
+        # What is on disk: rows equal parsed.cells except where _saved_cells says
+        # otherwise. Incremental saves patch bytes at _offsets, so they are only
+        # safe when the file is exactly what a full save would produce.
+        self._saved_cells: dict[int, Tuple[str, ...]] = {}
+        self._saved_count = len(parsed.cells)
+        self._offsets: Sequence[int] = parsed.offsets
+        self._canonical = parsed.canonical
+        self._loaded_stat = parsed.stat_key
+        self.last_save_mode = ""
+        # Until ``rows`` is first read, rows live in _built (parsed positions
+        # materialized so far) and _added; afterwards _rows holds all of them.
+        self._rows: List[QueueRow] | None = None
+        self._built: dict[int, QueueRow] = {}
+        self._added: List[QueueRow] = []
+        self._positions: dict[int, int] = {}  # id(row) -> table position
+        self._indexed_len = 0
+        self._reset_index(parsed.ids, parsed.by_status, parsed.pending)
+
+    def _parse(self, text: str, stat_key: StatKey) -> ParsedQueue:
+        lines = text.splitlines()
+        start, end = self._find_table_bounds(lines)
+        cells = tuple(self._parse_cells(lines[start + 2 : end]))
+        ids, by_status, pending = _build_index(c[:3] for c in cells)
+        return ParsedQueue(
+            stat_key=stat_key,
+            head=tuple(lines[: start + 2]),
+            tail=tuple(lines[end:]),
+            cells=cells,
+            offsets=_line_offsets(_byte_len(lines[: start + 2]), lines[start + 2 : end]),
+            canonical=text == "\n".join(lines) + "\n",
+            ids=ids,
+            by_status=by_status,
+            pending=pending,
+        )
+
+    def _acquire_lock(self, exclusive: bool = True) -> None:
+        """Take (or upgrade to) the queue lock; shared locks are skipped where it can't be created."""
+        lock_path = self.path.with_name(self.path.name + ".lock")
+        if self._lock_file is None:
+            try:
+                self._lock_file = lock_path.open("a")
+            except OSError:
+                if exclusive:
+                    raise
+                return
+        if fcntl is None:
+            return
+        started = time.perf_counter()
+        deadline = started + config.QUEUE_MD_LOCK_TIMEOUT_SECONDS
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        while True:
+            try:
+                fcntl.flock(self._lock_file.fileno(), mode | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.perf_counter() >= deadline:
+                    self.close()
+                    raise TimeoutError(f"Timed out waiting for queue lock: {lock_path}") from None
+                time.sleep(LOCK_POLL_SECONDS)
+        self.lock_wait_ms = round(self.lock_wait_ms + (time.perf_counter() - started) * 1000, 3)
+
+    def close(self) -> None:
+        if self._lock_file is not None:
+            self._lock_file.close()  # closing the descriptor releases the flock
+            self._lock_file = None
+
+    def __enter__(self) -> QueueFile:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
 
-    def _find_table_bounds(self) -> Tuple[int, int]:
+    @staticmethod
+    def _find_table_bounds(lines: List[str]) -> Tuple[int, int]:
         start = None
-        for i, line in enumerate(self.lines):
+        for i, line in enumerate(lines):
             if line.strip().startswith("| id | status | priority | task |"):
                 start = i
                 break
         if start is None:
             raise ValueError("Queue table header not found")
 
-        end = len(self.lines)
-        for i in range(start + 2, len(self.lines)):
-            if not self.lines[i].strip().startswith("|"):
+        end = len(lines)
+        for i in range(start + 2, len(lines)):
+            if not lines[i].strip().startswith("|"):
                 end = i
                 break
         return start, end
 
     @staticmethod
     def _split_row(line: str) -> List[str]:
-        cells = [c.strip() for c in line.strip().strip("|").split("|")]
+        cells = list(map(str.strip, line.strip().strip("|").split("|")))
         if len(cells) != 9:
             raise ValueError(f"Expected 9 cells in row, got {len(cells)}: {line}")
         return cells
 
-    def _parse_rows(self) -> List[QueueRow]:
-        rows: List[QueueRow] = []
-        for line in self.lines[self.table_start + 2 : self.table_end]:
-            if not line.strip() or not line.strip().startswith("|"):
-                continue
-            cells = self._split_row(line)
-            rows.append(QueueRow(*cells))
+    def _parse_cells(self, row_lines: List[str]) -> List[Tuple[str, ...]]:
+        rows: List[Tuple[str, ...]] = []
+        split_row, intern = self._split_row, sys.intern
+        for line in row_lines:
+            cells = split_row(line)
+            for i in _INTERNED_COLUMNS:
+                cells[i] = intern(cells[i])
+            rows.append(tuple(cells))
         return rows
 
+    @property
+    def lines(self) -> List[str]:
+        """The file as a full save would write it."""
+        return [*self._parsed.head, *(self._row_to_line(row) for row in self.rows), *self._parsed.tail]
+
     def save(self) -> None:
-        header = self.lines[self.table_start]
-        separator = self.lines[self.table_start + 1]
-        row_lines = [self._row_to_line(row) for row in self.rows]
-        rebuilt = self.lines[: self.table_start] + [header, separator] + row_lines + self.lines[self.table_end :]
-        self.path.write_text("\n".join(rebuilt) + "\n", encoding="utf-8")
+        """Write changed rows back, touching as few bytes as possible.
+
+        ``last_save_mode`` records the path taken: ``noop`` (nothing changed),
+        ``patch`` (changed rows kept their byte length and are overwritten in
+        place), ``splice`` (appended rows or a length change: the file is
+        rewritten from the first such row on) or ``full`` (temp file + rename).
+        Patches and splices go through the ``write_patches`` journal. A full
+        rewrite is used when the file changed on disk since it was loaded, is
+        not in canonical form, lost rows, or when a splice would rewrite more
+        than ``FULL_REWRITE_FRACTION`` of it.
+        """
+        self._sync()
+        changed = self._changed_rows()
+        count = self._row_count()
+        if not changed and count == self._saved_count:
+            self.last_save_mode = "noop"
+            return
+        mode = None
+        if self._canonical and count >= self._saved_count and _stat_key(self.path) == self._loaded_stat:
+            mode = self._save_incremental(changed, count)
+        if mode is None:
+            self._save_full()
+            mode = "full"
+        self.last_save_mode = mode
+
+    def _row_count(self) -> int:
+        if self._rows is not None:
+            return len(self._rows)
+        return len(self._parsed.cells) + len(self._added)
+
+    def _changed_rows(self) -> dict[int, QueueRow]:
+        """Materialized rows whose cells differ from what is on disk (rows never built can't have changed)."""
+        if self._rows is not None:
+            candidates: Iterable[Tuple[int, QueueRow]] = enumerate(self._rows)
+        else:
+            candidates = [*self._built.items(), *enumerate(self._added, len(self._parsed.cells))]
+        saved, parsed_cells, saved_count = self._saved_cells, self._parsed.cells, self._saved_count
+        changed: dict[int, QueueRow] = {}
+        for pos, row in candidates:
+            if pos >= saved_count or tuple(row.to_cells()) != (saved[pos] if pos in saved else parsed_cells[pos]):
+                changed[pos] = row
+        return changed
+
+    def _save_incremental(self, changed: dict[int, QueueRow], count: int) -> str | None:
+        offsets, saved_count, size = self._offsets, self._saved_count, self._loaded_stat[2]
+        patches: List[Patch] = []
+        shift_from = None
+        for pos in sorted(changed):
+            data = f"{self._row_to_line(changed[pos])}\n".encode()
+            if pos >= saved_count or len(data) != offsets[pos + 1] - offsets[pos]:
+                shift_from = pos
+                break
+            patches.append((offsets[pos], data))
+
+        mode = "patch"
+        if shift_from is not None:
+            row_lines = [self._row_to_line(self._row_at(pos)) for pos in range(shift_from, count)]
+            start = offsets[shift_from]
+            data = "".join(f"{line}\n" for line in [*row_lines, *self._parsed.tail]).encode("utf-8")
+            if len(data) > size * FULL_REWRITE_FRACTION:
+                return None
+            patches.append((start, data))
+            size = start + len(data)
+            self._offsets = (*offsets[:shift_from], *_line_offsets(start, row_lines))
+            mode = "splice"
+
+        write_patches(self.path, patches, size)
+        for pos, row in changed.items():
+            self._saved_cells[pos] = tuple(row.to_cells())
+        self._saved_count = count
+        self._loaded_stat = _stat_key(self.path)
+        return mode
+
+    def _save_full(self) -> None:
+        rows = self.rows
+        row_lines = [self._row_to_line(row) for row in rows]
+        head, tail = self._parsed.head, self._parsed.tail
+        atomic_write_text(self.path, "\n".join([*head, *row_lines, *tail]) + "\n")
+        # The saved rows become the new baseline; the parse-time indexes are not
+        # read again since ``rows`` is materialized by now.
+        self._parsed = self._parsed._replace(cells=tuple(tuple(row.to_cells()) for row in rows))
+        self._saved_cells = {}
+        self._saved_count = len(rows)
+        self._offsets = _line_offsets(_byte_len(head), row_lines)
+        self._canonical = True
+        self._loaded_stat = _stat_key(self.path)
 
     @staticmethod
     def _sanitize_cell(value: str) -> str:
@@ -99,38 +617,160 @@ class QueueFile:
         cells = [self._sanitize_cell(c) for c in row.to_cells()]
         return "| " + " | ".join(cells) + " |"
 
-    def find_by_id(self, row_id: str) -> QueueRow:
-        for row in self.rows:
-            if row.id == row_id:
-                return row
-        raise ValueError(f"Row id not found: {row_id}")
-
-
-def now_kst_str() -> str:
-    return datetime.now(KST).strftime("%Y-%m-%d %H:%M")
-
-
-def now_kst_iso() -> str:
-    return datetime.now(KST).isoformat(timespec="seconds")
+    @property
+    def rows(self) -> List[QueueRow]:
+        """Every row in table order (builds the ones not materialized yet)."""
+        if self._rows is None:
+            built, from_cells = self._built, QueueRow._from_cells
+            rows = [built.get(pos) or from_cells(cells) for pos, cells in enumerate(self._parsed.cells)]
+            rows.extend(self._added)
+            self._positions = {id(row): pos for pos, row in enumerate(rows)}
+            self._rows, self._indexed_len = rows, len(rows)
+            self._built, self._added = {}, []
+        return self._rows
+
+    @rows.setter
+    def rows(self, rows: List[QueueRow]) -> None:
+        self._rows = rows
+        self._reindex()
+
+    def _reset_index(
+        self, ids: dict[str, int], by_status: dict[str, Tuple[int, ...]], pending: Tuple[Tuple[int, int], ...]
+    ) -> None:
+        # The base indexes may be the parse cache's; changes since go to the overlays below.
+        self._ids, self._by_status, self._pending = ids, by_status, pending
+        self._added_ids: dict[str, int] = {}
+        self._pending_cursor = 0
+        self._pending_heap: List[Tuple[int, int]] = []
+        self._touched: set[int] = set()
+
+    def _reindex(self) -> None:
+        rows = self.rows
+        self._positions = {id(row): pos for pos, row in enumerate(rows)}
+        self._reset_index(*_build_index((r.id, r.status, r.priority) for r in rows))
+        self._indexed_len = len(rows)
+
+    def _sync(self) -> None:
+        if self._rows is not None and len(self._rows) != self._indexed_len:
+            self._reindex()
+
+    def _row_at(self, pos: int) -> QueueRow:
+        if self._rows is not None:
+            return self._rows[pos]
+        parsed_count = len(self._parsed.cells)
+        if pos >= parsed_count:
+            return self._added[pos - parsed_count]
+        row = self._built.get(pos)
+        if row is None:
+            row = self._built[pos] = QueueRow._from_cells(self._parsed.cells[pos])
+            self._positions[id(row)] = pos
+        return row
+
+    def _peek(self, pos: int) -> Tuple[str, str]:
+        """(status, priority) at ``pos`` without materializing the row."""
+        if self._rows is None and pos < len(self._parsed.cells) and pos not in self._built:
+            cells = self._parsed.cells[pos]
+            return cells[1], cells[2]
+        row = self._row_at(pos)
+        return row.status, row.priority
+
+    def _track(self, row: QueueRow, pos: int) -> None:
+        self._touched.add(pos)
+        if row.status == "PENDING":
+            heapq.heappush(self._pending_heap, (_rank(row.priority), pos))
+
+    def _is_pending(self, rank: int, pos: int) -> bool:
+        status, priority = self._peek(pos)
+        return status == "PENDING" and _rank(priority) == rank
+
+    def add_row(self, row: QueueRow) -> None:
+        self._sync()
+        if self._rows is not None:
+            pos = len(self._rows)
+            self._rows.append(row)
+            self._indexed_len += 1
+        else:
+            pos = len(self._parsed.cells) + len(self._added)
+            self._added.append(row)
+        self._positions[id(row)] = pos
+        self._added_ids.setdefault(row.id, pos)
+        self._track(row, pos)
+
+    def update(self, row: QueueRow, **fields: str) -> None:
+        """Set ``fields`` on ``row``, a row of this file, and keep the indexes in step."""
+        self._sync()
+        pos = self._positions.get(id(row))
+        if pos is None or self._row_at(pos) is not row:
+            raise ValueError(f"Row is not part of this queue file: {row.id}")
+        for name, value in fields.items():
+            if name not in QueueRow.FIELDS:
+                raise AttributeError(f"QueueRow has no field {name!r}")
+            setattr(row, name, _intern(value) if name in _INTERNED_FIELDS else value)
+        if "id" in fields:
+            self._reindex()  # renames are rare; rebuild from the full row list
+        else:
+            self._track(row, pos)
+
+    def get(self, row_id: str) -> QueueRow | None:
+        self._sync()
+        pos = self._ids.get(row_id)
+        if pos is None:
+            pos = self._added_ids.get(row_id)
+        return None if pos is None else self._row_at(pos)
 
+    def find_by_id(self, row_id: str) -> QueueRow:
+        row = self.get(row_id)
+        if row is None:
+            raise ValueError(f"Row id not found: {row_id}")
+        return row
+
+    def rows_with_status(self, status: str, priority: str | None = None) -> List[QueueRow]:
+        """Rows in ``status`` (optionally also ``priority``), in table order."""
+        self._sync()
+        positions: Iterable[int] = self._by_status.get(status, ())
+        if self._touched:
+            positions = sorted(self._touched.union(positions))
+        rows = []
+        for pos in positions:
+            row_status, row_priority = self._peek(pos)
+            if row_status == status and (priority is None or row_priority == priority):
+                rows.append(self._row_at(pos))
+        return rows
 
-def emit_log(log_path: Path, payload: dict) -> None:
-    log_path.parent.mkdir(parents=True, exist_ok=True)
+    def next_pending(self) -> QueueRow | None:
+        """Highest-priority PENDING row (table order breaks ties) without changing it."""
+        self._sync()
+        pending, heap = self._pending, self._pending_heap
+        while self._pending_cursor < len(pending) and not self._is_pending(*pending[self._pending_cursor]):
+            self._pending_cursor += 1
+        while heap and not self._is_pending(*heap[0]):
+            heapq.heappop(heap)
+        candidates = list(pending[self._pending_cursor : self._pending_cursor + 1]) + heap[:1]
+        return self._row_at(min(candidates)[1]) if candidates else None
+
+
+def emit_log(log_path: Path, payload: dict, flush: bool = False) -> None:
+    """Buffer one run-log event; ``flush=True`` writes it (and anything buffered) out now."""
+    now = get_clock().time()
     event = {
-        "ts_kst": now_kst_iso(),
-        "ts_epoch_ms": int(time.time() * 1000),
+        "ts_kst": format_kst_iso(now),
+        "ts_epoch_ms": int(now * 1000),
         **payload,
     }
-    with log_path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(event, ensure_ascii=False, sort_keys=True) + "\n")
+    run_log.get_writer(log_path).append(event, flush=flush)
+
+
+def emit_lock_wait(log_path: Path | None, command: str, qf: QueueFile) -> None:
+    """Log the queue-lock wait of a markdown mutation made outside ``main`` (dispatcher, ops, watchdog)."""
+    if log_path is not None:
+        emit_log(log_path, {"event": "queue_lock", "command": command, "lock_wait_ms": qf.lock_wait_ms}, flush=True)
 
 
 def cmd_list(qf: QueueFile, args: argparse.Namespace) -> int:
-    rows = qf.rows
     if args.status:
-        rows = [r for r in rows if r.status == args.status]
-    if args.priority:
-        rows = [r for r in rows if r.priority == args.priority]
+        rows = qf.rows_with_status(args.status, args.priority)
+    else:
+        rows = [r for r in qf.rows if not args.priority or r.priority == args.priority]
 
     for row in rows:
         print(f"{row.id}\t{row.status}\t{row.priority}\t{row.task}")
@@ -144,10 +784,10 @@ def _ensure_md_writable() -> None:
 
 def cmd_add(qf: QueueFile, args: argparse.Namespace) -> int:
     _ensure_md_writable()
-    if any(r.id == args.id for r in qf.rows):
+    if qf.get(args.id) is not None:
         raise ValueError(f"Row id already exists: {args.id}")
 
-    qf.rows.append(
+    qf.add_row(
         QueueRow(
             id=args.id,
             status="PENDING",
@@ -166,25 +806,17 @@ def cmd_add(qf: QueueFile, args: argparse.Namespace) -> int:
     return 0
 
 
-def _pick_candidate(rows: List[QueueRow]) -> QueueRow | None:
-    pending = [r for r in rows if r.status == "PENDING"]
-    if not pending:
-        return None
-    pending.sort(key=lambda r: PRIORITY_ORDER.get(r.priority, 99))
-    return pending[0]
-
-
 def cmd_pick(qf: QueueFile, args: argparse.Namespace) -> int:
     _ensure_md_writable()
-    row = _pick_candidate(qf.rows)
+    row = qf.next_pending()
     if row is None:
         print("No pending tasks")
         return 0
 
-    row.status = "IN_PROGRESS"
-    row.started_at_kst = now_kst_str()
+    fields = {"status": "IN_PROGRESS", "started_at_kst": now_kst_str()}
     if args.owner_session:
-        row.owner_session = args.owner_session
+        fields["owner_session"] = args.owner_session
+    qf.update(row, **fields)
     qf.save()
     args._item_id = row.id
     print(row.id)
@@ -194,8 +826,7 @@ def cmd_pick(qf: QueueFile, args: argparse.Namespace) -> int:
 def _update_terminal_status(qf: QueueFile, row_id: str, status: str, notes: str) -> int:
     _ensure_md_writable()
     row = qf.find_by_id(row_id)
-    row.status = status
-    row.notes = notes.strip()
+    qf.update(row, status=status, notes=notes.strip())
     qf.save()
     print(f"{row_id} -> {status}")
     return 0
@@ -211,6 +842,9 @@ def cmd_fail(qf: QueueFile, args: argparse.Namespace) -> int:
     return _update_terminal_status(qf, args.id, "FAILED", args.notes)
 
 
+MUTATING_COMMANDS = {"add", "pick", "done", "fail"}
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Orchestrator queue CLI")
     parser.add_argument("--queue", default="automation/orchestrator/QUEUE.md", help="Queue markdown file path")
@@ -261,8 +895,8 @@ def main(argv: List[str] | None = None) -> int:
     emit_log(log_path, {"event": "run_start", "trace_id": trace_id, "command": command})
 
     try:
-        qf = QueueFile(Path(args.queue))
-        code = args.func(qf, args)
+        with QueueFile(Path(args.queue), lock=command in MUTATING_COMMANDS) as qf:
+            code = args.func(qf, args)
         duration_ms = int((time.perf_counter() - started) * 1000)
         emit_log(
             log_path,
@@ -274,7 +908,9 @@ def main(argv: List[str] | None = None) -> int:
                 "status": "ok",
                 "item_id": getattr(args, "_item_id", None),
                 "duration_ms": duration_ms,
+                "lock_wait_ms": qf.lock_wait_ms,
             },
+            flush=True,
         )
         return code
     except Exception as exc:  # noqa: BLE001
@@ -291,6 +927,7 @@ def main(argv: List[str] | None = None) -> int:
                 "duration_ms": duration_ms,
                 "error": str(exc),
             },
+            flush=True,
         )
         print(f"ERROR: {exc}")
         return 1
@@ -29,9 +29,9 @@ def _row_from_db(item: dict) -> QueueRow:
 
 def render(db_path: Path, queue_path: Path) -> int:
     rows = db_store.list_items(db_path)
-    qf = QueueFile(queue_path)
-    qf.rows = [_row_from_db(r) for r in rows]
-    qf.save()
+    with QueueFile(queue_path, lock=True) as qf:
+        qf.rows = [_row_from_db(r) for r in rows]
+        qf.save()
     return len(rows)
 
 
@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import argparse
-import sqlite3
 from pathlib import Path
 
 from automation.orchestrator import db_store
-from automation.orchestrator.orch import QueueFile, now_kst_str
+from automation.orchestrator.orch import QueueFile
 from automation.orchestrator.reviewer_gate import BLOCK, PASS, RETRY, evaluate_result
 from automation.orchestrator.ui_validate import validate_ui
 
@@ -80,44 +79,41 @@ def _apply_ui_gate(
 
 
 def route_markdown(queue_path: Path, item_id: str, verdict: dict, max_retries: int) -> str:
-    qf = QueueFile(queue_path)
-    row = qf.find_by_id(item_id)
-    attempts = _extract_attempts(row.notes)
-
-    if verdict["verdict"] == PASS:
-        row.status = "DONE"
-        row.notes = _append_note(row.notes, f"review:PASS {';'.join(verdict['reasons'])}")
-    elif verdict["verdict"] == RETRY:
-        attempts += 1
-        row.status = "PENDING"
-        row.owner_session = "-"
-        row.started_at_kst = "-"
-        row.notes = _set_attempts_note(row.notes, attempts)
-        row.notes = _append_note(
-            row.notes,
-            f"review:RETRY attempt={attempts}/{max_retries} missing={','.join(verdict['missing_checks'])}",
-        )
-    else:
-        row.status = "BLOCKED"
-        row.notes = _append_note(row.notes, f"review:BLOCK {';'.join(verdict['reasons'])}")
+    with QueueFile(queue_path, lock=True) as qf:
+        row = qf.find_by_id(item_id)
+        attempts = _extract_attempts(row.notes)
+
+        if verdict["verdict"] == PASS:
+            notes = _append_note(row.notes, f"review:PASS {';'.join(verdict['reasons'])}")
+            qf.update(row, status="DONE", notes=notes)
+        elif verdict["verdict"] == RETRY:
+            attempts += 1
+            notes = _append_note(
+                _set_attempts_note(row.notes, attempts),
+                f"review:RETRY attempt={attempts}/{max_retries} missing={','.join(verdict['missing_checks'])}",
+            )
+            qf.update(row, status="PENDING", owner_session="-", started_at_kst="-", notes=notes)
+        else:
+            notes = _append_note(row.notes, f"review:BLOCK {';'.join(verdict['reasons'])}")
+            qf.update(row, status="BLOCKED", notes=notes)
 
-    qf.save()
+        qf.save()
     return row.status
 
 
 def _db_row(path: Path, item_id: str) -> dict:
-    items = [x for x in db_store.list_items(path) if x["id"] == item_id]
-    if not items:
+    row = db_store.get_item(path, item_id)
+    if row is None:
         raise ValueError(f"Row id not found: {item_id}")
-    return items[0]
+    return row
 
 
 def route_sqlite(db_path: Path, item_id: str, verdict: dict, max_retries: int) -> str:
     row = _db_row(db_path, item_id)
     if verdict["verdict"] == PASS:
         notes = _append_note(row.get("notes", ""), f"review:PASS {';'.join(verdict['reasons'])}")
-        db_store.mark_done(db_path, item_id, notes)
-        db_store.append_event(db_path, item_id, "review_gate", {"verdict": PASS, "reasons": verdict["reasons"]})
+        review_event = ("review_gate", {"verdict": PASS, "reasons": verdict["reasons"]})
+        db_store.mark_done(db_path, item_id, notes, events=[review_event])
         return "DONE"
 
     if verdict["verdict"] == RETRY:
@@ -127,34 +123,24 @@ def route_sqlite(db_path: Path, item_id: str, verdict: dict, max_retries: int) -
             row.get("notes", ""),
             f"review:RETRY attempt={attempts}/{max_retries} missing={','.join(missing)}",
         )
-        with sqlite3.connect(db_path) as conn:
-            conn.execute(
-                """
-                UPDATE queue_items
-                SET status='PENDING',
-                    owner_session='-',
-                    started_at_kst='-',
-                    lease_owner=NULL,
-                    lease_expires_at=NULL,
-                    attempt_count=?,
-                    notes=?,
-                    updated_at=?
-                WHERE id=?
-                """,
-                (attempts, notes, now_kst_str(), item_id),
-            )
-        db_store.append_event(
+        db_store.requeue_item(
             db_path,
             item_id,
-            "review_gate",
-            {"verdict": RETRY, "attempt": attempts, "max_retries": max_retries, "missing_checks": missing},
+            notes=notes,
+            attempt_count=attempts,
+            events=[
+                (
+                    "review_gate",
+                    {"verdict": RETRY, "attempt": attempts, "max_retries": max_retries, "missing_checks": missing},
+                )
+            ],
         )
         return "PENDING"
 
     reason = ";".join(verdict["reasons"]) or "review_gate_blocked"
     notes = _append_note(row.get("notes", ""), f"review:BLOCK {reason}")
-    db_store.mark_blocked(db_path, item_id, notes)
-    db_store.append_event(db_path, item_id, "review_gate", {"verdict": BLOCK, "reasons": verdict["reasons"]})
+    review_event = ("review_gate", {"verdict": BLOCK, "reasons": verdict["reasons"]})
+    db_store.mark_blocked(db_path, item_id, notes, events=[review_event])
     return "BLOCKED"
 
 
@@ -0,0 +1,243 @@
+"""Buffered, rotating JSONL run log.
+
+Layout next to the active log ``<dir>/orch_runs.jsonl``:
+
+- ``orch_runs.YYYYMMDD[.N].jsonl[.gz]``: closed segments, named after the KST
+  day of their first event (``.N`` when size rotation happens more than once a day)
+- ``orch_runs.index.jsonl``: one line per closed segment with its time range,
+  so readers can open only the segments that overlap a requested window
+
+Writers buffer events in memory and append them in one write on ``flush()``
+(and at interpreter exit). Rotation happens at flush time when the active file
+exceeds ``max_bytes`` or its first event is from an earlier KST day.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import shutil
+import threading
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from automation.orchestrator import config
+from automation.orchestrator.clock import KST, now_kst
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts rotate without the advisory lock
+    fcntl = None
+
+
+def index_path(log_path: Path) -> Path:
+    return log_path.with_name(f"{log_path.stem}.index.jsonl")
+
+
+def _day(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, KST).strftime("%Y%m%d")
+
+
+def _event_ts(line: bytes | str) -> int | None:
+    try:
+        ts = json.loads(line).get("ts_epoch_ms")
+    except (ValueError, AttributeError):
+        return None
+    return ts if isinstance(ts, int) else None
+
+
+def _first_and_last_ts(path: Path) -> tuple[int | None, int | None]:
+    with path.open("rb") as f:
+        first = _event_ts(f.readline())
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - 64 * 1024))
+        tail = f.read().splitlines()
+    last = next((ts for ts in (_event_ts(line) for line in reversed(tail) if line.strip()) if ts is not None), None)
+    return first, last
+
+
+class RunLogWriter:
+    """Buffered appender for one log path; see the module docstring for rotation."""
+
+    def __init__(
+        self,
+        log_path: Path,
+        *,
+        max_bytes: int = config.LOG_ROTATE_MAX_BYTES,
+        rotate_daily: bool = config.LOG_ROTATE_DAILY,
+        compress: bool = config.LOG_ROTATE_GZIP,
+        buffer_events: int = config.LOG_BUFFER_EVENTS,
+    ):
+        self.log_path = Path(log_path)
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.compress = compress
+        self.buffer_events = buffer_events
+        self._buffer: list[str] = []
+        self._lock = threading.Lock()
+        self._dir_ready = False
+        self._active_day: tuple[int, str | None] | None = None  # (inode, day of first event)
+
+    def append(self, event: dict[str, Any], flush: bool = False) -> None:
+        line = json.dumps(event, ensure_ascii=False, sort_keys=True) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            if not (flush or len(self._buffer) >= self.buffer_events):
+                return
+            self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        if not self._dir_ready:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._dir_ready = True
+        data = "".join(self._buffer).encode("utf-8")
+        first_ts = _event_ts(self._buffer[0])
+        with self.log_path.with_name(self.log_path.name + ".lock").open("a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            self._maybe_rotate(first_ts)
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        self._buffer.clear()
+
+    def _maybe_rotate(self, incoming_ts: int | None) -> None:
+        try:
+            st = self.log_path.stat()
+        except FileNotFoundError:
+            return
+        if st.st_size == 0:
+            return
+        rotate = self.max_bytes > 0 and st.st_size >= self.max_bytes
+        if not rotate and self.rotate_daily and incoming_ts is not None:
+            if self._active_day is None or self._active_day[0] != st.st_ino:
+                first, _ = _first_and_last_ts(self.log_path)
+                self._active_day = (st.st_ino, _day(first) if first is not None else None)
+            active_day = self._active_day[1]
+            rotate = active_day is not None and active_day != _day(incoming_ts)
+        if rotate:
+            self.rotate()
+
+    def rotate(self) -> Path | None:
+        """Close the active file into a dated segment and record it in the index."""
+        if not self.log_path.exists() or self.log_path.stat().st_size == 0:
+            return None
+        first, last = _first_and_last_ts(self.log_path)
+        day = _day(first) if first is not None else now_kst().strftime("%Y%m%d")
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        stem = self.log_path.stem
+        target = self.log_path.with_name(f"{stem}.{day}{suffix}")
+        n = 0
+        while target.exists():
+            n += 1
+            target = self.log_path.with_name(f"{stem}.{day}.{n}{suffix}")
+
+        if self.compress:
+            staged = self.log_path.with_name(f".{target.name}.tmp")
+            with self.log_path.open("rb") as src, gzip.open(staged, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(staged, target)
+            self.log_path.unlink()
+        else:
+            os.replace(self.log_path, target)
+        self._active_day = None
+
+        entry = {"segment": target.name, "start_ms": first, "end_ms": last, "bytes": target.stat().st_size}
+        with index_path(self.log_path).open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, sort_keys=True) + "\n")
+        return target
+
+
+_WRITERS: dict[Path, RunLogWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def get_writer(log_path: Path) -> RunLogWriter:
+    key = Path(log_path)
+    with _WRITERS_LOCK:
+        writer = _WRITERS.get(key)
+        if writer is None:
+            writer = _WRITERS[key] = RunLogWriter(key)
+        return writer
+
+
+@atexit.register
+def flush_all() -> None:
+    with _WRITERS_LOCK:
+        writers = list(_WRITERS.values())
+    for writer in writers:
+        writer.flush()
+
+
+def read_index(log_path: Path) -> list[dict[str, Any]]:
+    path = index_path(Path(log_path))
+    if not path.exists():
+        return []
+    entries = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return entries
+
+
+def segments(log_path: Path, start_ms: int | None = None, end_ms: int | None = None) -> list[Path]:
+    """Closed segments overlapping [start_ms, end_ms] (oldest first), then the active file."""
+    log_path = Path(log_path)
+    picked: list[Path] = []
+    for entry in read_index(log_path):
+        seg_start, seg_end = entry.get("start_ms"), entry.get("end_ms")
+        if start_ms is not None and seg_end is not None and seg_end < start_ms:
+            continue
+        if end_ms is not None and seg_start is not None and seg_start > end_ms:
+            continue
+        seg = log_path.with_name(entry["segment"])
+        if seg.exists():
+            picked.append(seg)
+    if log_path.exists():
+        picked.append(log_path)
+    return picked
+
+
+def open_segment(path: Path, binary: bool = False):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb") if binary else gzip.open(path, "rt", encoding="utf-8")
+    return path.open("rb") if binary else path.open("r", encoding="utf-8")
+
+
+def iter_events(log_path: Path, start_ms: int | None = None, end_ms: int | None = None) -> Iterator[dict[str, Any]]:
+    """Stream parsed events from every segment in the window, skipping malformed lines.
+
+    With a window, events lacking ``ts_epoch_ms`` are skipped; without one every event is yielded.
+    """
+    windowed = start_ms is not None or end_ms is not None
+    for seg in segments(log_path, start_ms, end_ms):
+        with open_segment(seg) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if windowed:
+                    ts = event.get("ts_epoch_ms")
+                    if not isinstance(ts, int):
+                        continue
+                    if (start_ms is not None and ts < start_ms) or (end_ms is not None and ts > end_ms):
+                        continue
+                yield event
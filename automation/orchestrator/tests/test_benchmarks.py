@@ -0,0 +1,29 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from automation.orchestrator.benchmarks import claim_contention
+
+
+class ClaimContentionBenchmarkTests(unittest.TestCase):
+    def test_small_run_drains_queue_without_double_claims(self):
+        with tempfile.TemporaryDirectory() as td:
+            report = claim_contention.run(Path(td) / "bench.db", rows=300, workers=2, busy_timeout_ms=5000)
+        self.assertEqual(report["claims"], 300)
+        self.assertEqual(sum(report["per_worker_claims"]), 300)
+        self.assertEqual(report["double_claims"], 0)
+        self.assertEqual(report["lease_failures"], 0)
+        self.assertEqual(report["remaining"], {})
+        self.assertIsNotNone(report["claim_latency_us"]["p99"])
+
+    def test_compare_reports_ratios(self):
+        new = {"claims_per_sec": 200.0, "claim_latency_us": {"p50": 50, "p99": 400}}
+        old = {"claims_per_sec": 100.0, "claim_latency_us": {"p50": 100, "p99": 400}}
+        self.assertEqual(
+            claim_contention.compare(new, old),
+            {"claims_per_sec": 2.0, "claim_latency_p50": 0.5, "claim_latency_p99": 1.0},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
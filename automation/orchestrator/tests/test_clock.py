@@ -0,0 +1,58 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from automation.orchestrator import clock, db_store, orch
+from automation.orchestrator.dispatcher import DispatchDaemon
+from automation.orchestrator.watchdog import RetryScheduler
+
+START = 1767225600  # 2026-01-01 09:00 KST
+
+
+class ClockTests(unittest.TestCase):
+    def test_system_clock_tracks_wall_time_and_resyncs(self):
+        c = clock.SystemClock()
+        self.assertAlmostEqual(c.time(), time.time(), delta=0.5)
+        c._anchor -= clock.RESYNC_SECONDS
+        c._offset += 3600  # stale offset is replaced on the next read after the resync interval
+        self.assertAlmostEqual(c.time(), time.time(), delta=0.5)
+
+    def test_formatters_cache_per_minute_and_second(self):
+        self.assertEqual(clock.format_kst_minute(START + 59), "2026-01-01 09:00")
+        first = clock.format_kst_minute(START + 1)
+        self.assertIs(clock.format_kst_minute(START + 30), first)
+        self.assertEqual(clock.format_kst_minute(START + 60), "2026-01-01 09:01")
+        self.assertEqual(clock.format_kst_iso(START + 61.9), "2026-01-01T09:01:01+09:00")
+
+    def test_simulated_clock_drives_queue_and_run_log_timestamps(self):
+        with tempfile.TemporaryDirectory() as td, clock.use_clock(clock.SimulatedClock(START)):
+            db = Path(td) / "queue.db"
+            db_store.init_db(db)
+            db_store.add_item(db, id="ORCH-1", priority="P1", task="t", success_criteria="c")
+            self.assertEqual(db_store.get_item(db, "ORCH-1")["created_at"], "2026-01-01 09:00")
+
+            log = Path(td) / "runs.jsonl"
+            orch.emit_log(log, {"event": "run_end"}, flush=True)
+            event = log.read_text(encoding="utf-8")
+            self.assertIn('"ts_kst": "2026-01-01T09:00:00+09:00"', event)
+            self.assertIn(f'"ts_epoch_ms": {START * 1000}', event)
+
+    def test_serve_loops_run_on_simulated_time(self):
+        sim = clock.SimulatedClock(START)
+        with tempfile.TemporaryDirectory() as td, clock.use_clock(sim):
+            db = Path(td) / "queue.db"
+            db_store.init_db(db)
+            db_store.add_item(db, id="ORCH-1", priority="P1", task="t", success_criteria="c")
+            picked = []
+            with db_store.QueueStore(db) as store:
+                DispatchDaemon(store, "d", 1, poll_interval=5, emit=lambda o, i: picked.append(i)).serve(max_seconds=60)
+                db_store.acquire_lease(db, "ORCH-1", "d-1", lease_seconds=30)
+                RetryScheduler(store, emit=lambda ids: None).serve(5, max_seconds=120)
+            self.assertEqual(picked, ["ORCH-1"])
+            self.assertEqual(sim.time(), START + 180)
+            self.assertEqual(db_store.get_item(db, "ORCH-1")["status"], "PENDING")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,14 @@
+import gzip
+import json
 import sqlite3
 import tempfile
+import threading
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 from automation.orchestrator import db_store
+from automation.orchestrator.clock import SimulatedClock, use_clock
 
 
 class DbStoreTests(unittest.TestCase):
@@ -53,6 +58,17 @@ class DbStoreTests(unittest.TestCase):
         self.assertEqual([r["id"] for r in done], ["A"])
         self.assertEqual([r["id"] for r in p0], ["B"])
 
+    def test_get_item_and_get_items(self):
+        for i in range(3):
+            db_store.add_item(self.db_path, id=f"G{i}", priority="P1", task="t", success_criteria="s")
+        self.assertEqual(db_store.get_item(self.db_path, "G1")["status"], "PENDING")
+        self.assertIsNone(db_store.get_item(self.db_path, "NOPE"))
+
+        with patch.object(db_store, "_GET_ITEMS_CHUNK", 2):
+            rows = db_store.get_items(self.db_path, ["G2", "G0", "NOPE", "G2", "G1"])
+        self.assertEqual(set(rows), {"G0", "G1", "G2"})
+        self.assertEqual(rows["G2"]["id"], "G2")
+
     def test_pick_next_priority_order(self):
         db_store.add_item(self.db_path, id="A", priority="P2", task="a", success_criteria="a")
         db_store.add_item(self.db_path, id="B", priority="P0", task="b", success_criteria="b")
@@ -63,9 +79,53 @@ class DbStoreTests(unittest.TestCase):
         self.assertEqual(row_b["status"], "IN_PROGRESS")
         self.assertEqual(row_b["owner_session"], "sess-1")
 
+    def test_pick_next_returns_claimed_row(self):
+        db_store.add_item(self.db_path, id="A", priority="P1", task="a", success_criteria="a")
+        picked = db_store.pick_next(self.db_path, owner_session="sess-1")
+        self.assertEqual(picked["status"], "IN_PROGRESS")
+        self.assertEqual(picked["owner_session"], "sess-1")
+        self.assertNotEqual(picked["started_at_kst"], "-")
+        self.assertIsNone(db_store.pick_next(self.db_path, owner_session="sess-2"))
+
+    def test_pick_next_compare_and_set_fallback(self):
+        db_store.add_item(self.db_path, id="A", priority="P2", task="a", success_criteria="a")
+        db_store.add_item(self.db_path, id="B", priority="P0", task="b", success_criteria="b")
+        with patch.object(db_store, "_SUPPORTS_RETURNING", False):
+            first = db_store.pick_next(self.db_path, owner_session="sess-1")
+            second = db_store.pick_next(self.db_path, owner_session="sess-2")
+            third = db_store.pick_next(self.db_path, owner_session="sess-3")
+        self.assertEqual((first["id"], first["status"]), ("B", "IN_PROGRESS"))
+        self.assertEqual((second["id"], second["owner_session"]), ("A", "sess-2"))
+        self.assertIsNone(third)
+
     def test_pick_next_none_when_empty(self):
         self.assertIsNone(db_store.pick_next(self.db_path, owner_session="s"))
 
+    def test_pick_many_claims_in_priority_order(self):
+        db_store.add_item(self.db_path, id="A", priority="P2", task="a", success_criteria="a")
+        db_store.add_item(self.db_path, id="B", priority="P0", task="b", success_criteria="b")
+        db_store.add_item(self.db_path, id="C", priority="P1", task="c", success_criteria="c")
+        picked = db_store.pick_many(self.db_path, owner_session="pool-1", n=2)
+        self.assertEqual([r["id"] for r in picked], ["B", "C"])
+        self.assertTrue(all(r["status"] == "IN_PROGRESS" for r in picked))
+        self.assertEqual([r["id"] for r in self.rows(status="PENDING")], ["A"])
+        with sqlite3.connect(self.db_path) as conn:
+            events = conn.execute(
+                "SELECT item_id FROM queue_events WHERE event_type='picked' ORDER BY event_id"
+            ).fetchall()
+        self.assertEqual([e[0] for e in events], ["B", "C"])
+
+    def test_pick_many_skips_duplicates_and_fills_batch(self):
+        db_store.add_item(self.db_path, id="D1", priority="P1", task="a", success_criteria="a", idempotency_key="k")
+        db_store.mark_done(self.db_path, "D1", "done")
+        db_store.add_item(self.db_path, id="D2", priority="P0", task="dup", success_criteria="a", idempotency_key="k")
+        db_store.add_item(self.db_path, id="D3", priority="P1", task="b", success_criteria="b")
+        db_store.add_item(self.db_path, id="D4", priority="P2", task="c", success_criteria="c")
+        with patch.object(db_store, "_SUPPORTS_RETURNING", False):
+            picked = db_store.pick_many(self.db_path, owner_session="pool-1", n=2)
+        self.assertEqual([r["id"] for r in picked], ["D3", "D4"])
+        self.assertEqual(db_store.pick_many(self.db_path, owner_session="pool-1", n=5), [])
+
     def test_mark_done_and_failed(self):
         db_store.add_item(self.db_path, id="A", priority="P1", task="a", success_criteria="a")
         db_store.mark_done(self.db_path, "A", " finished ")
@@ -94,6 +154,197 @@ class DbStoreTests(unittest.TestCase):
         self.assertEqual(row[0], "custom")
         self.assertEqual(row[1], '{"x": 1}')
 
+    def events(self, item_id):
+        with sqlite3.connect(self.db_path) as conn:
+            return [
+                r[0]
+                for r in conn.execute(
+                    "SELECT event_type FROM queue_events WHERE item_id=? ORDER BY event_id", (item_id,)
+                ).fetchall()
+            ]
+
+    def test_state_change_events_share_transaction(self):
+        db_store.add_item(self.db_path, id="E1", priority="P1", task="a", success_criteria="a")
+        db_store.mark_done(self.db_path, "E1", "ok", events=[("review_gate", {"verdict": "PASS"})])
+        self.assertEqual(self.events("E1"), ["added", "done", "review_gate"])
+
+        with self.assertRaises(ValueError):
+            db_store.mark_blocked(self.db_path, "NOPE", "x", events=[("review_gate", {})])
+        self.assertEqual(self.events("NOPE"), [])
+
+    def test_requeue_item_resets_owner_and_records_events(self):
+        db_store.add_item(self.db_path, id="E2", priority="P1", task="a", success_criteria="a")
+        db_store.pick_next(self.db_path, owner_session="w1")
+        db_store.requeue_item(
+            self.db_path, "E2", notes="again", attempt_count=2, not_before=50, events=[("retried", {"reason": "x"})]
+        )
+        row = self.rows()[0]
+        self.assertEqual(
+            (row["status"], row["owner_session"], row["attempt_count"], row["not_before"], row["notes"]),
+            ("PENDING", "-", 2, 50, "again"),
+        )
+        self.assertEqual(self.events("E2")[-1], "retried")
+        with self.assertRaises(ValueError):
+            db_store.requeue_item(self.db_path, "NOPE", notes="x")
+
+    def test_event_writer_batches_and_flushes(self):
+        db_store.add_item(self.db_path, id="E3", priority="P1", task="a", success_criteria="a")
+        with db_store.EventWriter(self.db_path, max_pending=4, flush_interval=60, batch_size=3) as writer:
+            for i in range(7):
+                writer.append("E3", "lease_renewed", {"n": i})
+            writer.flush()
+            self.assertEqual(self.events("E3").count("lease_renewed"), 7)
+            writer.append("E3", "guardrail")
+        self.assertEqual(self.events("E3")[-1], "guardrail")
+        with self.assertRaises(RuntimeError):
+            writer.append("E3", "late")
+
+    def test_event_writer_reports_failed_batches(self):
+        bare = Path(self.tmp.name) / "bare.db"  # no queue_events table
+        writer = db_store.EventWriter(bare, flush_interval=60)
+        writer.append("E4", "guardrail")
+        writer.append("E4", "guardrail")
+        with self.assertRaisesRegex(RuntimeError, "2 event"):
+            writer.flush()
+        writer.flush()  # reported once
+        writer.close()
+
+    def test_event_writer_startup_failure_does_not_hang(self):
+        with patch.object(db_store, "_conn", side_effect=sqlite3.OperationalError("unable to open")):
+            writer = db_store.EventWriter(self.db_path, max_pending=1)
+            writer._thread.join(5)
+        self.assertFalse(writer._thread.is_alive())
+        with self.assertRaisesRegex(RuntimeError, "failed") as caught:
+            writer.append("E5", "guardrail")
+        self.assertIsInstance(caught.exception.__cause__, sqlite3.OperationalError)
+        for call in (lambda: writer.append("E5", "guardrail"), writer.flush):
+            with self.assertRaisesRegex(RuntimeError, "not running"):
+                call()
+        writer.close()
+
+    def test_compact_events_keep_last_archives_and_keeps_totals(self):
+        db_store.add_item(self.db_path, id="C1", priority="P1", task="a", success_criteria="a")
+        for i in range(4):
+            db_store.append_event(self.db_path, "C1", "retried", {"n": i})
+        archive = Path(self.tmp.name) / "events.jsonl.gz"
+
+        result = db_store.compact_events(self.db_path, keep_last=2, archive_path=archive)
+
+        self.assertEqual(result["archived"], 3)
+        self.assertEqual(result["remaining"], 2)
+        with gzip.open(archive, "rt", encoding="utf-8") as f:
+            archived = [json.loads(line) for line in f]
+        self.assertEqual([e["event_type"] for e in archived], ["added", "retried", "retried"])
+        self.assertEqual(db_store.event_totals(self.db_path)["retried"], 4)
+
+        again = db_store.compact_events(self.db_path, keep_last=2, archive_path=archive)
+        self.assertEqual(again["archived"], 0)
+        self.assertIsNone(again["archive"])
+
+    def test_compact_events_interrupted_runs_archive_each_event_once(self):
+        db_store.add_item(self.db_path, id="C4", priority="P1", task="a", success_criteria="a")
+        for i in range(3):
+            db_store.append_event(self.db_path, "C4", "retried", {"n": i})
+        archive = Path(self.tmp.name) / "events.jsonl.gz"
+        pending = archive.with_name(f".{archive.name}.pending")
+
+        def archived_ids():
+            with gzip.open(archive, "rt", encoding="utf-8") as f:
+                return [json.loads(line)["event_id"] for line in f]
+
+        def stage(path, event_id):
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                f.write(json.dumps({"event_id": event_id}) + "\n")
+
+        with sqlite3.connect(self.db_path) as conn:
+            ids = [r[0] for r in conn.execute("SELECT event_id FROM queue_events ORDER BY event_id")]
+
+        # Crash after the DELETE committed but before the append: the next run publishes it.
+        with patch.object(db_store, "_publish_archive", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                db_store.compact_events(self.db_path, keep_last=3, archive_path=archive)
+        self.assertTrue(pending.exists())
+        self.assertFalse(archive.exists())
+        db_store.compact_events(self.db_path, keep_last=3, archive_path=archive)
+        self.assertEqual(archived_ids(), ids[:1])
+
+        # Crash before the DELETE committed: the staged rows are still in the DB, so it is dropped.
+        stage(pending, ids[1])
+        db_store.compact_events(self.db_path, keep_last=3, archive_path=archive)
+        self.assertFalse(pending.exists())
+        self.assertEqual(archived_ids(), ids[:1])
+
+        # Crash mid-append: the archive is cut back to the recorded offset and appended again.
+        stage(pending.with_name(f"{pending.name}.{archive.stat().st_size}"), 999)
+        with archive.open("ab") as f:
+            f.write(b"torn")
+        db_store.compact_events(self.db_path, keep_last=3, archive_path=archive)
+        self.assertEqual(archived_ids(), [ids[0], 999])
+        self.assertEqual([p.name for p in archive.parent.iterdir() if "pending" in p.name], [])
+
+    def test_compact_events_finishes_a_crashed_default_archive_under_its_own_name(self):
+        db_store.add_item(self.db_path, id="C5", priority="P1", task="a", success_criteria="a")
+        for i in range(3):
+            db_store.append_event(self.db_path, "C5", "retried", {"n": i})
+        archive_dir = Path(self.db_path).parent / "archive"
+        with sqlite3.connect(self.db_path) as conn:
+            ids = [r[0] for r in conn.execute("SELECT event_id FROM queue_events ORDER BY event_id")]
+
+        with patch.object(db_store, "_publish_archive", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                db_store.compact_events(self.db_path, keep_last=3, now_ts=1_700_000_000)
+        first = db_store._default_archive_path(Path(self.db_path), 1_700_000_000)
+        self.assertTrue(db_store._pending_archive(first).exists())
+
+        result = db_store.compact_events(self.db_path, keep_last=3, now_ts=1_700_000_060)
+        self.assertEqual(result["archived"], 0)
+        with gzip.open(first, "rt", encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["event_id"] for line in f], ids[:1])
+        self.assertEqual(sorted(p.name for p in archive_dir.iterdir()), [first.name])
+
+    def test_compact_events_keep_days_union_with_keep_last(self):
+        db_store.add_item(self.db_path, id="C2", priority="P1", task="a", success_criteria="a")
+        db_store.add_item(self.db_path, id="C3", priority="P1", task="a", success_criteria="a")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE queue_events SET created_at = '2000-01-01 00:00' WHERE item_id = 'C2'")
+            conn.execute(
+                "INSERT INTO queue_events(item_id, event_type, payload_json, created_at) "
+                "VALUES('C2', 'old', '{}', '2000-01-01 00:00')"
+            )
+        result = db_store.compact_events(
+            self.db_path, keep_days=7, keep_last=1, archive_path=Path(self.tmp.name) / "a.jsonl.gz"
+        )
+        self.assertEqual(result["archived"], 1)
+        self.assertEqual(self.events("C2"), ["old"])
+        self.assertEqual(self.events("C3"), ["added"])
+
+    def test_compact_events_requires_policy_and_db_uses_incremental_vacuum(self):
+        with self.assertRaises(ValueError):
+            db_store.compact_events(self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+    def test_status_counters_track_transitions(self):
+        for i, prio in enumerate(["P0", "P1", "P1", "P2"]):
+            db_store.add_item(self.db_path, id=f"C{i}", priority=prio, task="t", success_criteria="s")
+        db_store.pick_many(self.db_path, "w1", 2)
+        db_store.mark_done(self.db_path, "C0", "ok")
+        db_store.requeue_item(self.db_path, "C1", notes="again")
+        db_store.mark_blocked(self.db_path, "C3", "stuck")
+
+        expected = {}
+        for row in self.rows():
+            expected[row["status"]] = expected.get(row["status"], 0) + 1
+        self.assertEqual(db_store.status_counts(self.db_path), expected)
+        owners = {(c["status"], c["owner_session"]): c["n"] for c in db_store.counters(self.db_path)}
+        self.assertEqual(owners[("DONE", "w1")], 1)
+        self.assertNotIn(("IN_PROGRESS", "w1"), owners)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE queue_counters SET n = 42")
+        db_store.init_db(self.db_path)
+        self.assertEqual(db_store.status_counts(self.db_path), expected)
+
     def test_lease_acquire_renew_release_happy_path(self):
         db_store.add_item(self.db_path, id="L1", priority="P1", task="a", success_criteria="a")
         self.assertTrue(db_store.acquire_lease(self.db_path, "L1", "worker-1", lease_seconds=120))
@@ -127,6 +378,7 @@ class DbStoreTests(unittest.TestCase):
         self.assertEqual(row["status"], "PENDING")
         self.assertEqual(row["attempt_count"], 1)
         self.assertIn("retry_not_before=1060", row["notes"])
+        self.assertEqual(row["not_before"], 1060)
 
         db_store.mark_failed(self.db_path, "R1", "net2")
         r2 = db_store.retry_eligible_items(self.db_path, now_ts=2000)
@@ -149,6 +401,51 @@ class DbStoreTests(unittest.TestCase):
         self.assertEqual(row["status"], "FAILED")
         self.assertEqual(row["attempt_count"], 3)
 
+    def test_pick_honors_retry_not_before(self):
+        db_store.add_item(self.db_path, id="R2", priority="P0", task="a", success_criteria="a")
+        db_store.add_item(self.db_path, id="R3", priority="P2", task="b", success_criteria="b")
+        db_store.mark_failed(self.db_path, "R2", "net")
+        self.assertEqual(db_store.retry_eligible_items(self.db_path, now_ts=1000), ["R2"])
+
+        picked = db_store.pick_next(self.db_path, owner_session="s", now_ts=1059)
+        self.assertEqual(picked["id"], "R3")
+        self.assertIsNone(db_store.pick_next(self.db_path, owner_session="s", now_ts=1059))
+        self.assertEqual([r["id"] for r in db_store.pick_many(self.db_path, "s", 5, now_ts=1060)], ["R2"])
+
+    def test_init_db_migrates_not_before_column(self):
+        legacy = Path(self.tmp.name) / "legacy.db"
+        with sqlite3.connect(legacy) as conn:
+            conn.execute(
+                "CREATE TABLE queue_items (id TEXT PRIMARY KEY, status TEXT NOT NULL, priority TEXT NOT NULL, "
+                "task TEXT NOT NULL, success_criteria TEXT NOT NULL, owner_session TEXT NOT NULL DEFAULT '-', "
+                "started_at_kst TEXT NOT NULL DEFAULT '-', due_at_kst TEXT NOT NULL DEFAULT '-', "
+                "notes TEXT NOT NULL DEFAULT '', created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "INSERT INTO queue_items(id, status, priority, task, success_criteria, created_at, updated_at) "
+                "VALUES('OLD-1', 'PENDING', 'P1', 't', 'c', '2026-01-01 10:00', '2026-01-01 10:00')"
+            )
+        db_store.init_db(legacy)
+        picked = db_store.pick_next(legacy, owner_session="s")
+        self.assertEqual(picked["id"], "OLD-1")
+        self.assertEqual(picked["not_before"], 0)
+        self.assertEqual(picked["priority_rank"], 1)
+
+    def test_dispatch_query_uses_covering_index(self):
+        db_store.add_item(self.db_path, id="A", priority="P2", task="a", success_criteria="a")
+        with sqlite3.connect(self.db_path) as conn:
+            plan = " ".join(
+                r[3]
+                for r in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT id FROM queue_items WHERE status = 'PENDING' AND +not_before <= ? "
+                    f"{db_store._PRIORITY_ORDER_SQL} LIMIT 1",
+                    (0,),
+                ).fetchall()
+            )
+        self.assertIn("COVERING INDEX idx_queue_items_dispatch", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        self.assertEqual(self.rows()[0]["priority_rank"], 2)
+
     def test_idempotency_duplicate_prevention_on_pick(self):
         db_store.add_item(
             self.db_path,
@@ -182,8 +479,207 @@ class DbStoreTests(unittest.TestCase):
 
         row_i2 = [r for r in self.rows() if r["id"] == "I2"][0]
         self.assertEqual(row_i2["status"], "DONE")
+        self.assertEqual(row_i2["owner_session"], "-")
         self.assertIn("Skipped duplicate by idempotency_key", row_i2["notes"])
 
+    def test_epoch_columns_follow_transitions(self):
+        clock = SimulatedClock(1767225600.0)  # 2026-01-01 09:00 KST
+        with use_clock(clock):
+            db_store.add_item(self.db_path, id="B", priority="P1", task="b", success_criteria="b")
+            clock.advance(0.25)
+            db_store.add_item(self.db_path, id="A", priority="P1", task="a", success_criteria="a")
+            clock.advance(10)
+            # Same created_at minute string; created_at_ms keeps FIFO order.
+            self.assertEqual(db_store.pick_next(self.db_path, "s")["id"], "B")
+            row = db_store.get_item(self.db_path, "B")
+            self.assertEqual((row["created_at_ms"], row["started_at_ms"]), (1767225600000, 1767225610250))
+            self.assertEqual(row["created_at"], "2026-01-01 09:00")
+
+            clock.advance(20)
+            db_store.mark_failed(self.db_path, "B", "boom")
+            self.assertEqual(db_store.get_item(self.db_path, "B")["finished_at_ms"], 1767225630250)
+            db_store.retry_eligible_items(self.db_path, now_ts=clock.time())
+            row = db_store.get_item(self.db_path, "B")
+            self.assertIsNone(row["started_at_ms"])
+            self.assertIsNone(row["finished_at_ms"])
+            self.assertEqual(row["updated_at_ms"], 1767225630250)
+
+    def test_stale_in_progress_is_a_range_query(self):
+        clock = SimulatedClock(1767225600.0)
+        with use_clock(clock):
+            for item_id in ("S1", "S2"):
+                db_store.add_item(self.db_path, id=item_id, priority="P1", task="t", success_criteria="c")
+            db_store.pick_next(self.db_path, "s")
+            clock.advance(3600)
+            db_store.pick_next(self.db_path, "s")
+        cutoff = 1767225600000 + 1800 * 1000
+        self.assertEqual(db_store.count_stale_in_progress(self.db_path, cutoff), 1)
+        with sqlite3.connect(self.db_path) as conn:
+            plan = " ".join(
+                r[3]
+                for r in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM queue_items "
+                    "WHERE status = 'IN_PROGRESS' AND started_at_ms <= ?",
+                    (cutoff,),
+                ).fetchall()
+            )
+        self.assertIn("idx_queue_items_started", plan)
+
+    def test_terminal_latency_aggregates(self):
+        clock = SimulatedClock(1767225600.0)
+        with use_clock(clock):
+            for n, item_id in enumerate(("L1", "L2", "L3", "L4")):
+                db_store.add_item(self.db_path, id=item_id, priority="P1", task="t", success_criteria="c")
+                clock.advance(10 * (n + 1))
+                if item_id == "L4":
+                    db_store.mark_failed(self.db_path, item_id, "err")
+                else:
+                    db_store.mark_done(self.db_path, item_id, "ok")
+            db_store.add_item(self.db_path, id="L5", priority="P1", task="t", success_criteria="c")
+
+        sli = db_store.terminal_latency(self.db_path)
+        self.assertEqual((sli["terminal"], sli["done"], sli["failed"]), (4, 3, 1))
+        self.assertEqual(sli["success_rate"], 0.75)
+        self.assertEqual(sli["latency_p50_ms"], 20000)
+        self.assertEqual(sli["latency_p95_ms"], 30000)
+        self.assertEqual(sli["latency_max_ms"], 40000)
+        self.assertEqual(sli["latency_avg_ms"], 25000.0)
+        recent = db_store.terminal_latency(self.db_path, since_ms=1767225600000 + 60_000)
+        self.assertEqual(recent["terminal"], 2)
+        self.assertIsNone(db_store.terminal_latency(self.db_path, until_ms=0)["latency_p50_ms"])
+
+    def test_init_db_backfills_epoch_columns_and_rebuilds_dispatch_index(self):
+        legacy = Path(self.tmp.name) / "legacy_epoch.db"
+        with sqlite3.connect(legacy) as conn:
+            conn.execute(
+                "CREATE TABLE queue_items (id TEXT PRIMARY KEY, status TEXT NOT NULL, priority TEXT NOT NULL, "
+                "task TEXT NOT NULL, success_criteria TEXT NOT NULL, owner_session TEXT NOT NULL DEFAULT '-', "
+                "started_at_kst TEXT NOT NULL DEFAULT '-', due_at_kst TEXT NOT NULL DEFAULT '-', "
+                "notes TEXT NOT NULL DEFAULT '', created_at TEXT NOT NULL, updated_at TEXT NOT NULL, "
+                "priority_rank INTEGER NOT NULL DEFAULT 99, not_before INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute(
+                "CREATE INDEX idx_queue_items_dispatch ON queue_items(status, priority_rank, created_at, not_before, id)"
+            )
+            conn.execute(
+                "INSERT INTO queue_items(id, status, priority, task, success_criteria, owner_session, started_at_kst, "
+                "created_at, updated_at) VALUES('OLD-1', 'IN_PROGRESS', 'P1', 't', 'c', 's', '2026-01-01 10:00', "
+                "'2026-01-01 09:30', '2026-01-01 10:00')"
+            )
+        db_store.init_db(legacy)
+        row = db_store.get_item(legacy, "OLD-1")
+        self.assertEqual(row["created_at_ms"], 1767227400000)
+        self.assertEqual(row["started_at_ms"], 1767229200000)
+        self.assertIsNone(row["finished_at_ms"])
+        with sqlite3.connect(legacy) as conn:
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_queue_items_dispatch'").fetchone()[0]
+        self.assertIn("created_at_ms", sql)
+
+    def test_ensure_schema_only_migrates_stale_databases(self):
+        with patch.object(db_store, "init_db") as init_db:
+            db_store.ensure_schema(self.db_path)
+        init_db.assert_not_called()
+
+        legacy = Path(self.tmp.name) / "legacy_counters.db"
+        with sqlite3.connect(legacy) as conn:
+            conn.execute(
+                "CREATE TABLE queue_items (id TEXT PRIMARY KEY, status TEXT NOT NULL, priority TEXT NOT NULL, "
+                "task TEXT NOT NULL, success_criteria TEXT NOT NULL, owner_session TEXT NOT NULL DEFAULT '-', "
+                "started_at_kst TEXT NOT NULL DEFAULT '-', due_at_kst TEXT NOT NULL DEFAULT '-', "
+                "notes TEXT NOT NULL DEFAULT '', created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "INSERT INTO queue_items(id, status, priority, task, success_criteria, created_at, updated_at) "
+                "VALUES('OLD-1', 'DONE', 'P1', 't', 'c', '2026-01-01 09:30', '2026-01-01 10:00')"
+            )
+        db_store.ensure_schema(legacy)
+        self.assertEqual(db_store.status_counts(legacy), {"DONE": 1})
+        self.assertEqual(db_store.terminal_latency(legacy)["latency_p50_ms"], 30 * 60 * 1000)
+
+
+class QueueStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp.name) / "queue.db"
+        self.store = db_store.QueueStore(self.db_path, pragmas={"busy_timeout": 1234})
+        self.store.init_db()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_connection_is_reused_per_thread(self):
+        conn = self.store.connection()
+        self.assertIs(self.store.connection(), conn)
+
+        other: list = []
+        t = threading.Thread(target=lambda: other.append(self.store.connection()))
+        t.start()
+        t.join()
+        self.assertIsNot(other[0], conn)
+
+    def test_pragma_profile_applied(self):
+        conn = self.store.connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0].lower(), "wal")
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 1234)
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+
+    def test_methods_mirror_module_functions(self):
+        self.store.add_item(id="S1", priority="P1", task="a", success_criteria="a")
+        self.store.add_item(id="S2", priority="P0", task="b", success_criteria="b")
+        picked = self.store.pick_next("worker-1")
+        self.assertEqual(picked["id"], "S2")
+        self.assertTrue(self.store.acquire_lease("S2", "worker-1", lease_seconds=60))
+        self.store.mark_done("S2", "ok")
+        self.store.mark_failed("S1", "bad")
+        self.assertEqual(self.store.retry_eligible_items(now_ts=1000), ["S1"])
+
+        rows = {r["id"]: r for r in db_store.list_items(self.db_path)}
+        self.assertEqual(rows["S2"]["status"], "DONE")
+        self.assertEqual(rows["S1"]["status"], "PENDING")
+        self.assertEqual(self.store.list_items(status="DONE")[0]["id"], "S2")
+        self.assertEqual(self.store.terminal_latency()["done"], 1)
+        self.assertEqual(self.store.count_stale_in_progress(0), 0)
+        self.assertIsNotNone(self.store.oldest_pending_created_at_ms())
+
+    def test_get_item_and_get_items_are_primary_key_lookups(self):
+        for i in range(3):
+            self.store.add_item(id=f"K{i}", priority="P1", task="t", success_criteria="s")
+        self.store.mark_done("K1", "ok")
+        self.assertEqual(self.store.get_item("K1")["status"], "DONE")
+        self.assertIsNone(self.store.get_item("NOPE"))
+        self.assertEqual(self.store.get_items([]), {})
+        rows = self.store.get_items(["K2", "K1", "NOPE"])
+        self.assertEqual({item_id: row["status"] for item_id, row in rows.items()}, {"K1": "DONE", "K2": "PENDING"})
+
+        # Both run as primary-key probes: every statement they issue is planned on the id index.
+        conn = self.store.connection()
+        statements: list[str] = []
+        conn.set_trace_callback(statements.append)
+        self.store.get_item("K1")
+        self.store.get_items(["K1", "K2"])
+        conn.set_trace_callback(None)
+        self.assertEqual(len(statements), 2)
+        for sql in statements:
+            plan = " ".join(r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall())
+            self.assertIn("USING INDEX sqlite_autoindex_queue_items_1", plan)
+
+    def test_async_events_flush_on_close(self):
+        store = db_store.QueueStore(self.db_path, async_events=True)
+        store.add_item(id="S3", priority="P1", task="a", success_criteria="a")
+        self.assertIsNone(store.append_event("S3", "custom", {"x": 1}))
+        store.close()
+        with sqlite3.connect(self.db_path) as conn:
+            types = [r[0] for r in conn.execute("SELECT event_type FROM queue_events WHERE item_id='S3'")]
+        self.assertEqual(types, ["added", "custom"])
+
+    def test_close_drops_pooled_connections(self):
+        conn = self.store.connection()
+        self.store.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        self.assertIsNot(self.store.connection(), conn)
+
 
 if __name__ == "__main__":
     unittest.main()
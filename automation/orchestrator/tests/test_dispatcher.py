@@ -1,7 +1,8 @@
 import io
+import json
 import tempfile
 import unittest
-from contextlib import redirect_stdout
+from contextlib import redirect_stderr, redirect_stdout
 from pathlib import Path
 
 from automation.orchestrator import db_store, dispatcher
@@ -24,6 +25,7 @@ class DispatcherTests(unittest.TestCase):
         self.tmp = tempfile.TemporaryDirectory()
         self.queue_path = Path(self.tmp.name) / "QUEUE.md"
         self.queue_path.write_text(SAMPLE_QUEUE, encoding="utf-8")
+        self.log_path = Path(self.tmp.name) / "runs.jsonl"
         self.db_path = Path(self.tmp.name) / "queue.db"
         db_store.init_db(self.db_path)
 
@@ -33,7 +35,7 @@ class DispatcherTests(unittest.TestCase):
     def run_cmd(self, argv):
         buf = io.StringIO()
         with redirect_stdout(buf):
-            code = dispatcher.main(argv)
+            code = dispatcher.main(["--log-path", str(self.log_path)] + argv)
         return code, buf.getvalue()
 
     def test_pick_md_p0_first(self):
@@ -41,6 +43,12 @@ class DispatcherTests(unittest.TestCase):
         self.assertEqual(code, 0)
         self.assertIn("ORCH-101", out)
 
+    def test_pick_md_logs_queue_lock_wait(self):
+        self.run_cmd(["--queue", str(self.queue_path)])
+        event = json.loads(self.log_path.read_text(encoding="utf-8").splitlines()[-1])
+        self.assertEqual((event["event"], event["command"]), ("queue_lock", "dispatcher.pick"))
+        self.assertGreaterEqual(event["lock_wait_ms"], 0)
+
     def test_pick_md_noop_when_empty(self):
         self.queue_path.write_text(
             SAMPLE_QUEUE.replace("| ORCH-100 | PENDING", "| ORCH-100 | DONE").replace("| ORCH-101 | PENDING", "| ORCH-101 | DONE"),
@@ -57,6 +65,77 @@ class DispatcherTests(unittest.TestCase):
         self.assertEqual(code, 0)
         self.assertIn("DB-2", out)
 
+    def test_pick_db_batch(self):
+        db_store.add_item(self.db_path, id="DB-1", priority="P1", task="a", success_criteria="ok")
+        db_store.add_item(self.db_path, id="DB-2", priority="P0", task="b", success_criteria="ok")
+        db_store.add_item(self.db_path, id="DB-3", priority="P2", task="c", success_criteria="ok")
+        code, out = self.run_cmd(["--db", str(self.db_path), "--owner-session", "d3", "--batch", "2"])
+        self.assertEqual(code, 0)
+        self.assertEqual(out.split(), ["DB-2", "DB-1"])
+        pending = [r["id"] for r in db_store.list_items(self.db_path, status="PENDING")]
+        self.assertEqual(pending, ["DB-3"])
+
+    def test_pick_md_batch(self):
+        code, out = self.run_cmd(["--queue", str(self.queue_path), "--batch", "5"])
+        self.assertEqual(code, 0)
+        self.assertEqual(out.split(), ["ORCH-101", "ORCH-100"])
+        self.assertNotIn("PENDING", self.queue_path.read_text(encoding="utf-8"))
+
+
+class DispatchDaemonTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp.name) / "queue.db"
+        db_store.init_db(self.db_path)
+        self.store = db_store.QueueStore(self.db_path)
+        self.emitted = []
+        self.daemon = dispatcher.DispatchDaemon(
+            self.store, "d", sessions=2, emit=lambda owner, item_id: self.emitted.append((owner, item_id))
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def add(self, item_id, priority="P1"):
+        db_store.add_item(self.db_path, id=item_id, priority=priority, task="t", success_criteria="s")
+
+    def test_poll_dispatches_one_item_per_idle_session(self):
+        self.add("A", "P1")
+        self.add("B", "P0")
+        self.add("C", "P2")
+        self.assertEqual(self.daemon.poll(now_ts=1000), [("d-1", "B"), ("d-2", "A")])
+        # Nothing committed by another connection since: no wakeup, no query.
+        self.assertEqual(self.daemon.poll(now_ts=1000), [])
+
+        db_store.mark_done(self.db_path, "B", "ok")
+        self.assertEqual(self.daemon.poll(now_ts=1000), [("d-1", "C")])
+        self.assertEqual(self.emitted, [("d-1", "B"), ("d-2", "A"), ("d-1", "C")])
+
+    def test_poll_wakes_on_not_before_timer(self):
+        self.add("T")
+        db_store.requeue_item(self.db_path, "T", notes="later", not_before=1010)
+        self.assertEqual(self.daemon.poll(now_ts=1000), [])
+        self.assertEqual(self.daemon.poll(now_ts=1005), [])
+        self.assertEqual(self.daemon.poll(now_ts=1010), [("d-1", "T")])
+
+    def test_serve_requires_db_and_session_cap(self):
+        with redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                dispatcher.main(["serve"])
+            with self.assertRaises(SystemExit):
+                dispatcher.main(["--db", str(self.db_path), "serve", "--sessions", "6"])
+
+    def test_serve_cli_runs_until_max_seconds(self):
+        self.add("S1")
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            code = dispatcher.main(
+                ["--db", str(self.db_path), "--owner-session", "w", "serve", "--sessions", "1", "--max-seconds", "0.2"]
+            )
+        self.assertEqual(code, 0)
+        self.assertEqual(buf.getvalue().split(), ["w-1", "S1"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,52 @@
+import random
+import unittest
+
+from automation.orchestrator.histogram import LatencyHistogram
+
+
+class LatencyHistogramTests(unittest.TestCase):
+    def test_small_values_are_exact(self):
+        hist = LatencyHistogram()
+        for value in (100, 300, 50):
+            hist.record(value)
+        self.assertEqual(hist.percentile(0.5), 100)
+        self.assertEqual(hist.percentile(0.99), 100)
+        self.assertEqual(hist.percentile(1.0), 300)
+        self.assertEqual(hist.mean(), 150)
+
+    def test_percentiles_within_relative_error(self):
+        rng = random.Random(7)
+        values = [int(rng.lognormvariate(7, 1.5)) for _ in range(20000)]
+        hist = LatencyHistogram()
+        for value in values:
+            hist.record(value)
+        ordered = sorted(values)
+        for p in (0.5, 0.9, 0.95, 0.99):
+            exact = ordered[int((len(ordered) - 1) * p)]
+            self.assertLessEqual(abs(hist.percentile(p) - exact), exact / 64 + 1, p)
+        self.assertLess(len(hist.counts), 2000)
+
+    def test_cumulative_counts_by_bound(self):
+        hist = LatencyHistogram()
+        for value in (3, 10, 10, 90, 5000):
+            hist.record(value)
+        self.assertEqual(hist.cumulative([5, 10, 100, 1000, 10000]), [1, 3, 4, 4, 5])
+
+    def test_cumulative_bounds_are_inclusive_for_wide_buckets(self):
+        hist = LatencyHistogram()
+        hist.record(1000)  # shares a bucket with 992..1007
+        self.assertEqual(hist.cumulative([991, 1000, 2500]), [0, 1, 1])
+
+    def test_merge_matches_single_histogram(self):
+        whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for value in range(0, 50000, 7):
+            whole.record(value)
+            (left if value % 2 else right).record(value)
+        merged = LatencyHistogram.from_dict(left.to_dict()).merge(right)
+        self.assertEqual(merged.to_dict(), whole.to_dict())
+        with self.assertRaises(ValueError):
+            merged.merge(LatencyHistogram(sub_bits=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from automation.orchestrator import kpi_window, run_log
+
+T0 = 1767225600000  # minute aligned
+MIN = kpi_window.MINUTE_MS
+
+
+def run_end(ts, command="done", exit_code=0, duration_ms=10):
+    return {
+        "event": "run_end",
+        "ts_epoch_ms": ts,
+        "command": command,
+        "exit_code": exit_code,
+        "duration_ms": duration_ms,
+    }
+
+
+class KpiWindowTests(unittest.TestCase):
+    def test_parse_window(self):
+        self.assertEqual(kpi_window.parse_window("30m"), 30)
+        self.assertEqual(kpi_window.parse_window("2h"), 120)
+        self.assertEqual(kpi_window.parse_window("45"), 45)
+        with self.assertRaises(ValueError):
+            kpi_window.parse_window("soon")
+
+    def test_success_rate_slides_with_the_window(self):
+        window = kpi_window.KpiWindow(window_minutes=30, stall_minutes=10, silence_minutes=15)
+        for i in range(10):
+            window.add(run_end(T0 + i * MIN, command="fail"))
+        for i in range(10):
+            window.add(run_end(T0 + (30 + i) * MIN, command="done"))
+
+        now = T0 + 40 * MIN
+        snap = window.snapshot(now)
+        self.assertEqual((snap["success"], snap["failed"], snap["success_rate"]), (10, 0, 1.0))
+        self.assertEqual(window.abort_reasons(now), [])
+        self.assertEqual(len(window._ring), 30)
+
+        early = window.snapshot(T0 + 9 * MIN)
+        self.assertEqual((early["failed"], early["success"]), (0, 0))  # minutes 0-9 were overwritten by 30-39
+
+    def test_abort_conditions(self):
+        window = kpi_window.KpiWindow(window_minutes=30, stall_minutes=10, silence_minutes=15)
+        for i in range(5):
+            window.add(run_end(T0 + i * MIN, command="done"))
+            window.add(run_end(T0 + i * MIN, command="fail"))
+        for i in range(5, 16):
+            window.add(run_end(T0 + i * MIN, command="pick", exit_code=1))
+
+        reasons = window.abort_reasons(T0 + 16 * MIN)
+        self.assertTrue(any(r.startswith("success_rate_30m=0.5000") for r in reasons), reasons)
+        self.assertTrue(any(r.startswith("state_transitions_stalled") for r in reasons), reasons)
+        self.assertFalse(any(r.startswith("run_log_silent") for r in reasons), reasons)
+
+        silent = window.abort_reasons(T0 + 40 * MIN)
+        self.assertTrue(any(r.startswith("run_log_silent 25m") for r in silent), silent)
+
+    def test_follower_reads_appends_across_rotation(self):
+        with tempfile.TemporaryDirectory() as td:
+            log = Path(td) / "runs.jsonl"
+            writer = run_log.RunLogWriter(log, max_bytes=0, rotate_daily=False, compress=True, buffer_events=100)
+            writer.append(run_end(T0, duration_ms=1), flush=True)
+            writer.rotate()
+            writer.append(run_end(T0 + MIN, duration_ms=2), flush=True)
+
+            follower = kpi_window.LogFollower(log)
+            self.assertEqual([e["duration_ms"] for e in follower.backfill(T0)], [1, 2])
+            self.assertEqual(list(follower.poll()), [])
+
+            with log.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(run_end(T0 + 2 * MIN, duration_ms=3)) + "\n" + '{"event": "run_')
+            writer.rotate()
+            writer.append(run_end(T0 + 3 * MIN, duration_ms=4), flush=True)
+            self.assertEqual([e["duration_ms"] for e in follower.poll()], [3, 4])
+            follower.close()
+
+    def test_follower_drains_the_old_file_again_when_rotation_races_the_poll(self):
+        with tempfile.TemporaryDirectory() as td:
+            log = Path(td) / "runs.jsonl"
+            log.write_text(json.dumps(run_end(T0, duration_ms=1)) + "\n", encoding="utf-8")
+            follower = kpi_window.LogFollower(log)
+            self.assertEqual([e["duration_ms"] for e in follower.poll()], [1])
+
+            real_stat = os.stat
+
+            def stat_after_a_racing_rotation(path, *args, **kwargs):
+                # The writer appends its last line and rotates after the drain, before the inode check.
+                with log.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(run_end(T0 + MIN, duration_ms=2)) + "\n")
+                log.rename(log.with_name("runs.1.jsonl"))
+                log.write_text(json.dumps(run_end(T0 + 2 * MIN, duration_ms=3)) + "\n", encoding="utf-8")
+                return real_stat(path, *args, **kwargs)
+
+            with patch.object(kpi_window.os, "stat", side_effect=stat_after_a_racing_rotation):
+                self.assertEqual([e["duration_ms"] for e in follower.poll()], [2, 3])
+            follower.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from automation.orchestrator import db_store, metrics_aggregate, metrics_export, ops
+from automation.orchestrator.clock import SimulatedClock, use_clock
+
+
+class MetricsExportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "queue.db"
+        self.log = Path(self.tmp.name) / "runs.jsonl"
+        db_store.init_db(self.db)
+        for i, priority in enumerate(["P0", "P1", "P1"]):
+            db_store.add_item(self.db, id=f"ORCH-{i}", priority=priority, task="t", success_criteria="c")
+        db_store.pick_next(self.db, "worker-1")
+        runs = [
+            {"event": "run_end", "command": "pick", "exit_code": 0, "duration_ms": 7},
+            {"event": "run_end", "command": "done", "exit_code": 0, "duration_ms": 300},
+        ]
+        self.log.write_text("".join(json.dumps(r) + "\n" for r in runs), encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_collect_exports_queue_and_run_metrics(self):
+        with db_store.QueueStore(self.db) as store:
+            text = metrics_export.collect(store, self.log)
+        lines = set(text.splitlines())
+
+        self.assertIn('orch_queue_items{status="PENDING",priority="P1"} 2', lines)
+        self.assertIn('orch_queue_items{status="IN_PROGRESS",priority="P0"} 1', lines)
+        self.assertIn('orch_in_progress_items{owner_session="worker-1"} 1', lines)
+        self.assertIn('orch_queue_events_total{event_type="picked"} 1', lines)
+        self.assertIn("# TYPE orch_run_duration_ms histogram", lines)
+        self.assertIn('orch_run_duration_ms_bucket{command="pick",le="5"} 0', lines)
+        self.assertIn('orch_run_duration_ms_bucket{command="pick",le="10"} 1', lines)
+        self.assertIn('orch_run_duration_ms_bucket{command="done",le="250"} 0', lines)
+        self.assertIn('orch_run_duration_ms_bucket{command="done",le="+Inf"} 1', lines)
+        self.assertIn('orch_run_terminal_total{result="done"} 1', lines)
+        self.assertTrue(any(line.startswith("orch_oldest_pending_age_seconds ") for line in lines))
+        # The log side came from (and advanced) the KPI checkpoint.
+        self.assertTrue(metrics_aggregate.checkpoint_path(self.log).exists())
+
+    def test_collect_exports_live_leases_per_owner(self):
+        with use_clock(SimulatedClock(start=1_700_000_000)) as clock:
+            db_store.acquire_lease(self.db, "ORCH-0", "worker-1", lease_seconds=60)
+            clock.advance(30)
+            db_store.acquire_lease(self.db, "ORCH-1", "worker-2", lease_seconds=60)
+            db_store.acquire_lease(self.db, "ORCH-2", "worker-2", lease_seconds=10)
+            clock.advance(20)
+            with db_store.QueueStore(self.db) as store:
+                lines = set(metrics_export.collect(store, None).splitlines())
+
+        self.assertIn('orch_active_leases{lease_owner="worker-1"} 1', lines)
+        # ORCH-2's lease has expired, so only ORCH-1 counts for worker-2.
+        self.assertIn('orch_active_leases{lease_owner="worker-2"} 1', lines)
+        self.assertIn("orch_oldest_lease_age_seconds 50.0", lines)
+
+    def test_serve_deadline_follows_the_injected_clock(self):
+        with use_clock(SimulatedClock()) as clock:
+            with patch.object(
+                metrics_export.HTTPServer, "handle_request", side_effect=lambda: clock.advance(1)
+            ) as handle:
+                metrics_export.serve("127.0.0.1", 0, lambda: "", max_seconds=3)
+        self.assertEqual(handle.call_count, 3)
+
+    def test_metrics_serve_textfile(self):
+        prom = Path(self.tmp.name) / "textfile" / "orch.prom"
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            code = ops.main(
+                [
+                    "metrics-serve",
+                    "--db-path",
+                    str(self.db),
+                    "--log-path",
+                    str(self.log),
+                    "--textfile",
+                    str(prom),
+                ]
+            )
+        self.assertEqual(code, 0)
+        self.assertIn("orch_runs_total 2", prom.read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,7 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from automation.orchestrator import metrics_aggregate, orch
+from automation.orchestrator import metrics_aggregate, orch, run_log
 
 
 SAMPLE_QUEUE = """# Orchestrator Queue
@@ -57,6 +57,66 @@ class ObservabilityTests(unittest.TestCase):
             self.assertEqual(report["success_rate"], 0.5)
             self.assertEqual(report["latency_p95_ms"], 100)
 
+    def test_incremental_aggregate_resumes_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as td:
+            log = Path(td) / "runs.jsonl"
+            checkpoint = metrics_aggregate.checkpoint_path(log)
+            log.write_text(json.dumps({"event": "run_end", "command": "done", "exit_code": 0, "duration_ms": 10}) + "\n")
+
+            first = metrics_aggregate.aggregate_from_logs(log, checkpoint=checkpoint)
+            self.assertEqual((first["success"], first["total_runs"]), (1, 1))
+            state = json.loads(checkpoint.read_text(encoding="utf-8"))
+            self.assertEqual(state["offset"], log.stat().st_size)
+
+            with log.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"event": "run_end", "command": "fail", "exit_code": 0, "duration_ms": 30}) + "\n")
+                f.write('{"event": "run_end", "command": "done"')  # partial line is left for the next call
+            second = metrics_aggregate.aggregate_from_logs(log, checkpoint=checkpoint)
+            self.assertEqual((second["success"], second["failed"], second["total_runs"]), (1, 1, 2))
+            self.assertEqual(second["latency_avg_ms"], 20)
+
+            # A rewritten log no longer matches the checkpoint and is rescanned from scratch.
+            log.write_text(json.dumps({"event": "run_end", "command": "fail", "exit_code": 0, "duration_ms": 5}) + "\n")
+            third = metrics_aggregate.aggregate_from_logs(log, checkpoint=checkpoint)
+            self.assertEqual((third["success"], third["failed"], third["total_runs"]), (0, 1, 1))
+
+    def test_incremental_aggregate_follows_rotation(self):
+        with tempfile.TemporaryDirectory() as td:
+            log = Path(td) / "runs.jsonl"
+            checkpoint = metrics_aggregate.checkpoint_path(log)
+            writer = run_log.RunLogWriter(log, max_bytes=0, rotate_daily=False, compress=True, buffer_events=100)
+            for i in range(3):
+                writer.append({"event": "run_end", "command": "done", "exit_code": 0, "duration_ms": i}, flush=True)
+            metrics_aggregate.aggregate_from_logs(log, checkpoint=checkpoint)
+
+            writer.append({"event": "run_end", "command": "fail", "exit_code": 0, "duration_ms": 100}, flush=True)
+            writer.rotate()
+            writer.append({"event": "run_end", "command": "done", "exit_code": 0, "duration_ms": 200}, flush=True)
+
+            incremental = metrics_aggregate.aggregate_from_logs(log, checkpoint=checkpoint)
+            full = metrics_aggregate.aggregate_from_logs(log)
+            self.assertEqual(incremental, full)
+            self.assertEqual((full["success"], full["failed"], full["latency_p95_ms"]), (4, 1, 100))
+
+    def test_per_command_percentiles_and_host_merge(self):
+        with tempfile.TemporaryDirectory() as td:
+            checkpoints = []
+            for host, durations in (("a", [10, 20]), ("b", [30, 4000])):
+                log = Path(td) / f"{host}.jsonl"
+                lines = [{"event": "run_end", "command": "pick", "exit_code": 0, "duration_ms": d} for d in durations]
+                lines.append({"event": "run_end", "command": "done", "exit_code": 0, "duration_ms": 5})
+                log.write_text("".join(json.dumps(e) + "\n" for e in lines), encoding="utf-8")
+                checkpoints.append(metrics_aggregate.checkpoint_path(log))
+                report = metrics_aggregate.aggregate_from_logs(log, checkpoint=checkpoints[-1])
+                self.assertEqual(report["latency_by_command"]["pick"]["count"], 2)
+
+            merged = metrics_aggregate.merge_checkpoints(checkpoints)
+            self.assertEqual((merged["total_runs"], merged["success"]), (6, 2))
+            pick = merged["latency_by_command"]["pick"]
+            self.assertEqual((pick["count"], pick["p50_ms"], pick["p99_ms"]), (4, 20, 30))
+            self.assertEqual(merged["latency_p99_ms"], 30)
+            self.assertEqual(merged["latency_avg_ms"], round((10 + 20 + 30 + 4000 + 5 + 5) / 6, 2))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,11 +1,14 @@
 import io
+import json
 import sqlite3
 import tempfile
 import unittest
-from contextlib import redirect_stdout
+from contextlib import redirect_stderr, redirect_stdout
 from pathlib import Path
+from unittest.mock import patch
 
-from automation.orchestrator import db_store, ops
+from automation.orchestrator import config, db_store, ops
+from automation.orchestrator.clock import SimulatedClock, use_clock
 
 
 SAMPLE_QUEUE = """# Orchestrator Queue
@@ -29,6 +32,10 @@ class OpsCliTests(unittest.TestCase):
         self.queue_path.write_text(SAMPLE_QUEUE, encoding="utf-8")
         self.db_path = Path(self.tmp.name) / "queue.db"
         db_store.init_db(self.db_path)
+        self.log_path = Path(self.tmp.name) / "runs.jsonl"
+        log_default = patch.object(config, "LOG_PATH", self.log_path)
+        log_default.start()
+        self.addCleanup(log_default.stop)
 
     def tearDown(self):
         self.tmp.cleanup()
@@ -95,6 +102,13 @@ class OpsCliTests(unittest.TestCase):
         row = self._qf().find_by_id("ORCH-101")
         self.assertEqual(row.status, "PENDING")
 
+    def test_markdown_mutations_log_queue_lock_wait(self):
+        self.run_cmd(["--queue", str(self.queue_path), "cancel", "--id", "ORCH-100"])
+        self.run_cmd(["--queue", str(self.queue_path), "retry", "--id", "ORCH-100"])
+        events = [json.loads(line) for line in self.log_path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([e["command"] for e in events], ["ops.cancel", "ops.retry"])
+        self.assertTrue(all(e["event"] == "queue_lock" and e["lock_wait_ms"] >= 0 for e in events))
+
     def test_status_db_mode_smoke(self):
         self._db_add(id="DB-1")
         code, out = self.run_cmd(["--db", str(self.db_path), "status"])
@@ -109,6 +123,15 @@ class OpsCliTests(unittest.TestCase):
         self.assertIn("workers_active=1", out)
         self.assertIn("worker-1", out)
 
+    def test_workers_db_counts_from_counters_and_reads_top_rows(self):
+        for item_id in ("DB-W1", "DB-W2", "DB-W3"):
+            self._db_add(id=item_id, status="IN_PROGRESS")
+        with patch.object(ops, "TOP_IN_PROGRESS", 1):
+            code, out = self.run_cmd(["--db", str(self.db_path), "workers"])
+        self.assertEqual(code, 0)
+        self.assertIn("workers_active=1 in_progress=3", out)
+        self.assertIn("- worker-1 tasks=3 p0=0 p1=3 p2=0 ids=DB-W1,+2 ", out)
+
     def test_consistency_check_ok(self):
         db_store.add_item(self.db_path, id="ORCH-100", priority="P1", task="task one", success_criteria="c1")
         db_store.add_item(self.db_path, id="ORCH-101", priority="P0", task="task zero", success_criteria="c2")
@@ -156,6 +179,76 @@ class OpsCliTests(unittest.TestCase):
         self.assertIn("kpi", out)
         self.assertIn("success_rate=50.00%", out)
 
+    def test_kpi_stale_and_e2e_from_epoch_columns(self):
+        log_path = Path(self.tmp.name) / "runs_e2e.jsonl"
+        log_path.write_text("", encoding="utf-8")
+        clock = SimulatedClock(1767225600.0)
+        with use_clock(clock):
+            self._db_add(id="DB-S1", status="IN_PROGRESS")
+            self._db_add(id="DB-D1")
+            clock.advance(45)
+            db_store.mark_done(self.db_path, "DB-D1", "ok")
+            clock.advance(2 * 3600)
+            code, out = self.run_cmd([
+                "--db",
+                str(self.db_path),
+                "kpi",
+                "--log-path",
+                str(log_path),
+                "--no-checkpoint",
+                "--stale-minutes",
+                "60",
+                "--max-stale-in-progress",
+                "0",
+            ])
+        self.assertEqual(code, 0)
+        self.assertIn("stale_in_progress=1", out)
+        self.assertIn("e2e_p50_ms=45000", out)
+        self.assertIn("alert stale_in_progress=1 exceeds 0", out)
+
+        with use_clock(clock):
+            code, out = self.run_cmd(
+                ["--db", str(self.db_path), "kpi", "--log-path", str(log_path), "--no-checkpoint", "--e2e-window", "1h"]
+            )
+        self.assertEqual(code, 0)
+        self.assertIn("e2e_p50_ms=None", out)
+
+    def _legacy_db(self) -> Path:
+        """A queue DB from before the epoch columns and queue_counters, with one IN_PROGRESS item."""
+        legacy = Path(self.tmp.name) / "legacy.db"
+        with sqlite3.connect(legacy) as conn:
+            conn.execute(
+                "CREATE TABLE queue_items (id TEXT PRIMARY KEY, status TEXT NOT NULL, priority TEXT NOT NULL, "
+                "task TEXT NOT NULL, success_criteria TEXT NOT NULL, owner_session TEXT NOT NULL DEFAULT '-', "
+                "started_at_kst TEXT NOT NULL DEFAULT '-', due_at_kst TEXT NOT NULL DEFAULT '-', "
+                "notes TEXT NOT NULL DEFAULT '', created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "INSERT INTO queue_items(id, status, priority, task, success_criteria, owner_session, started_at_kst, "
+                "created_at, updated_at) VALUES('OLD-1', 'IN_PROGRESS', 'P1', 't', 'c', 's', '2026-01-01 10:00', "
+                "'2026-01-01 09:30', '2026-01-01 10:00')"
+            )
+        return legacy
+
+    def test_kpi_migrates_a_legacy_db_first(self):
+        legacy = self._legacy_db()
+        self.log_path.write_text("", encoding="utf-8")
+        with use_clock(SimulatedClock(1767229200.0 + 2 * 3600)):
+            code, out = self.run_cmd(["--db", str(legacy), "kpi", "--no-checkpoint", "--max-stale-in-progress", "1"])
+        self.assertEqual(code, 0)
+        self.assertIn("stale_in_progress=1", out)
+
+    def test_status_and_metrics_serve_migrate_a_legacy_db_first(self):
+        legacy = self._legacy_db()
+        code, out = self.run_cmd(["--db", str(legacy), "status"])
+        self.assertEqual(code, 0)
+        self.assertIn("IN_PROGRESS=1", out)
+
+        prom = Path(self.tmp.name) / "orch.prom"
+        code, _ = self.run_cmd(["metrics-serve", "--db-path", str(legacy), "--textfile", str(prom)])
+        self.assertEqual(code, 0)
+        self.assertIn('orch_queue_items{status="IN_PROGRESS",priority="P1"} 1', prom.read_text(encoding="utf-8"))
+
     def test_kpi_fail_on_alert(self):
         log_path = Path(self.tmp.name) / "runs2.jsonl"
         log_path.write_text(
@@ -177,6 +270,44 @@ class OpsCliTests(unittest.TestCase):
         self.assertEqual(code, 2)
         self.assertIn("alert", out)
 
+    def test_kpi_window_watch_aborts_when_success_rate_drops(self):
+        log_path = Path(self.tmp.name) / "runs3.jsonl"
+        t0 = 1767225600000
+        event = {"event": "run_end", "command": "done", "exit_code": 0, "duration_ms": 10, "ts_epoch_ms": t0}
+        log_path.write_text(json.dumps(event) + "\n", encoding="utf-8")
+        clock = {"now": t0 / 1000 + 60}
+
+        def sleep(seconds):
+            clock["now"] += seconds
+            with log_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({**event, "command": "fail", "ts_epoch_ms": int(clock["now"] * 1000)}) + "\n")
+
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            code = ops.cmd_kpi_window(
+                log_path,
+                30,
+                max_failure_rate=None,
+                max_latency_p95_ms=None,
+                min_success_rate=0.95,
+                fail_on_alert=True,
+                watch=True,
+                interval_seconds=30,
+                now=lambda: clock["now"],
+                sleep=sleep,
+            )
+        lines = buf.getvalue().splitlines()
+        self.assertEqual(code, 2)
+        self.assertIn("kpi window=30m runs=1 success_rate=100.00%", lines[0])
+        self.assertIn("success_rate=50.00%", lines[1])
+        self.assertTrue(lines[2].startswith("abort success_rate_30m=0.5000"), lines)
+
+    def test_kpi_watch_requires_window(self):
+        with redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit) as caught:
+            ops.main(["kpi", "--watch"])
+        self.assertEqual(caught.exception.code, 2)
+        self.assertIn("kpi --watch needs --window", err.getvalue())
+
     def test_retry_db_mode_respects_attempts(self):
         self._db_add(id="DB-R1", status="FAILED")
         code, out = self.run_cmd(["--db", str(self.db_path), "retry", "--id", "DB-R1"])
@@ -185,6 +316,37 @@ class OpsCliTests(unittest.TestCase):
         row = [r for r in db_store.list_items(self.db_path) if r["id"] == "DB-R1"][0]
         self.assertEqual(row["status"], "PENDING")
         self.assertEqual(row["attempt_count"], 1)
+        self.assertGreater(row["not_before"], 0)
+        self.assertIn(f"retry_not_before={row['not_before']}", row["notes"])
+        self.assertIsNone(db_store.pick_next(self.db_path, owner_session="w", now_ts=row["not_before"] - 1))
+
+    def test_compact_events_db(self):
+        self._db_add(id="DB-C1", status="FAILED")
+        archive = Path(self.tmp.name) / "archive.jsonl.gz"
+        code, out = self.run_cmd(
+            ["--db", str(self.db_path), "compact-events", "--keep-last", "1", "--archive", str(archive)]
+        )
+        self.assertEqual(code, 0)
+        self.assertIn("compact-events archived=1 remaining=1", out)
+        self.assertTrue(archive.exists())
+
+    def test_compact_events_without_policy_is_a_usage_error(self):
+        with redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit) as caught:
+            ops.main(["--db", str(self.db_path), "compact-events"])
+        self.assertEqual(caught.exception.code, 2)
+        self.assertIn("needs --keep-days and/or --keep-last", err.getvalue())
+
+    def test_kpi_malformed_window_is_a_usage_error(self):
+        cases = [
+            (["kpi", "--window", "soon"], "invalid window: 'soon'"),
+            (["kpi", "--e2e-window", "0m"], "window must be positive: '0m'"),
+        ]
+        for argv, message in cases:
+            with self.subTest(argv=argv):
+                with redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit) as caught:
+                    ops.main(["--db", str(self.db_path), *argv])
+                self.assertEqual(caught.exception.code, 2)
+                self.assertIn(message, err.getvalue())
 
 
 if __name__ == "__main__":
@@ -1,5 +1,9 @@
 import io
+import json
+import os
 import tempfile
+import threading
+import time
 import unittest
 from contextlib import redirect_stdout
 from pathlib import Path
@@ -27,6 +31,7 @@ class OrchCliTests(unittest.TestCase):
         self.tmp = tempfile.TemporaryDirectory()
         self.queue_path = Path(self.tmp.name) / "QUEUE.md"
         self.queue_path.write_text(SAMPLE_QUEUE, encoding="utf-8")
+        self.log_path = Path(self.tmp.name) / "runs.jsonl"
 
     def tearDown(self):
         self.tmp.cleanup()
@@ -37,7 +42,7 @@ class OrchCliTests(unittest.TestCase):
     def run_cmd(self, argv):
         buf = io.StringIO()
         with redirect_stdout(buf):
-            code = orch.main(["--queue", str(self.queue_path)] + argv)
+            code = orch.main(["--queue", str(self.queue_path), "--log-path", str(self.log_path)] + argv)
         return code, buf.getvalue()
 
     def test_parse_rows_count(self):
@@ -129,6 +134,12 @@ class OrchCliTests(unittest.TestCase):
         text = self.queue_path.read_text(encoding="utf-8")
         self.assertIn("line / with pipe", text)
 
+    def test_run_end_log_records_lock_wait(self):
+        self.run_cmd(["pick"])
+        run_end = json.loads(self.log_path.read_text(encoding="utf-8").splitlines()[-1])
+        self.assertEqual(run_end["event"], "run_end")
+        self.assertGreaterEqual(run_end["lock_wait_ms"], 0)
+
     def test_md_read_only_blocks_mutation(self):
         with patch("automation.orchestrator.orch.config.QUEUE_MD_READ_ONLY", True):
             code, out = self.run_cmd([
@@ -146,5 +157,318 @@ class OrchCliTests(unittest.TestCase):
         self.assertIn("read-only", out)
 
 
+class QueueRowTests(unittest.TestCase):
+    def make(self, **overrides):
+        cells = {
+            "id": "ORCH-1",
+            "status": "PENDING",
+            "priority": "P1",
+            "task": "t",
+            "success_criteria": "c",
+            "owner_session": "-",
+            "started_at_kst": "-",
+            "due_at_kst": "-",
+            "notes": "",
+        }
+        cells.update(overrides)
+        return orch.QueueRow(**cells)
+
+    def test_slotted_and_interned(self):
+        row = self.make(status="".join(["PEN", "DING"]))
+        self.assertFalse(hasattr(row, "__dict__"))
+        self.assertIs(row.status, "PENDING")
+        with self.assertRaises(AttributeError):
+            row.unknown = "x"
+
+    def test_dataclass_like_api_and_mapping_access(self):
+        row = self.make()
+        self.assertEqual(row, self.make())
+        self.assertNotEqual(row, self.make(notes="x"))
+        self.assertTrue(repr(row).startswith("QueueRow(id='ORCH-1', status='PENDING'"))
+        self.assertEqual(row["priority"], "P1")
+        self.assertEqual(row.get("owner_session"), "-")
+        self.assertIsNone(row.get("missing"))
+        with self.assertRaises(KeyError):
+            row["missing"]
+
+
+class QueueFileIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue_path = Path(self.tmp.name) / "QUEUE.md"
+        self.queue_path.write_text(SAMPLE_QUEUE, encoding="utf-8")
+        self.qf = orch.QueueFile(self.queue_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def row(self, row_id, status="PENDING", priority="P1"):
+        return orch.QueueRow(row_id, status, priority, "t", "c", "-", "-", "-", "")
+
+    def test_next_pending_follows_priority_then_table_order(self):
+        self.qf.add_row(self.row("ORCH-103", priority="P0"))
+        order = []
+        while (row := self.qf.next_pending()) is not None:
+            order.append(row.id)
+            self.qf.update(row, status="IN_PROGRESS")
+        self.assertEqual(order, ["ORCH-101", "ORCH-103", "ORCH-100"])
+
+    def test_updates_move_rows_between_buckets_and_heap(self):
+        qf = self.qf
+        qf.update(qf.find_by_id("ORCH-100"), priority="P0")
+        self.assertEqual(qf.next_pending().id, "ORCH-100")
+
+        qf.update(qf.find_by_id("ORCH-102"), status="PENDING", owner_session="".join(["w", "1"]))
+        qf.update(qf.find_by_id("ORCH-100"), status="DONE")
+        self.assertEqual([r.id for r in qf.rows_with_status("PENDING")], ["ORCH-101", "ORCH-102"])
+        self.assertEqual([r.id for r in qf.rows_with_status("DONE")], ["ORCH-100"])
+        self.assertEqual(qf.rows_with_status("IN_PROGRESS"), [])
+        self.assertEqual(qf.next_pending().id, "ORCH-101")
+        self.assertIs(qf.get("ORCH-102").owner_session, "w1")
+
+        qf.update(qf.find_by_id("ORCH-101"), id="ORCH-111")
+        self.assertIsNone(qf.get("ORCH-101"))
+        self.assertEqual(qf.get("ORCH-111").priority, "P0")
+
+    def test_update_rejects_foreign_rows_and_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            self.qf.update(self.row("ORCH-100"), status="DONE")
+        with self.assertRaises(AttributeError):
+            self.qf.update(self.qf.find_by_id("ORCH-100"), colour="red")
+
+    def test_replaced_or_appended_list_is_reindexed(self):
+        self.assertIsNone(self.qf.get("ORCH-500"))
+        self.qf.rows.append(self.row("ORCH-500", priority="P0"))
+        self.assertEqual(self.qf.get("ORCH-500").priority, "P0")
+        self.assertEqual(self.qf.next_pending().id, "ORCH-101")
+
+        self.qf.rows = [self.row("ORCH-600", priority="P2")]
+        self.assertIsNone(self.qf.get("ORCH-100"))
+        self.assertEqual(self.qf.next_pending().id, "ORCH-600")
+
+
+class QueueFileSaveTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue_path = Path(self.tmp.name) / "QUEUE.md"
+        rows = "".join(f"| ORCH-{i:03d} | PENDING | P1 | task {i:03d} | c | - | - | - | n |\n" for i in range(40))
+        head, _ = SAMPLE_QUEUE.split("| ORCH-100", 1)
+        self.queue_path.write_text(head + rows + "\n## Tail\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_consistent(self, qf):
+        text = self.queue_path.read_text(encoding="utf-8")
+        self.assertEqual(text, "\n".join(qf.lines) + "\n")
+        reparsed = orch.QueueFile(self.queue_path)
+        self.assertEqual(reparsed.rows, qf.rows)
+        self.assertTrue(text.endswith("\n## Tail\n"))
+
+    def test_same_length_edit_patches_in_place(self):
+        qf = orch.QueueFile(self.queue_path)
+        qf.find_by_id("ORCH-005").priority = "P0"
+        qf.find_by_id("ORCH-030").notes = "x"
+        qf.save()
+        self.assertEqual(qf.last_save_mode, "patch")
+        self.assert_consistent(qf)
+        qf.save()
+        self.assertEqual(qf.last_save_mode, "noop")
+
+    def test_appends_and_late_length_changes_splice_the_tail(self):
+        qf = orch.QueueFile(self.queue_path)
+        inode = self.queue_path.stat().st_ino
+        qf.add_row(orch.QueueRow("ORCH-900", "PENDING", "P2", "new", "c", "-", "-", "-", ""))
+        qf.save()
+        self.assertEqual(qf.last_save_mode, "splice")
+        self.assertEqual(self.queue_path.stat().st_ino, inode)
+        self.assert_consistent(qf)
+
+        qf.update(qf.find_by_id("ORCH-035"), notes="a much longer note than before")
+        qf.update(qf.find_by_id("ORCH-030"), priority="P0")
+        qf.save()
+        self.assertEqual(qf.last_save_mode, "splice")
+        self.assert_consistent(qf)
+        self.assertEqual(sorted(p.name for p in self.queue_path.parent.iterdir()), ["QUEUE.md", "QUEUE.md.lock"])
+
+    def test_early_length_change_rewrites_atomically(self):
+        qf = orch.QueueFile(self.queue_path)
+        inode = self.queue_path.stat().st_ino
+        qf.update(qf.find_by_id("ORCH-001"), notes="a much longer note than before")
+        qf.save()
+        self.assertEqual(qf.last_save_mode, "full")
+        self.assertNotEqual(self.queue_path.stat().st_ino, inode)
+        self.assert_consistent(qf)
+
+        qf.add_row(orch.QueueRow("ORCH-900", "PENDING", "P2", "new", "c", "-", "-", "-", ""))
+        qf.save()
+        self.assertEqual(qf.last_save_mode, "splice")
+        self.assert_consistent(qf)
+
+    def test_cli_mutations_avoid_full_rewrites(self):
+        row = "| ORCH-{:03d} | DONE | P1 | task | c | w1 | 2026-01-01 10:00 | - | ok |\n"
+        done = "".join(row.format(i) for i in range(40))
+        head, _ = SAMPLE_QUEUE.split("| ORCH-100", 1)
+        tail = "| ORCH-500 | PENDING | P1 | late task | c | - | - | - | n |\n\n## Tail\n"
+        self.queue_path.write_text(head + done + tail, encoding="utf-8")
+
+        def run(*argv):
+            args = orch.build_parser().parse_args(["--queue", str(self.queue_path), *argv])
+            with orch.QueueFile(self.queue_path, lock=True) as qf, redirect_stdout(io.StringIO()):
+                args.func(qf, args)
+            return qf
+
+        qf = run("add", "--id", "ORCH-501", "--priority", "P0", "--task", "urgent", "--success-criteria", "c")
+        self.assertEqual(qf.last_save_mode, "splice")
+        qf = run("pick", "--owner-session", "w2")
+        self.assertEqual(qf.last_save_mode, "splice")
+        qf = run("done", "--id", "ORCH-501", "--notes", "ok")
+        self.assertEqual(qf.last_save_mode, "splice")
+
+        reparsed = orch.QueueFile(self.queue_path)
+        self.assertEqual(
+            [(r.id, r.status) for r in reparsed.rows[-3:]],
+            [("ORCH-039", "DONE"), ("ORCH-500", "PENDING"), ("ORCH-501", "DONE")],
+        )
+        self.assertTrue(self.queue_path.read_text(encoding="utf-8").endswith("|\n\n## Tail\n"))
+
+    def test_lock_serializes_read_modify_write(self):
+        holder = orch.QueueFile(self.queue_path, lock=True)
+        result = {}
+
+        def contender():
+            with orch.QueueFile(self.queue_path, lock=True) as qf:
+                result["priority"] = qf.find_by_id("ORCH-002").priority
+                result["wait_ms"] = qf.lock_wait_ms
+
+        t = threading.Thread(target=contender)
+        t.start()
+        time.sleep(0.05)
+        holder.find_by_id("ORCH-002").priority = "P0"
+        holder.save()
+        holder.close()
+        t.join(timeout=5)
+        self.assertEqual(result["priority"], "P0")
+        self.assertGreater(result["wait_ms"], 0)
+
+    def test_reader_waits_for_a_save_in_progress(self):
+        holder = orch.QueueFile(self.queue_path, lock=True)
+        result = {}
+
+        def reader():
+            result["priority"] = orch.QueueFile(self.queue_path).find_by_id("ORCH-002").priority
+
+        t = threading.Thread(target=reader)
+        t.start()
+        time.sleep(0.05)
+        self.assertNotIn("priority", result)
+        holder.update(holder.find_by_id("ORCH-002"), priority="P0")
+        holder.save()
+        holder.close()
+        t.join(timeout=5)
+        self.assertEqual(result["priority"], "P0")
+
+    def test_interrupted_patch_is_replayed_from_the_journal(self):
+        qf = orch.QueueFile(self.queue_path, lock=True)
+        qf.update(qf.find_by_id("ORCH-005"), priority="P0")
+        with patch.object(orch, "_apply_patches", side_effect=OSError("crashed mid-save")):
+            with self.assertRaises(OSError):
+                qf.save()
+        qf.close()
+        journal = orch.journal_path(self.queue_path)
+        self.assertTrue(journal.exists())
+
+        self.assertEqual(orch.QueueFile(self.queue_path).find_by_id("ORCH-005").priority, "P0")
+        self.assertFalse(journal.exists())
+        self.assertIn("| ORCH-005 | PENDING | P0 |", self.queue_path.read_text(encoding="utf-8"))
+
+    def test_lock_timeout(self):
+        with orch.QueueFile(self.queue_path, lock=True):
+            with patch("automation.orchestrator.orch.config.QUEUE_MD_LOCK_TIMEOUT_SECONDS", 0.02):
+                with self.assertRaises(TimeoutError):
+                    orch.QueueFile(self.queue_path, lock=True)
+
+    def test_external_change_or_non_canonical_file_forces_full_rewrite(self):
+        qf = orch.QueueFile(self.queue_path)
+        text = self.queue_path.read_text(encoding="utf-8")
+        self.queue_path.write_text(text.replace("## Tail", "## Tail2"), encoding="utf-8")
+        qf.find_by_id("ORCH-039").priority = "P0"
+        qf.save()
+        self.assertEqual(qf.last_save_mode, "full")
+
+        self.queue_path.write_text(text.rstrip("\n"), encoding="utf-8")
+        qf = orch.QueueFile(self.queue_path)
+        qf.find_by_id("ORCH-039").priority = "P0"
+        qf.save()
+        self.assertEqual(qf.last_save_mode, "full")
+        self.assert_consistent(qf)
+
+
+class QueueParseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue_path = Path(self.tmp.name) / "QUEUE.md"
+        self.write(SAMPLE_QUEUE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text, age_seconds=10):
+        self.queue_path.write_text(text, encoding="utf-8")
+        past = time.time() - age_seconds
+        os.utime(self.queue_path, (past, past))
+
+    def test_unchanged_file_is_served_from_cache(self):
+        cache = orch.QueueParseCache(maxsize=4)
+        with patch.object(orch, "PARSE_CACHE", cache):
+            first = orch.QueueFile(self.queue_path)
+            second = orch.QueueFile(self.queue_path)
+            self.assertEqual((cache.misses, cache.hits), (1, 1))
+            self.assertEqual(second.rows, first.rows)
+            self.assertIsNot(second.rows[0], first.rows[0])
+
+            self.write(SAMPLE_QUEUE.replace("task one", "task uno"))
+            third = orch.QueueFile(self.queue_path)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(third.find_by_id("ORCH-100").task, "task uno")
+
+    def test_cache_hit_builds_only_the_rows_it_returns(self):
+        cache = orch.QueueParseCache(maxsize=4)
+        with patch.object(orch, "PARSE_CACHE", cache):
+            orch.QueueFile(self.queue_path)
+            with patch.object(orch.QueueRow, "_from_cells", wraps=orch.QueueRow._from_cells) as build:
+                qf = orch.QueueFile(self.queue_path)
+                self.assertEqual(build.call_count, 0)
+                self.assertEqual(qf.next_pending().id, "ORCH-101")
+                self.assertEqual(qf.get("ORCH-101").priority, "P0")
+                self.assertEqual(build.call_count, 1)
+                self.assertEqual([r.id for r in qf.rows], ["ORCH-100", "ORCH-101", "ORCH-102"])
+        self.assertEqual(cache.hits, 1)
+
+    def test_recently_modified_file_is_not_trusted(self):
+        cache = orch.QueueParseCache(maxsize=4)
+        self.write(SAMPLE_QUEUE, age_seconds=0)
+        with patch.object(orch, "PARSE_CACHE", cache):
+            orch.QueueFile(self.queue_path)
+            orch.QueueFile(self.queue_path)
+        self.assertEqual((cache.misses, cache.hits), (2, 0))
+
+    def test_sidecar_survives_process_cache(self):
+        with patch.object(orch, "PARSE_CACHE", orch.QueueParseCache(maxsize=4, sidecar=True)):
+            orch.QueueFile(self.queue_path)
+        self.assertTrue(orch.QueueParseCache.sidecar_path(self.queue_path).exists())
+
+        fresh = orch.QueueParseCache(maxsize=4, sidecar=True)
+        no_parse = patch.object(orch.QueueFile, "_parse", side_effect=AssertionError)
+        with patch.object(orch, "PARSE_CACHE", fresh), no_parse:
+            qf = orch.QueueFile(self.queue_path)
+        self.assertEqual(fresh.hits, 1)
+        self.assertEqual(len(qf.rows), 3)
+
+        orch.QueueParseCache.sidecar_path(self.queue_path).write_bytes(b"garbage")
+        with patch.object(orch, "PARSE_CACHE", orch.QueueParseCache(maxsize=4, sidecar=True)):
+            self.assertEqual(len(orch.QueueFile(self.queue_path).rows), 3)
+
+
 if __name__ == "__main__":
     unittest.main()
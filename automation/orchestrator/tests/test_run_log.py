@@ -0,0 +1,59 @@
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from automation.orchestrator import run_log
+
+DAY1_MS = 1767225600000  # 2026-01-01 09:00 KST
+DAY2_MS = DAY1_MS + 24 * 3600 * 1000
+
+
+class RunLogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = Path(self.tmp.name) / "logs" / "orch_runs.jsonl"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def writer(self, **kwargs):
+        opts = {"max_bytes": 0, "rotate_daily": True, "compress": False, "buffer_events": 100}
+        opts.update(kwargs)
+        return run_log.RunLogWriter(self.log, **opts)
+
+    def test_events_are_buffered_until_flush(self):
+        w = self.writer()
+        w.append({"event": "run_start", "ts_epoch_ms": DAY1_MS})
+        w.append({"event": "run_end", "ts_epoch_ms": DAY1_MS + 5})
+        self.assertFalse(self.log.exists())
+        w.flush()
+        events = [json.loads(line) for line in self.log.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([e["event"] for e in events], ["run_start", "run_end"])
+
+    def test_size_rotation_writes_segments_and_index(self):
+        w = self.writer(max_bytes=1, rotate_daily=False)
+        for i in range(3):
+            w.append({"event": "run_end", "n": i, "ts_epoch_ms": DAY1_MS + i}, flush=True)
+
+        index = run_log.read_index(self.log)
+        self.assertEqual([e["segment"] for e in index], ["orch_runs.20260101.jsonl", "orch_runs.20260101.1.jsonl"])
+        self.assertEqual((index[1]["start_ms"], index[1]["end_ms"]), (DAY1_MS + 1, DAY1_MS + 1))
+        self.assertEqual([e["n"] for e in run_log.iter_events(self.log)], [0, 1, 2])
+
+    def test_daily_rotation_compresses_and_window_skips_old_segments(self):
+        w = self.writer(compress=True)
+        w.append({"event": "run_end", "day": 1, "ts_epoch_ms": DAY1_MS}, flush=True)
+        w.append({"event": "run_end", "day": 2, "ts_epoch_ms": DAY2_MS}, flush=True)
+
+        segment = self.log.with_name("orch_runs.20260101.jsonl.gz")
+        with gzip.open(segment, "rt", encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["day"], 1)
+        self.assertEqual(run_log.segments(self.log, start_ms=DAY2_MS), [self.log])
+        self.assertEqual([e["day"] for e in run_log.iter_events(self.log)], [1, 2])
+        self.assertEqual([e["day"] for e in run_log.iter_events(self.log, end_ms=DAY1_MS + 1)], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from automation.orchestrator import db_store
+from automation.orchestrator.benchmarks import soak_sim
+from automation.orchestrator.clock import SimulatedClock, get_clock, use_clock
+
+
+class SimulatedClockTests(unittest.TestCase):
+    def test_use_clock_drives_db_timestamps_and_restores(self):
+        original = get_clock()
+        clock = SimulatedClock(soak_sim.START_EPOCH)
+        with use_clock(clock):
+            self.assertEqual(db_store.now_epoch(), soak_sim.START_EPOCH)
+            self.assertEqual(db_store.now_kst_str(), "2026-01-01 09:00")
+            clock.sleep(90)
+            self.assertEqual(db_store.now_kst_str(), "2026-01-01 09:01")
+            with self.assertRaises(ValueError):
+                clock.advance(-1)
+        self.assertIs(get_clock(), original)
+
+
+class SoakSimulatorTests(unittest.TestCase):
+    def test_short_profile_b_run(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = Path(td) / "soak.db"
+            sim = soak_sim.SoakSimulator(db, soak_sim.PROFILES["B"], seed=3, hours=1)
+            report = sim.run()
+            with sqlite3.connect(str(db)) as conn:
+                statuses = dict(conn.execute("SELECT id, status FROM queue_items").fetchall())
+
+        self.assertEqual(report["profile"], "B")
+        self.assertGreater(report["arrivals"], 200)
+        self.assertGreater(report["compression"], 1)
+        self.assertEqual(report["sli"]["duplicate_executions"], 0)
+        self.assertNotIn("duplicate_execution", report["aborts"])
+        self.assertNotIn("guardrail_not_blocked", report["aborts"])
+        self.assertTrue(sim.guardrail_ids)
+        self.assertTrue(all(statuses[i] == "BLOCKED" for i in sim.guardrail_ids))
+        self.assertIsNotNone(report["sli"]["latency_p95_s"])
+        self.assertEqual(set(report["slo"]), {"success_rate", "latency_p95", "no_duplicate_execution"})
+        self.assertIn(report["verdict"], {"PASS", "FAIL"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 import io
+import json
 import sqlite3
 import tempfile
 import unittest
 from contextlib import redirect_stdout
 from pathlib import Path
+from unittest.mock import patch
 
 from automation.orchestrator import db_store, watchdog
 
@@ -25,6 +27,7 @@ class WatchdogTests(unittest.TestCase):
         self.tmp = tempfile.TemporaryDirectory()
         self.queue_path = Path(self.tmp.name) / "QUEUE.md"
         self.queue_path.write_text(SAMPLE_QUEUE, encoding="utf-8")
+        self.log_path = Path(self.tmp.name) / "runs.jsonl"
         self.db_path = Path(self.tmp.name) / "queue.db"
         db_store.init_db(self.db_path)
 
@@ -34,7 +37,7 @@ class WatchdogTests(unittest.TestCase):
     def run_cmd(self, argv):
         buf = io.StringIO()
         with redirect_stdout(buf):
-            code = watchdog.main(argv)
+            code = watchdog.main(["--log-path", str(self.log_path)] + argv)
         return code, buf.getvalue()
 
     def test_md_resets_only_stale(self):
@@ -44,6 +47,9 @@ class WatchdogTests(unittest.TestCase):
         text = self.queue_path.read_text(encoding="utf-8")
         self.assertIn("ORCH-200 | PENDING", text)
         self.assertIn("ORCH-201 | IN_PROGRESS", text)
+        event = json.loads(self.log_path.read_text(encoding="utf-8").splitlines()[-1])
+        self.assertEqual((event["event"], event["command"]), ("queue_lock", "watchdog.reset"))
+        self.assertGreaterEqual(event["lock_wait_ms"], 0)
 
     def test_md_noop_when_nothing_stale(self):
         content = SAMPLE_QUEUE.replace("2026-01-01 10:00", "2099-01-01 10:00")
@@ -62,5 +68,72 @@ class WatchdogTests(unittest.TestCase):
         self.assertEqual(row["status"], "PENDING")
 
 
+class RetrySchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp.name) / "queue.db"
+        db_store.init_db(self.db_path)
+        self.store = db_store.QueueStore(self.db_path)
+        self.emitted = []
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def claim_with_lease(self, item_id, expires_at):
+        db_store.add_item(self.db_path, id=item_id, priority="P1", task="t", success_criteria="s")
+        db_store.pick_next(self.db_path, "w1", now_ts=0)
+        db_store.acquire_lease(self.db_path, item_id, "w1", lease_seconds=60)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE queue_items SET lease_expires_at = ? WHERE id = ?", (expires_at, item_id))
+
+    def scheduler(self):
+        sched = watchdog.RetryScheduler(self.store, emit=self.emitted.append)
+        sched.rebuild()
+        return sched
+
+    def test_rebuild_and_fire_only_expired_leases(self):
+        self.claim_with_lease("L1", 1000)
+        self.claim_with_lease("L2", 2000)
+        db_store.add_item(self.db_path, id="F1", priority="P1", task="t", success_criteria="s")
+        db_store.mark_failed(self.db_path, "F1", "boom")
+
+        sched = self.scheduler()
+        self.assertEqual(sched.next_deadline(), 0)
+        self.assertEqual(sched.poll(now_ts=500), ["F1"])
+        self.assertEqual(sched.next_deadline(), 1000)
+        with patch.object(self.store, "retry_eligible_items", wraps=self.store.retry_eligible_items) as spy:
+            self.assertEqual(sched.poll(now_ts=999), [])
+            spy.assert_not_called()
+            self.assertEqual(sched.poll(now_ts=1000), ["L1"])
+            spy.assert_called_once_with(now_ts=1000, ids=["L1"])
+        self.assertEqual(self.emitted, [["F1"], ["L1"]])
+        self.assertEqual(db_store.get_item(self.db_path, "L2")["status"], "IN_PROGRESS")
+
+    def test_events_keep_heap_current(self):
+        sched = self.scheduler()
+        self.assertIsNone(sched.next_deadline())
+
+        db_store.add_item(self.db_path, id="E1", priority="P1", task="t", success_criteria="s")
+        db_store.pick_next(self.db_path, "w1", now_ts=0)
+        db_store.acquire_lease(self.db_path, "E1", "w1", lease_seconds=60)
+        sched.poll(now_ts=0)
+        expires = db_store.get_item(self.db_path, "E1")["lease_expires_at"]
+        self.assertEqual(sched.next_deadline(), expires)
+
+        db_store.mark_done(self.db_path, "E1", "ok")
+        self.assertEqual(sched.poll(now_ts=0), [])
+        self.assertIsNone(sched.next_deadline())
+
+    def test_serve_cli_smoke(self):
+        db_store.add_item(self.db_path, id="S1", priority="P1", task="t", success_criteria="s")
+        db_store.mark_failed(self.db_path, "S1", "boom")
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            code = watchdog.main(["--db", str(self.db_path), "serve", "--poll-ms", "10", "--max-seconds", "0.1"])
+        self.assertEqual(code, 0)
+        self.assertEqual(buf.getvalue().strip(), "RESET S1")
+
+
 if __name__ == "__main__":
     unittest.main()
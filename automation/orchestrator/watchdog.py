@@ -4,20 +4,26 @@
 MVP behavior:
 - DB mode: use retry_eligible_items for FAILED / stale IN_PROGRESS
 - Markdown mode: reset stale IN_PROGRESS to PENDING by age
+
+`serve` (DB only) keeps a min-heap of retry deadlines (lease expiry for
+IN_PROGRESS, "now" for FAILED) instead of rescanning the table every pass.
+The heap is rebuilt from the lease index at startup, kept current by tailing
+queue_events, and only ids whose deadline has passed are re-checked.
 """
 
 from __future__ import annotations
 
 import argparse
-from datetime import datetime, timedelta, timezone
+import heapq
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Callable
 
 from automation.orchestrator import config, db_store
-from automation.orchestrator.orch import QueueFile
+from automation.orchestrator.clock import KST, get_clock, now_kst
+from automation.orchestrator.orch import QueueFile, emit_lock_wait
 from automation.orchestrator.ops import _append_note
 
-KST = timezone(timedelta(hours=config.TIMEZONE_OFFSET_HOURS))
-
 
 def _parse_kst(s: str) -> datetime | None:
     s = (s or "").strip()
@@ -30,27 +36,29 @@ def _parse_kst(s: str) -> datetime | None:
         return None
 
 
-def _run_md(queue_path: Path, stale_minutes: int) -> list[str]:
-    qf = QueueFile(queue_path)
-    now = datetime.now(KST)
-    stale_cutoff = now - timedelta(minutes=stale_minutes)
-
-    reset_ids: list[str] = []
-    for row in qf.rows:
-        if row.status != "IN_PROGRESS":
-            continue
-        started = _parse_kst(row.started_at_kst)
-        if started is None or started > stale_cutoff:
-            continue
-
-        row.status = "PENDING"
-        row.owner_session = "-"
-        row.started_at_kst = "-"
-        row.notes = _append_note(row.notes, "[watchdog] stale reset")
-        reset_ids.append(row.id)
-
-    if reset_ids:
-        qf.save()
+def _run_md(queue_path: Path, stale_minutes: int, log_path: Path | None = None) -> list[str]:
+    with QueueFile(queue_path, lock=True) as qf:
+        now = now_kst()
+        stale_cutoff = now - timedelta(minutes=stale_minutes)
+
+        reset_ids: list[str] = []
+        for row in qf.rows_with_status("IN_PROGRESS"):
+            started = _parse_kst(row.started_at_kst)
+            if started is None or started > stale_cutoff:
+                continue
+
+            qf.update(
+                row,
+                status="PENDING",
+                owner_session="-",
+                started_at_kst="-",
+                notes=_append_note(row.notes, "[watchdog] stale reset"),
+            )
+            reset_ids.append(row.id)
+
+        if reset_ids:
+            qf.save()
+    emit_lock_wait(log_path, "watchdog.reset", qf)
     return reset_ids
 
 
@@ -58,17 +66,119 @@ def _run_db(db_path: Path) -> list[str]:
     return db_store.retry_eligible_items(db_path)
 
 
+class RetryScheduler:
+    """Deadline heap over a QueueStore; entries are validated lazily on pop."""
+
+    def __init__(self, store: db_store.QueueStore, emit: Callable[[list[str]], None] | None = None):
+        self.store = store
+        self.emit = emit or (lambda ids: print("RESET " + ",".join(ids), flush=True))
+        self._heap: list[tuple[int, str]] = []
+        self._due: dict[str, int] = {}
+        self._last_event_id = 0
+        self._seen_version: int | None = None
+
+    def rebuild(self) -> None:
+        self._last_event_id = self.store.max_event_id()
+        self._due = {item_id: due for due, item_id in self.store.retry_deadlines()}
+        self._heap = [(due, item_id) for item_id, due in self._due.items()]
+        heapq.heapify(self._heap)
+        self._seen_version = self.store.data_version()
+
+    def next_deadline(self) -> int | None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def _refresh(self, ids: set[str]) -> None:
+        rows = self.store.get_items(ids)
+        for item_id in ids:
+            row = rows.get(item_id)
+            due = db_store.retry_deadline(row) if row is not None else None
+            if due is None:
+                self._due.pop(item_id, None)
+            elif self._due.get(item_id) != due:
+                self._due[item_id] = due
+                heapq.heappush(self._heap, (due, item_id))
+        # Superseded entries are skipped on pop; compact once they dominate the heap.
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(due, item_id) for item_id, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def _tail_events(self) -> None:
+        version = self.store.data_version()
+        if version == self._seen_version:
+            return
+        self._seen_version = version
+        while True:
+            events = self.store.events_after(self._last_event_id)
+            if not events:
+                return
+            self._last_event_id = events[-1][0]
+            self._refresh({item_id for _, item_id, _ in events})
+
+    def poll(self, now_ts: int | None = None) -> list[str]:
+        now = now_ts if now_ts is not None else db_store.now_epoch()
+        self._tail_events()
+        due_ids: list[str] = []
+        while (deadline := self.next_deadline()) is not None and deadline <= now:
+            _, item_id = heapq.heappop(self._heap)
+            del self._due[item_id]
+            due_ids.append(item_id)
+        if not due_ids:
+            return []
+        retried = self.store.retry_eligible_items(now_ts=now, ids=due_ids)
+        # Rows that raced (renewed lease, finished) go back in with their current deadline.
+        self._refresh(set(due_ids))
+        if retried:
+            self.emit(retried)
+        return retried
+
+    def serve(
+        self, poll_interval: float, max_seconds: float | None = None, sleep: Callable[[float], None] | None = None
+    ) -> None:
+        clock = get_clock()
+        sleep = sleep or clock.sleep
+        self.rebuild()
+        deadline = clock.monotonic() + max_seconds if max_seconds else None
+        while deadline is None or clock.monotonic() < deadline:
+            self.poll()
+            sleep(poll_interval)
+
+
+def _serve(args: argparse.Namespace) -> int:
+    with db_store.QueueStore(args.db) as store:
+        store.init_db()
+        try:
+            RetryScheduler(store).serve(args.poll_ms / 1000, max_seconds=args.max_seconds)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Orchestrator watchdog entrypoint")
     p.add_argument("--queue", default="automation/orchestrator/QUEUE.md")
     p.add_argument("--db", help="SQLite queue path (preferred when set)")
     p.add_argument("--stale-minutes", type=int, default=60)
+    p.add_argument("--log-path", default=str(config.LOG_PATH), help="JSONL run log for queue-lock waits")
+
+    sub = p.add_subparsers(dest="command")
+    serve = sub.add_parser("serve", help="Run as a long-lived deadline-driven watchdog (requires --db)")
+    serve.add_argument("--poll-ms", type=int, default=config.WATCHDOG_POLL_MS, help="Event tail / timer poll interval")
+    serve.add_argument("--max-seconds", type=float, default=None, help="Exit after N seconds (default: run forever)")
     return p
 
 
 def main(argv: list[str] | None = None) -> int:
-    args = build_parser().parse_args(argv)
-    ids = _run_db(Path(args.db)) if args.db else _run_md(Path(args.queue), args.stale_minutes)
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        if not args.db:
+            parser.error("serve requires --db")
+        if args.poll_ms < 1:
+            parser.error("--poll-ms must be >= 1")
+        return _serve(args)
+    ids = _run_db(Path(args.db)) if args.db else _run_md(Path(args.queue), args.stale_minutes, Path(args.log_path))
     if not ids:
         print("NOOP")
         return 0